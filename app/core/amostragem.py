@@ -0,0 +1,111 @@
+import numpy as np
+
+# Acima de PRE_MINMAX pontos por pixel, a série passa antes pelo minmax
+PRE_MINMAX = 4
+# Até quantos pontos por bucket o laço do LTTB roda em Python puro
+BUCKET_PEQUENO = 16
+# Abaixo disso (pontos por pixel), desenhar tudo sai mais barato que reduzir:
+# o laço do LTTB custa ~2-3 ms; montar os vértices, ~0,06 ms a cada mil pontos
+REDUZIR_A_PARTIR = 50
+
+
+def minmax(y, n):
+    """
+    Índices (em ordem) do menor e do maior valor de cada bloco, com ~n/2 blocos
+    do mesmo tamanho: nenhum pico ou vale some. Inclui o primeiro e o último ponto.
+    """
+    y = np.asarray(y, dtype=float)
+    total = len(y)
+    if total <= n:
+        return np.arange(total)
+
+    blocos = max(1, n // 2)
+    tamanho = -(-total // blocos)  # arredonda para cima
+    blocos = -(-total // tamanho)
+    # Completa o último bloco repetindo o último valor (não muda o min/max dele)
+    matriz = np.pad(y, (0, blocos * tamanho - total), mode="edge").reshape(blocos, tamanho)
+    base = np.arange(blocos) * tamanho
+    i_min = np.minimum(base + matriz.argmin(axis=1), total - 1)
+    i_max = np.minimum(base + matriz.argmax(axis=1), total - 1)
+    return np.unique(np.concatenate(([0], i_min, i_max, [total - 1])))
+
+
+def lttb(x, y, n):
+    """
+    Largest-Triangle-Three-Buckets: escolhe n pontos que mantêm o desenho da série.
+    O primeiro e o último ficam; de cada bucket do meio sai o ponto que forma o
+    maior triângulo com o escolhido antes e a média do bucket seguinte.
+    As médias dos buckets saem vetorizadas; a escolha é um laço por bucket
+    (n ~ pixels), em NumPy nos buckets grandes e em floats nos pequenos.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    total = len(x)
+    if total <= n:
+        return np.arange(total)
+    if n < 3:
+        return np.array([0, total - 1][:max(n, 0)], dtype=int)
+
+    # n-2 buckets entre o primeiro e o último ponto (nenhum vazio, pois n < total)
+    bordas = np.linspace(1, total - 1, n - 1).astype(int)
+    contagem = np.diff(bordas)
+    media_x = np.add.reduceat(x[:-1], bordas[:-1]) / contagem
+    media_y = np.add.reduceat(y[:-1], bordas[:-1]) / contagem
+    # Terceiro vértice de cada bucket: média do próximo (o último usa o ponto final)
+    cx = np.append(media_x[1:], x[-1])
+    cy = np.append(media_y[1:], y[-1])
+
+    escolhidos = np.empty(n, dtype=int)
+    escolhidos[0], escolhidos[-1] = 0, total - 1
+    if total / n <= BUCKET_PEQUENO:
+        escolhidos[1:-1] = _escolher_listas(x, y, bordas, cx, cy)
+        return escolhidos
+
+    a = 0
+    for i in range(n - 2):
+        ini, fim = bordas[i], bordas[i + 1]
+        ax, ay = x[a], y[a]
+        area = np.abs((ax - cx[i]) * (y[ini:fim] - ay) - (ax - x[ini:fim]) * (cy[i] - ay))
+        a = ini + int(area.argmax())
+        escolhidos[i + 1] = a
+    return escolhidos
+
+
+def _escolher_listas(x, y, bordas, cx, cy):
+    """Mesmo laço do lttb com floats do Python: com poucos pontos por bucket, sai mais barato que chamar o NumPy."""
+    xs, ys, bordas, cx, cy = x.tolist(), y.tolist(), bordas.tolist(), cx.tolist(), cy.tolist()
+    escolhidos = []
+    a = 0
+    for i in range(len(bordas) - 1):
+        ax, ay = xs[a], ys[a]
+        dx, dy = ax - cx[i], cy[i] - ay
+        maior = -1.0
+        for j in range(bordas[i], bordas[i + 1]):
+            area = abs(dx * (ys[j] - ay) - (ax - xs[j]) * dy)
+            if area > maior:
+                maior, a = area, j
+        escolhidos.append(a)
+    return escolhidos
+
+
+def reduzir(x, y, n):
+    """
+    Índices dos pontos a desenhar quando a série tem muito mais pontos que pixels (n).
+
+    Até REDUZIR_A_PARTIR pontos por pixel (o histórico de qualquer paciente real,
+    um ponto por dia) todos são desenhados. Acima disso a série passa antes pelo
+    minmax (PRE_MINMAX pontos por pixel), então o LTTB final custa o mesmo com
+    cem mil ou com um milhão de pontos. O maior e o menor valor sempre entram.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    total = len(x)
+    if total <= REDUZIR_A_PARTIR * n:
+        return np.arange(total)
+
+    if total > PRE_MINMAX * n:
+        pre = minmax(y, PRE_MINMAX * n)
+        idx = pre[lttb(x[pre], y[pre], n)]
+    else:
+        idx = lttb(x, y, n)
+    return np.union1d(idx, (int(y.argmin()), int(y.argmax())))
@@ -0,0 +1,165 @@
+import re
+from functools import partial
+import asynckivy as ak
+from kivy.clock import Clock
+
+from app.core import cancelamento, lote
+from app.core.pool import VISIVEL, ESCRITA
+
+# Métodos do Database que só leem (o resto grava algo na API)
+PREFIXOS_LEITURA = ("get_", "verify_", "validar_")
+
+
+class AsyncDatabase:
+    """
+    Versão "awaitable" do Database para uso com asynckivy.
+
+    Cada método do Database vira uma corrotina que roda a chamada HTTP
+    no pool de threads do app (PoolPrioridades), liberando a thread principal do Kivy:
+
+        pacientes = await app.async_db.get_pacientes_do_psicologo(psi_id)
+
+    As assinaturas e os retornos são exatamente os mesmos do Database.
+    Leituras entram na fila como VISIVEL e gravações como ESCRITA; para
+    outra classe, use run_prioridade(PREFETCH, func, ...). Leituras que a
+    tela precisa juntas vão por em_lote(...).
+    """
+
+    def __init__(self, db, pool, token=None):
+        self.db = db
+        self.pool = pool
+        # Com token (ver EscopoTela), as chamadas podem ser abandonadas no meio
+        self.token = token
+        self._wrappers = {}
+
+    def com_token(self, token):
+        """Mesmo Database e mesmo pool, mas com as chamadas presas a 'token'."""
+        return AsyncDatabase(self.db, self.pool, token)
+
+    def __getattr__(self, name):
+        # Só chega aqui para atributos que não existem no AsyncDatabase
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        target = getattr(self.db, name)
+        if not callable(target):
+            return target
+
+        wrapper = self._wrappers.get(name)
+        if wrapper is None:
+            prioridade = VISIVEL if name.startswith(PREFIXOS_LEITURA) else ESCRITA
+
+            async def wrapper(*args, **kwargs):
+                return await self.run_prioridade(prioridade, getattr(self.db, name), *args, **kwargs)
+            wrapper.__name__ = name
+            wrapper.__doc__ = target.__doc__
+            self._wrappers[name] = wrapper
+        return wrapper
+
+    async def run(self, func, *args, **kwargs):
+        """Executa qualquer função bloqueante no pool (como leitura visível) e aguarda o resultado."""
+        return await self.run_prioridade(VISIVEL, func, *args, **kwargs)
+
+    async def em_lote(self, *chamadas):
+        """
+        Várias leituras de uma vez, para a tela abrir com uma ida e volta só:
+
+            (ok, total), (ok_prox, proxima) = await db.em_lote(
+                ("get_patient_count", psi_id), ("get_next_appointment", psi_id))
+
+        Cada chamada é (nome do método do Database ou função, *args) e roda na
+        sua thread do pool; os GETs que elas fazem saem juntos (ver lote.Lote).
+        Retorna os resultados na mesma ordem.
+        """
+        grupo = lote.Lote(len(chamadas))
+        tarefas = []
+        for func, *args in chamadas:
+            if isinstance(func, str):
+                func = getattr(self.db, func)
+            tarefas.append(self.run_prioridade(VISIVEL, lote.rodar, grupo, func, *args))
+        tarefas = await ak.wait_all(*tarefas)
+        return [tarefa.result for tarefa in tarefas]
+
+    async def run_prioridade(self, prioridade, func, *args, **kwargs):
+        if self.token is not None:
+            func = partial(cancelamento.rodar, self.token, func)
+        return await ak.run_in_executor(self.pool.fila(prioridade), partial(func, *args, **kwargs))
+
+
+class EscopoTela:
+    """
+    Pedidos feitos em nome de uma tela, que morrem com ela.
+
+        self.escopo.start(self._fetch_data, paciente_id, chave="relatorio")
+
+    chama self._fetch_data(db, paciente_id) numa tarefa do asynckivy, com um
+    'db' (AsyncDatabase) só daquele pedido. Um novo start() com a mesma
+    chave substitui o anterior, e cancelar() (chamado no on_leave pelo
+    ScreenController) encerra todos: a corrotina para no await em que está,
+    o que ainda está na fila do pool não roda e a conexão em andamento é
+    fechada (Transport). Nada chega a mexer numa tela que já saiu.
+
+    Gravações pedidas pelo usuário não passam por aqui: devem terminar mesmo
+    que ele mude de tela.
+
+    ao_atualizar(padrao, callback) repinta a tela quando o cache traz dados
+    novos por trás (stale-while-revalidate); vale até o cancelar().
+    """
+
+    def __init__(self, async_db):
+        self.async_db = async_db
+        self._pedidos = {}  # chave -> (task, token)
+        self._ouvintes = []
+
+    def start(self, fabrica, *args, chave=None):
+        chave = chave if chave is not None else fabrica.__name__
+        self._cancelar(chave)
+        token = cancelamento.Token()
+        task = ak.start(self._rodar(chave, token, fabrica(self.async_db.com_token(token), *args)))
+        if not task.finished:
+            self._pedidos[chave] = (task, token)
+        return task
+
+    async def _rodar(self, chave, token, coro):
+        try:
+            await coro
+        finally:
+            pedido = self._pedidos.get(chave)
+            if pedido is not None and pedido[1] is token:
+                del self._pedidos[chave]
+
+    def _cancelar(self, chave):
+        pedido = self._pedidos.pop(chave, None)
+        if pedido is not None:
+            task, token = pedido
+            token.cancelar()
+            task.cancel()
+
+    def ao_atualizar(self, padrao, callback):
+        """
+        callback(path, data) roda na thread da UI quando uma revalidação em
+        segundo plano traz dados novos de uma rota que casa com 'padrao' (regex).
+        """
+        regex = re.compile(padrao)
+
+        def ouvinte(path, data):
+            # Chamado na thread do pool: volta para a thread da UI
+            if regex.search(path):
+                Clock.schedule_once(lambda dt: ouvinte in self._ouvintes and callback(path, data))
+
+        self._ouvintes.append(ouvinte)
+        self.async_db.db.refresh_listeners.append(ouvinte)
+
+    def cancelar(self):
+        for chave in list(self._pedidos):
+            self._cancelar(chave)
+        ouvintes, self._ouvintes = self._ouvintes, []
+        for ouvinte in ouvintes:
+            try:
+                self.async_db.db.refresh_listeners.remove(ouvinte)
+            except ValueError:
+                pass
+
+    @property
+    def ativos(self):
+        return len(self._pedidos)
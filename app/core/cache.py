@@ -0,0 +1,132 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+
+
+class CachePolicy:
+    """
+    Regra de cache para rotas que casam com 'pattern'.
+    ttl: segundos em que a resposta é servida sem ir à rede.
+    stale: segundos extras em que a resposta velha ainda é servida
+           enquanto uma revalidação roda em segundo plano.
+    """
+
+    def __init__(self, pattern, ttl, stale=0):
+        self.regex = re.compile(pattern)
+        self.ttl = ttl
+        self.stale = stale
+
+    def matches(self, path):
+        return self.regex.search(path) is not None
+
+
+# Rotas de leitura que mudam pouco. O que não estiver aqui é sempre
+# revalidado (If-None-Match / If-Modified-Since), mas nunca servido velho.
+DEFAULT_POLICIES = [
+    CachePolicy(r"^/config/powerbi$", ttl=3600, stale=86400),
+    CachePolicy(r"^/atividades$", ttl=600, stale=3600),
+    CachePolicy(r"^/paciente/\d+/psicologo$", ttl=600, stale=3600),
+    CachePolicy(r"^/users/\d+$", ttl=300, stale=3600),
+    CachePolicy(r"^/psicologo/\d+/pacientes$", ttl=120, stale=1800),
+    # Painel do psicólogo (adiantado no login). Sem janela de resposta velha: uma consulta
+    # marcada em outro aparelho não limpa este cache, então vale no máximo o ttl.
+    CachePolicy(r"^/psicologo/\d+/stats$", ttl=30, stale=0),
+]
+
+
+class CacheEntry:
+    def __init__(self, status, data, size, etag=None, last_modified=None, ttl=0, stale=0):
+        self.status = status
+        self.data = data
+        self.size = size
+        self.etag = etag
+        self.last_modified = last_modified
+        self.ttl = ttl
+        self.stale = stale
+        self.stored_at = time.monotonic()
+
+    @property
+    def age(self):
+        return time.monotonic() - self.stored_at
+
+    def is_fresh(self):
+        return self.age < self.ttl
+
+    def is_usable_stale(self):
+        return self.age < self.ttl + self.stale
+
+    def validators(self):
+        """Headers para uma requisição condicional."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def touch(self):
+        self.stored_at = time.monotonic()
+
+
+class ResponseCache:
+    """
+    Cache LRU de respostas GET, limitado pelo total de bytes.
+    A chave é a URL completa (com query string); o caminho relativo
+    é usado para escolher a política e para invalidar por prefixo.
+    """
+
+    def __init__(self, policies=None, max_bytes=8 * 1024 * 1024):
+        self.policies = list(DEFAULT_POLICIES if policies is None else policies)
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        # Muda a cada invalidação: respostas que saíram antes dela não são guardadas
+        self.generation = 0
+        self._entries = OrderedDict()  # key -> (path, CacheEntry)
+        self._lock = threading.Lock()
+
+    def policy_for(self, path):
+        for policy in self.policies:
+            if policy.matches(path):
+                return policy
+        return None
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            self._entries.move_to_end(key)
+            return item[1]
+
+    def put(self, key, path, entry, generation=None):
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.total_bytes -= old[1].size
+            if entry.size > self.max_bytes:
+                return
+            self._entries[key] = (path, entry)
+            self.total_bytes += entry.size
+            while self.total_bytes > self.max_bytes and self._entries:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.total_bytes -= evicted.size
+
+    def invalidate(self, *prefixes):
+        """Remove as entradas cujo caminho começa com algum dos prefixos."""
+        with self._lock:
+            self.generation += 1
+            for key in [k for k, (path, _) in self._entries.items() if path.startswith(prefixes)]:
+                _, entry = self._entries.pop(key)
+                self.total_bytes -= entry.size
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
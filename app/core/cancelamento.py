@@ -0,0 +1,74 @@
+import threading
+from contextlib import contextmanager
+
+_local = threading.local()
+
+
+class Cancelado(Exception):
+    """A tela que fez o pedido saiu (ou pediu outra coisa no lugar): a resposta não interessa mais."""
+
+
+class Token:
+    """
+    Marca de um pedido que pode ser abandonado. cancelar() vale de qualquer
+    thread: as requisições que ainda não saíram nem saem, e as que estão
+    baixando a resposta têm a conexão fechada na hora.
+    """
+
+    def __init__(self):
+        self._cancelado = threading.Event()
+        self._abortar = set()   # funções que derrubam o que está em andamento
+        self._lock = threading.Lock()
+
+    @property
+    def cancelado(self):
+        return self._cancelado.is_set()
+
+    def cancelar(self):
+        self._cancelado.set()
+        with self._lock:
+            abortar, self._abortar = self._abortar, set()
+        for funcao in abortar:
+            try:
+                funcao()
+            except Exception:
+                pass
+
+    def verificar(self):
+        if self._cancelado.is_set():
+            raise Cancelado()
+
+    def acompanhar(self, abortar):
+        """abortar() será chamada (de outra thread) se o pedido for cancelado enquanto isto corre."""
+        with self._lock:
+            if not self._cancelado.is_set():
+                self._abortar.add(abortar)
+                return
+        abortar()
+        raise Cancelado()
+
+    def soltar(self, abortar):
+        with self._lock:
+            self._abortar.discard(abortar)
+
+
+def atual():
+    """Token do pedido que a thread atual está executando (ou None)."""
+    return getattr(_local, "token", None)
+
+
+@contextmanager
+def usando(token):
+    anterior = atual()
+    _local.token = token
+    try:
+        yield token
+    finally:
+        _local.token = anterior
+
+
+def rodar(token, func, *args, **kwargs):
+    """Executa func com 'token' valendo para esta thread (usado pelas tarefas do pool)."""
+    token.verificar()
+    with usando(token):
+        return func(*args, **kwargs)
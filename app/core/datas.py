@@ -0,0 +1,216 @@
+import re
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+
+from app.core.inicio import sob_demanda
+
+# O pytz só é importado na primeira conversão de fuso, não na abertura do app
+pytz = sob_demanda("pytz")
+
+NOME_FUSO_LOCAL = "America/Sao_Paulo"
+
+
+@lru_cache(maxsize=1)
+def fuso_local():
+    """Fuso usado para exibir datas no app (carregado uma vez só)."""
+    return pytz.timezone(NOME_FUSO_LOCAL)
+
+
+def __getattr__(nome):
+    # datas.FUSO_LOCAL continua funcionando, mas só carrega o fuso quando alguém pede
+    if nome == "FUSO_LOCAL":
+        return fuso_local()
+    raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
+
+_EPOCH = datetime(1970, 1, 1)
+
+# Datas sem zero à esquerda que o fromisoformat recusa (ex: 2025-9-5T8:30:00)
+_FLEXIVEL = re.compile(r"(\d{4})-(\d{1,2})-(\d{1,2})[T ](\d{1,2}):(\d{1,2})(?::(\d{1,2}))?")
+
+
+def parse(valor):
+    """
+    Converte o que a API manda (texto ISO, epoch em s/ms ou datetime) em datetime.
+    Retorna None se não for uma data. Datas sem fuso continuam sem fuso.
+    """
+    if valor is None or valor == "":
+        return None
+    if isinstance(valor, datetime):
+        return valor
+    if isinstance(valor, (int, float)):
+        return datetime.fromtimestamp(_epoch_em_segundos(valor), timezone.utc)
+    texto = str(valor)
+    try:
+        return datetime.fromisoformat(texto)
+    except ValueError:
+        pass
+    if texto.endswith("Z"):
+        try:
+            return datetime.fromisoformat(texto[:-1] + "+00:00")
+        except ValueError:
+            pass
+    m = _FLEXIVEL.match(texto)
+    if m:
+        return datetime(*(int(p) for p in m.groups(default="0")))
+    return None
+
+
+def _epoch_em_segundos(valor):
+    # Epoch em milissegundos tem 13 dígitos
+    return valor / 1000 if valor > 1e11 else valor
+
+
+# --- FUSO ---
+_DIA = 86400
+_SEM_CACHE = object()
+_offset_por_dia = {}  # dia UTC -> offset (s), ou None se o fuso mudou naquele dia
+
+
+@lru_cache(maxsize=1024)
+def _offset_exato(hora_utc):
+    instante = datetime.fromtimestamp(hora_utc * 3600, timezone.utc)
+    return instante.astimezone(fuso_local()).utcoffset().total_seconds()
+
+
+def _offset_local(utc):
+    """Diferença (s) entre o FUSO_LOCAL e UTC no instante; horário de verão antigo incluso."""
+    dia = int(utc // _DIA)
+    offset = _offset_por_dia.get(dia, _SEM_CACHE)
+    if offset is _SEM_CACHE:
+        inicio = _offset_exato(dia * 24)
+        fim = _offset_exato(dia * 24 + 23)
+        offset = inicio if inicio == fim else None
+        _offset_por_dia[dia] = offset
+    if offset is None:
+        return _offset_exato(int(utc // 3600))
+    return offset
+
+
+def _relogio(valor, local):
+    """
+    Segundos do "relógio de parede" que será mostrado (contados a partir de 1970),
+    ou None se não for data.
+    local=True: converte para o FUSO_LOCAL (datas sem fuso são tratadas como UTC).
+    local=False: mostra o horário como veio (usado na agenda, que já é hora local).
+    """
+    if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+        utc = _epoch_em_segundos(valor)
+        return utc + _offset_local(utc) if local else utc
+
+    dt = parse(valor)
+    if dt is None:
+        return None
+    if dt.tzinfo is None:
+        parede = (dt - _EPOCH).total_seconds()
+        return parede + _offset_local(parede) if local else parede
+    if local:
+        utc = dt.timestamp()
+        return utc + _offset_local(utc)
+    return (dt.replace(tzinfo=None) - _EPOCH).total_seconds()
+
+
+# --- FORMATAÇÃO ---
+# Códigos que dependem da hora e não são só %H/%M/%S: esses formatos vão pelo strftime completo
+_CODIGOS_HORA = re.compile(r"%[IpXcTRfzZs]")
+
+
+@lru_cache(maxsize=32)
+def _modelo(fmt):
+    """
+    Troca %H, %M e %S por campos do str.format: a parte de data só muda uma vez
+    por dia (formatar_lote a monta uma vez por dia do lote); a hora é preenchida por conta própria.
+    """
+    if _CODIGOS_HORA.search(fmt):
+        return None
+    return (fmt.replace("{", "{{").replace("}", "}}")
+            .replace("%H", "{h:02d}").replace("%M", "{m:02d}").replace("%S", "{s:02d}"))
+
+
+def _texto_do_dia(dia, modelo):
+    return (_EPOCH + timedelta(days=dia)).strftime(modelo)
+
+
+def _texto(segundos, fmt, modelo):
+    segundos = int(segundos // 1)
+    if modelo is None:
+        return (_EPOCH + timedelta(seconds=segundos)).strftime(fmt)
+    dia, resto = divmod(segundos, _DIA)
+    h, resto = divmod(resto, 3600)
+    m, s = divmod(resto, 60)
+    return _texto_do_dia(dia, modelo).format(h=h, m=m, s=s)
+
+
+def formatar(valor, fmt="%d/%m/%Y %H:%M", local=True):
+    """Formata uma data da API; se não der para ler, devolve o texto original."""
+    segundos = _relogio(valor, local)
+    if segundos is None:
+        return "" if valor is None else str(valor)
+    return _texto(segundos, fmt, _modelo(fmt))
+
+
+def formatar_lote(valores, fmt="%d/%m/%Y %H:%M", local=True):
+    """
+    Mesma coisa que formatar(), para uma lista inteira de uma vez.
+    Texto ISO (o caso comum) é tratado direto no laço; o resto passa por _relogio.
+    """
+    modelo = _modelo(fmt)
+    if modelo is None:
+        return [formatar(v, fmt, local) for v in valores]
+
+    fromiso = datetime.fromisoformat
+    epoch = _EPOCH
+    offsets = _offset_por_dia
+    offset_local = _offset_local
+    relogio = _relogio
+    texto_do_dia = _texto_do_dia
+    dias = {}  # parte de data já montada, por dia do lote (datas do mesmo dia se repetem)
+    saida = []
+    append = saida.append
+    for valor in valores:
+        segundos = None
+        if type(valor) is str:
+            try:
+                dt = fromiso(valor)
+            except ValueError:
+                segundos = relogio(valor, local)
+            else:
+                if dt.tzinfo is None:
+                    utc = (dt - epoch).total_seconds()
+                elif local:
+                    utc = dt.timestamp()
+                else:
+                    utc = (dt.replace(tzinfo=None) - epoch).total_seconds()
+                if local:
+                    offset = offsets.get(int(utc // 86400))
+                    segundos = utc + (offset if offset is not None else offset_local(utc))
+                else:
+                    segundos = utc
+        else:
+            segundos = relogio(valor, local)
+
+        if segundos is None:
+            append("" if valor is None else str(valor))
+            continue
+        dia, resto = divmod(int(segundos // 1), 86400)
+        h, resto = divmod(resto, 3600)
+        dia_txt = dias.get(dia)
+        if dia_txt is None:
+            dia_txt = dias[dia] = texto_do_dia(dia, modelo)
+        append(dia_txt.format(h=h, m=resto // 60, s=resto % 60))
+    return saida
+
+
+def dia(valor):
+    """
+    Dia da data contado a partir de 1970-01-01 (inteiro), sem conversão de fuso;
+    é o eixo X dos gráficos. formatar(dia * 86400, fmt, local=False) volta ao texto.
+    """
+    dt = parse(valor)
+    if dt is None:
+        return None
+    return (dt.date() - _EPOCH.date()).days
+
+
+def agora_iso():
+    """Instante atual em UTC no formato que a API grava."""
+    return datetime.now(timezone.utc).isoformat()
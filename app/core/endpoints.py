@@ -0,0 +1,111 @@
+import os
+import threading
+import time
+
+# Endereço padrão da API. Trocado por COGNITIVE_API_URL no .env; endereços
+# reserva são opcionais, em COGNITIVE_API_URLS (separados por vírgula, na ordem
+# de preferência), ex: https://api-tcc-cognitive.vercel.app,https://api-tcc-cognitive.onrender.com
+# Para a API local: COGNITIVE_API_URL=http://127.0.0.1:8000
+DEFAULT_BASE_URLS = (
+    "https://api-tcc-cognitive.vercel.app",
+)
+
+
+def resolver(base_url=None):
+    """Único ponto onde os endereços da API são decididos (argumento > .env > padrão)."""
+    if base_url:
+        urls = [base_url] if isinstance(base_url, str) else list(base_url)
+    elif os.environ.get("COGNITIVE_API_URLS"):
+        urls = os.environ["COGNITIVE_API_URLS"].split(",")
+    elif os.environ.get("COGNITIVE_API_URL"):
+        urls = [os.environ["COGNITIVE_API_URL"]]
+    else:
+        urls = list(DEFAULT_BASE_URLS)
+    return [u.strip().rstrip("/") for u in urls if u.strip()]
+
+
+class Endpoint:
+    """
+    Um endereço da API com o seu disjuntor: depois de LIMITE_FALHAS falhas
+    seguidas fica PAUSA segundos fora da escolha; passada a pausa, volta a
+    receber pedidos e uma nova falha já o tira de novo.
+
+    latencia: média (em segundos) das sondagens, ou None se nunca respondeu.
+    """
+
+    LIMITE_FALHAS = 3
+    PAUSA = 30.0
+    PESO = 0.3  # peso da sondagem nova na média
+
+    def __init__(self, url):
+        self.url = url
+        self.latencia = None
+        self.falhas = 0
+        self.aberto_ate = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def disponivel(self):
+        return time.monotonic() >= self.aberto_ate
+
+    def sucesso(self, latencia=None):
+        with self._lock:
+            self.falhas = 0
+            self.aberto_ate = 0.0
+            if latencia is not None:
+                self.latencia = latencia if self.latencia is None else \
+                    (1 - self.PESO) * self.latencia + self.PESO * latencia
+
+    def falha(self):
+        with self._lock:
+            self.falhas += 1
+            if self.falhas >= self.LIMITE_FALHAS:
+                self._abrir()
+
+    def abrir(self):
+        """Tira da escolha na hora (ex: não respondeu à sondagem)."""
+        with self._lock:
+            self.falhas = max(self.falhas, self.LIMITE_FALHAS)
+            self._abrir()
+
+    def _abrir(self):
+        if self.disponivel:
+            print(f"[API] {self.url} fora por {self.PAUSA:.0f} s depois de {self.falhas} falhas")
+        self.aberto_ate = time.monotonic() + self.PAUSA
+
+    def __repr__(self):
+        latencia = "?" if self.latencia is None else f"{self.latencia * 1000:.0f} ms"
+        return f"<Endpoint {self.url} {latencia}{'' if self.disponivel else ' aberto'}>"
+
+
+class Endpoints:
+    """Os endereços configurados e a escolha do mais rápido entre os que estão de pé."""
+
+    def __init__(self, urls):
+        if not urls:
+            raise ValueError("Nenhum endereço da API configurado.")
+        self.lista = [Endpoint(u) for u in urls]
+
+    def escolher(self, excluir=()):
+        """
+        O disponível de menor latência medida (sem medição, vale a ordem da
+        configuração). Se todos estão com o disjuntor aberto, o que volta primeiro.
+        """
+        candidatos = [e for e in self.lista if e not in excluir] or self.lista
+        disponiveis = [e for e in candidatos if e.disponivel]
+        if not disponiveis:
+            return min(candidatos, key=lambda e: e.aberto_ate)
+        return min(disponiveis, key=lambda e: (e.latencia is None, e.latencia or 0, self.lista.index(e)))
+
+    def rota(self, url):
+        """Tira o endereço da API de uma URL completa: "https://.../users/1?x=1" -> "/users/1?x=1"."""
+        for endpoint in self.lista:
+            if url.startswith(endpoint.url):
+                return "/" + url[len(endpoint.url):].lstrip("/")
+        return url
+
+    def __iter__(self):
+        return iter(self.lista)
+
+    def __len__(self):
+        return len(self.lista)
@@ -0,0 +1,37 @@
+import base64
+from io import BytesIO
+
+from PIL import Image
+
+
+class Bitmap:
+    """Pixels RGBA já decodificados, prontos para virar textura (de baixo para cima, como o Kivy espera)."""
+
+    __slots__ = ("largura", "altura", "pixels")
+
+    def __init__(self, largura, altura, pixels):
+        self.largura = largura
+        self.altura = altura
+        self.pixels = pixels
+
+    @property
+    def tamanho(self):
+        return len(self.pixels)
+
+
+def decodificar_png(dados):
+    """
+    Decodifica um PNG (bytes ou texto base64) em um Bitmap.
+    Pensado para rodar fora da thread da UI; retorna None se não for imagem.
+    """
+    if not dados:
+        return None
+    try:
+        if isinstance(dados, str):
+            dados = base64.b64decode(dados)
+        with Image.open(BytesIO(dados)) as img:
+            img = img.convert("RGBA").transpose(Image.Transpose.FLIP_TOP_BOTTOM)
+            return Bitmap(img.width, img.height, img.tobytes())
+    except Exception as e:
+        print(f"[IMAGEM] Falha ao decodificar PNG: {e}")
+        return None
@@ -0,0 +1,200 @@
+import importlib
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# Só biblioteca padrão aqui: este módulo é o primeiro a ser importado pelo main.py
+
+ARQUIVO_PADRAO = "perfil_inicio.json"
+
+
+class ModuloSobDemanda:
+    """
+    Fica no lugar de um módulo pesado e só o importa no primeiro acesso a um
+    atributo (ex: pytz.timezone, plyer.notification). Seguro entre threads:
+    o import em si é protegido pelo próprio Python.
+    """
+
+    __slots__ = ("_nome", "_modulo")
+
+    def __init__(self, nome):
+        self._nome = nome
+        self._modulo = None
+
+    def _carregar(self):
+        modulo = self._modulo
+        if modulo is None:
+            with perfil.trecho(f"import sob demanda {self._nome}"):
+                modulo = importlib.import_module(self._nome)
+            self._modulo = modulo
+        return modulo
+
+    def __getattr__(self, nome):
+        return getattr(self._carregar(), nome)
+
+    def __repr__(self):
+        estado = "carregado" if self._modulo is not None else "ainda não carregado"
+        return f"<módulo sob demanda {self._nome!r} ({estado})>"
+
+
+def sob_demanda(nome):
+    """pytz = sob_demanda("pytz"): o import só acontece no primeiro pytz.algo."""
+    return ModuloSobDemanda(nome)
+
+
+class _LoaderCronometrado:
+    """Embrulha o loader de um módulo para medir quanto tempo ele leva para executar."""
+
+    def __init__(self, loader, linha):
+        self._loader = loader
+        self._linha = linha
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, modulo):
+        local = self._linha._local
+        anterior = getattr(local, "importando", False)
+        # Imports feitos de dentro de outro import já entram no tempo dele
+        tipo = "import aninhado" if anterior else "import"
+        local.importando = True
+        try:
+            with self._linha.trecho(f"import {modulo.__name__}", tipo=tipo):
+                self._loader.exec_module(modulo)
+        finally:
+            local.importando = anterior
+
+    def __getattr__(self, nome):
+        return getattr(self._loader, nome)
+
+
+class _CronometroImports:
+    """Finder no início do sys.meta_path que só troca o loader pelo cronometrado."""
+
+    def __init__(self, linha):
+        self._linha = linha
+        self._local = threading.local()
+
+    def find_spec(self, nome, path=None, target=None):
+        if getattr(self._local, "buscando", False):
+            return None
+        self._local.buscando = True
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, "find_spec"):
+                    continue
+                spec = finder.find_spec(nome, path, target)
+                if spec is not None:
+                    break
+            else:
+                return None
+        finally:
+            self._local.buscando = False
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+            spec.loader = _LoaderCronometrado(spec.loader, self._linha)
+        return spec
+
+
+class LinhaDoTempo:
+    """
+    Linha do tempo da abertura do app: imports, carga dos .kv, build() e o
+    primeiro quadro na tela. Desligada, marcar() e trecho() não custam quase
+    nada; ligada (variável COGNITIVE_PERFIL_INICIO), cada import também é
+    medido e tudo vai para um arquivo JSON quando o primeiro quadro aparece.
+
+    Os tempos são em ms contados a partir do import deste módulo, que é a
+    primeira linha do main.py.
+    """
+
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.ativo = False
+        self.arquivo = None
+        self.eventos = []   # {"etapa", "tipo", "inicio_ms", "duracao_ms", "nivel"}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._cronometro = None
+
+    def ativar(self, arquivo=None):
+        if self.ativo:
+            return
+        self.ativo = True
+        self.arquivo = arquivo or ARQUIVO_PADRAO
+        self._cronometro = _CronometroImports(self)
+        sys.meta_path.insert(0, self._cronometro)
+
+    def desativar(self):
+        self.ativo = False
+        if self._cronometro in sys.meta_path:
+            sys.meta_path.remove(self._cronometro)
+        self._cronometro = None
+
+    def agora(self):
+        return (time.perf_counter() - self.t0) * 1000
+
+    def marcar(self, etapa):
+        """Um instante (ex: "primeiro quadro")."""
+        if self.ativo:
+            self._registrar(etapa, "marco", self.agora(), 0.0, self._nivel())
+
+    @contextmanager
+    def trecho(self, etapa, tipo="etapa"):
+        """Um intervalo: with perfil.trecho("build"): ..."""
+        if not self.ativo:
+            yield
+            return
+        nivel = self._nivel()
+        self._local.nivel = nivel + 1
+        inicio = self.agora()
+        try:
+            yield
+        finally:
+            self._local.nivel = nivel
+            self._registrar(etapa, tipo, inicio, self.agora() - inicio, nivel)
+
+    def _nivel(self):
+        return getattr(self._local, "nivel", 0)
+
+    def _registrar(self, etapa, tipo, inicio, duracao, nivel):
+        with self._lock:
+            self.eventos.append({
+                "etapa": etapa, "tipo": tipo, "nivel": nivel,
+                "inicio_ms": round(inicio, 2), "duracao_ms": round(duracao, 2),
+            })
+
+    # --- RESULTADO ---
+    def resumo(self):
+        eventos = sorted(self.eventos, key=lambda e: e["inicio_ms"])
+        marcos = {e["etapa"]: e["inicio_ms"] for e in eventos if e["tipo"] == "marco"}
+        imports = [e for e in eventos if e["tipo"] == "import"]
+        return {
+            "primeiro_quadro_ms": marcos.get("primeiro quadro"),
+            "marcos": marcos,
+            "imports_ms": round(sum(e["duracao_ms"] for e in imports), 2),
+            "imports_mais_lentos": sorted(imports, key=lambda e: -e["duracao_ms"])[:15],
+            "eventos": eventos,
+        }
+
+    def salvar(self, arquivo=None):
+        arquivo = arquivo or self.arquivo or ARQUIVO_PADRAO
+        resumo = self.resumo()
+        try:
+            with open(arquivo, "w", encoding="utf-8") as f:
+                json.dump(resumo, f, ensure_ascii=False, indent=1)
+        except OSError as e:
+            print(f"[INÍCIO] Não foi possível gravar {arquivo}: {e}")
+            return resumo
+        print(f"[INÍCIO] Primeiro quadro em {resumo['primeiro_quadro_ms']} ms "
+              f"(imports: {resumo['imports_ms']} ms). Linha do tempo em {arquivo}")
+        return resumo
+
+
+perfil = LinhaDoTempo()
+
+# COGNITIVE_PERFIL_INICIO=1 (arquivo padrão) ou =caminho/do/arquivo.json
+_config = os.environ.get("COGNITIVE_PERFIL_INICIO")
+if _config and _config != "0":
+    perfil.ativar(None if _config == "1" else _config)
@@ -0,0 +1,239 @@
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+# Tabelas espelhadas da API. Cada uma tem colunas de "escopo" (de quem são os dados)
+# e colunas de conteúdo. A ordem das colunas de conteúdo é a mesma das tuplas da API.
+# "cursor": coluna usada (com o id) para paginar da mais nova para a mais antiga.
+TABLES = {
+    "diario": {
+        "scope": ("paciente_id",),
+        "columns": ("data_hora", "sentimento_id", "anotacao", "atividades"),
+        "order": "data_hora DESC, id DESC",
+        "cursor": "data_hora",
+    },
+    "anotacoes": {
+        "scope": ("psicologo_id", "paciente_id"),
+        "columns": ("data_hora", "texto"),
+        "order": "data_hora DESC, id DESC",
+        "cursor": "data_hora",
+    },
+    "agenda": {
+        "scope": ("psicologo_id",),
+        "columns": ("data_hora", "paciente_id"),
+        "order": "data_hora ASC, id ASC",
+    },
+    "notificacoes": {
+        "scope": ("user_id",),
+        "columns": ("dados",),
+        "order": "id DESC",
+    },
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS diario (
+    id INTEGER PRIMARY KEY, paciente_id INTEGER NOT NULL,
+    data_hora TEXT, sentimento_id INTEGER, anotacao TEXT, atividades TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_diario_escopo ON diario (paciente_id, data_hora);
+
+CREATE TABLE IF NOT EXISTS anotacoes (
+    id INTEGER PRIMARY KEY, psicologo_id INTEGER NOT NULL, paciente_id INTEGER NOT NULL,
+    data_hora TEXT, texto TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_anotacoes_escopo ON anotacoes (psicologo_id, paciente_id, data_hora);
+
+CREATE TABLE IF NOT EXISTS agenda (
+    id INTEGER PRIMARY KEY, psicologo_id INTEGER NOT NULL,
+    data_hora TEXT, paciente_id INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_agenda_escopo ON agenda (psicologo_id, data_hora);
+
+CREATE TABLE IF NOT EXISTS notificacoes (
+    id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, dados TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_notificacoes_escopo ON notificacoes (user_id);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    recurso TEXT PRIMARY KEY, watermark TEXT, atualizado_em REAL
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    chave TEXT PRIMARY KEY, valor TEXT
+);
+
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    chave TEXT NOT NULL UNIQUE,
+    method TEXT NOT NULL, path TEXT NOT NULL, payload TEXT NOT NULL,
+    tabela TEXT, escopo TEXT,
+    estado TEXT NOT NULL DEFAULT 'pendente',
+    tentativas INTEGER NOT NULL DEFAULT 0,
+    proxima_tentativa REAL NOT NULL DEFAULT 0,
+    criado_em REAL NOT NULL,
+    ultimo_erro TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_outbox_fila ON outbox (estado, proxima_tentativa);
+"""
+
+
+class LocalStore:
+    """
+    Cópia local (SQLite) dos dados que o app mostra logo ao abrir:
+    diário, anotações de consulta, agenda e notificações.
+    Pode ser usada de qualquer thread (uma conexão protegida por lock).
+
+    Linhas com id negativo foram criadas no aparelho e ainda estão na
+    fila de envio (outbox); a sincronização nunca as apaga.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.RLock()
+
+    @contextmanager
+    def transaction(self):
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                yield self._conn
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            else:
+                self._conn.execute("COMMIT")
+
+    def query(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def execute(self, sql, params=()):
+        """Executa um comando e retorna o lastrowid."""
+        with self._lock:
+            return self._conn.execute(sql, params).lastrowid
+
+    # --- LEITURA ---
+    def select(self, table, scope):
+        """Retorna as linhas do escopo como tuplas (id, *colunas), já ordenadas."""
+        spec = TABLES[table]
+        where = " AND ".join(f"{c} = ?" for c in spec["scope"])
+        cols = ", ".join(("id",) + spec["columns"])
+        sql = f"SELECT {cols} FROM {table} WHERE {where} ORDER BY {spec['order']}"
+        with self._lock:
+            return self._conn.execute(sql, tuple(scope)).fetchall()
+
+    def select_page(self, table, scope, limit, cursor=None):
+        """
+        Uma página do escopo, da mais nova para a mais antiga (paginação por cursor).
+        cursor: o valor devolvido pela página anterior (None = primeira página).
+        Retorna (linhas, proximo_cursor); proximo_cursor é None na última página.
+        """
+        spec = TABLES[table]
+        col = spec["cursor"]
+        where = " AND ".join(f"{c} = ?" for c in spec["scope"])
+        params = tuple(scope)
+        if cursor is not None:
+            # Mesma ordem do ORDER BY: NULL conta como o menor valor
+            where += f" AND (COALESCE({col}, ''), id) < (?, ?)"
+            params += tuple(cursor)
+        cols = ", ".join(("id",) + spec["columns"])
+        sql = f"SELECT {cols} FROM {table} WHERE {where} ORDER BY {spec['order']} LIMIT ?"
+        with self._lock:
+            rows = self._conn.execute(sql, params + (limit,)).fetchall()
+
+        if len(rows) < limit:
+            return rows, None
+        last = rows[-1]
+        idx = 1 + spec["columns"].index(col)
+        return rows, (last[idx] or "", last[0])
+
+    # --- ESCRITA ---
+    def upsert(self, table, scope, rows):
+        """
+        Insere/atualiza linhas (id, *colunas) no escopo.
+        Retorna quantas linhas realmente mudaram.
+        """
+        if not rows:
+            return 0
+        spec = TABLES[table]
+        cols = ("id",) + spec["scope"] + spec["columns"]
+        placeholders = ", ".join("?" for _ in cols)
+        updates = ", ".join(f"{c} = excluded.{c}" for c in spec["scope"] + spec["columns"])
+        differs = " OR ".join(f"{c} IS NOT excluded.{c}" for c in spec["scope"] + spec["columns"])
+        sql = (
+            f"INSERT INTO {table} ({', '.join(cols)}) VALUES ({placeholders}) "
+            f"ON CONFLICT(id) DO UPDATE SET {updates} WHERE {differs}"
+        )
+        scope = tuple(scope)
+        values = [(row[0],) + scope + tuple(row[1:]) for row in rows]
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany(sql, values)
+            return self._conn.total_changes - before
+
+    def delete_ids(self, table, ids):
+        if not ids:
+            return 0
+        ids = list(ids)
+        with self._lock:
+            before = self._conn.total_changes
+            for i in range(0, len(ids), 500):
+                chunk = ids[i:i + 500]
+                marks = ", ".join("?" for _ in chunk)
+                self._conn.execute(f"DELETE FROM {table} WHERE id IN ({marks})", chunk)
+            return self._conn.total_changes - before
+
+    def replace_scope(self, table, scope, rows):
+        """Deixa o escopo exatamente igual a 'rows' (resposta completa da API)."""
+        spec = TABLES[table]
+        where = " AND ".join(f"{c} = ?" for c in spec["scope"])
+        with self._lock:
+            existing = {r[0] for r in self._conn.execute(f"SELECT id FROM {table} WHERE {where} AND id > 0", tuple(scope))}
+            removed = existing - {row[0] for row in rows}
+            return self.delete_ids(table, removed) + self.upsert(table, scope, rows)
+
+    # --- ESTADO DA SINCRONIZAÇÃO ---
+    def get_watermark(self, recurso):
+        with self._lock:
+            row = self._conn.execute("SELECT watermark FROM sync_state WHERE recurso = ?", (recurso,)).fetchone()
+        return row[0] if row else None
+
+    def set_watermark(self, recurso, watermark):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO sync_state (recurso, watermark, atualizado_em) VALUES (?, ?, ?) "
+                "ON CONFLICT(recurso) DO UPDATE SET watermark = excluded.watermark, atualizado_em = excluded.atualizado_em",
+                (recurso, watermark, time.time()),
+            )
+
+    def get_meta(self, chave, default=None):
+        with self._lock:
+            row = self._conn.execute("SELECT valor FROM meta WHERE chave = ?", (chave,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set_meta(self, chave, valor):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO meta (chave, valor) VALUES (?, ?) "
+                "ON CONFLICT(chave) DO UPDATE SET valor = excluded.valor",
+                (chave, json.dumps(valor)),
+            )
+
+    def clear(self):
+        """
+        Apaga todos os dados locais (logout).
+        A outbox fica: o que o usuário salvou ainda precisa chegar na API.
+        """
+        with self.transaction() as conn:
+            for table in list(TABLES) + ["sync_state", "meta"]:
+                conn.execute(f"DELETE FROM {table}")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,179 @@
+import json
+import threading
+import time
+
+_local = threading.local()
+
+# Rota da API que recebe vários GETs numa requisição só
+ROTA = "/batch"
+
+# Respostas que indicam que a API não tem a rota de lote
+SEM_SUPORTE = frozenset([404, 405, 501])
+
+
+class _Pedido:
+    __slots__ = ("path", "params", "headers", "resposta", "pronto")
+
+    def __init__(self, path, params, headers):
+        self.path = path
+        self.params = params
+        self.headers = headers
+        self.resposta = None   # None depois de 'pronto' = cada um busca o seu
+        self.pronto = threading.Event()
+
+    def como_json(self):
+        pedido = {"path": self.path}
+        if self.params:
+            pedido["params"] = self.params
+        if self.headers:
+            pedido["headers"] = self.headers
+        return pedido
+
+
+class _Cabecalhos(dict):
+    """Cabeçalhos de uma resposta do lote, sem diferenciar maiúsculas (como os do requests)."""
+
+    def __init__(self, cabecalhos):
+        super().__init__((k.lower(), v) for k, v in (cabecalhos or {}).items())
+
+    def get(self, nome, padrao=None):
+        return super().get(nome.lower(), padrao)
+
+
+class RespostaLote:
+    """Uma das respostas do lote, com a mesma cara de uma requests.Response para o Database."""
+
+    def __init__(self, item):
+        self.status_code = int(item.get("status", 502))
+        self.headers = _Cabecalhos(item.get("headers"))
+        self._corpo = item.get("body")
+        self.content = json.dumps(self._corpo).encode("utf-8") if self._corpo is not None else b""
+
+    def json(self):
+        if self._corpo is None:
+            raise ValueError("resposta sem corpo")
+        return self._corpo
+
+
+class Lote:
+    """
+    Chamadas lógicas do Database (get_..., sync...) disparadas juntas por uma
+    tela (AsyncDatabase.em_lote). Cada uma roda na sua thread do pool; os GETs
+    que elas fazem ao mesmo tempo são juntados e saem numa requisição só para
+    a rota de lote da API, e cada chamada recebe de volta a sua resposta.
+
+    O envio acontece assim que nenhuma das chamadas está mais trabalhando
+    (todas esperando resposta ou terminadas), ou depois de 'janela' segundos
+    se alguma ainda não começou (pool ocupado). Quem chega depois forma a
+    próxima rodada: chamadas que dependem de outras (ex: psicólogo do
+    paciente e depois a agenda dele) saem em rodadas seguidas.
+    """
+
+    JANELA = 0.05  # s
+
+    def __init__(self, membros, janela=None):
+        self.membros = membros
+        self.janela = self.JANELA if janela is None else janela
+        self._cond = threading.Condition()
+        self._iniciados = 0
+        self._trabalhando = 0
+        self._pendentes = []
+        self._lider = False
+        self.rodadas = 0
+
+    # --- CICLO DE VIDA DE CADA CHAMADA ---
+    def _comecou(self):
+        with self._cond:
+            self._iniciados += 1
+            self._trabalhando += 1
+
+    def _terminou(self):
+        with self._cond:
+            self._trabalhando -= 1
+            self._cond.notify_all()
+
+    def esperar(self, evento):
+        """Espera 'evento' sem contar como trabalhando (ex: seguidor de um SingleFlight)."""
+        with self._cond:
+            self._trabalhando -= 1
+            self._cond.notify_all()
+        try:
+            evento.wait()
+        finally:
+            with self._cond:
+                self._trabalhando += 1
+
+    # --- PEDIDOS ---
+    def pedir(self, path, params, headers, enviar):
+        """
+        Entra na próxima rodada e espera. Retorna a resposta que veio no lote,
+        ou None se a chamada deve fazer o seu GET sozinha (lote indisponível).
+        enviar(pedidos) manda a rodada; retorna True se preencheu as respostas.
+        """
+        pedido = _Pedido(path, params, headers)
+        with self._cond:
+            self._pendentes.append(pedido)
+            self._trabalhando -= 1
+            lider = not self._lider
+            self._lider = True
+            self._cond.notify_all()
+
+        try:
+            if lider:
+                self._enviar_rodada(enviar)
+            else:
+                pedido.pronto.wait()
+        finally:
+            with self._cond:
+                self._trabalhando += 1
+        return pedido.resposta
+
+    def _enviar_rodada(self, enviar):
+        limite = time.monotonic() + self.janela
+        with self._cond:
+            while self._trabalhando > 0 or self._iniciados < self.membros:
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    break
+                self._cond.wait(restante)
+            pedidos, self._pendentes = self._pendentes, []
+            self._lider = False
+            self.rodadas += 1
+
+        try:
+            if len(pedidos) == 1 or not enviar(pedidos):
+                for p in pedidos:
+                    p.resposta = None
+        except BaseException:
+            # Deu errado para quem enviou (ex: a tela dele saiu): os outros seguem sozinhos
+            for p in pedidos:
+                p.resposta = None
+            raise
+        finally:
+            for p in pedidos:
+                p.pronto.set()
+
+
+def atual():
+    """Lote da chamada que a thread atual está executando (ou None)."""
+    return getattr(_local, "lote", None)
+
+
+def rodar(lote, func, *args, **kwargs):
+    """Executa func como uma das chamadas de 'lote' (usado pelas tarefas do pool)."""
+    lote._comecou()
+    _local.lote = lote
+    try:
+        return func(*args, **kwargs)
+    finally:
+        _local.lote = None
+        lote._terminou()
+
+
+def esperar(evento):
+    """Espera 'evento'; dentro de um lote, sem segurar o envio da rodada."""
+    lote = atual()
+    if lote is None:
+        evento.wait()
+    else:
+        lote.esperar(evento)
@@ -1,23 +1,218 @@
-import requests
-import json
+import base64
+import re
+import threading
+from urllib.parse import urlencode
+from app.core import cancelamento, lote
+from app.core.transport import Transport
+from app.core.singleflight import SingleFlight
+from app.core.cache import ResponseCache, CacheEntry
+from app.core.pool import FUNDO
+
+# Quais leituras ficam velhas quando cada escrita dá certo.
+# (regex da rota escrita, prefixos das rotas de leitura; {0}, {1}... = grupos do regex)
+# Escritas que não estão aqui limpam o cache inteiro, por segurança.
+INVALIDATIONS = [
+    (r"^/(login|register)$", []),
+    (r"^/users/(\d+)(/password)?$", ["/users/{0}"]),
+    (r"^/atividades", ["/atividades"]),
+    (r"^/diario$", ["/diario/historico/", "/relatorios/"]),
+    (r"^/agenda", ["/agenda/psicologo/", "/psicologo/"]),
+    (r"^/consultas$", ["/consultas/"]),
+    (r"^/vincular$", ["/paciente/", "/psicologo/"]),
+    (r"^/notificacoes/", ["/notificacoes/"]),
+    # Usar um código vincula paciente e psicólogo (muda o painel e a lista de pacientes)
+    (r"^/codigos/", ["/codigos/", "/paciente/", "/psicologo/"]),
+    (r"^/email/", []),
+]
+INVALIDATIONS = [(re.compile(p), prefixes) for p, prefixes in INVALIDATIONS]
+
 
 class Database:
-    def __init__(self):
-        # Em desenvolvimento use localhost. Em produção use a URL do Render.
-        #self.base_url = "http://127.0.0.1:8000" # Conexão local
-        #self.base_url = "https://api-tcc-cognitive.onrender.com"   # Conexão com Render
-        self.base_url = "https://api-tcc-cognitive.vercel.app/"    # Conexão com a Vercel
+    def __init__(self, base_url=None):
+        # Sessões keep-alive, timeouts e retries ficam na camada de transporte, e também
+        # os endereços da API (argumento > COGNITIVE_API_URLS/COGNITIVE_API_URL no .env > padrão),
+        # com a escolha do mais rápido e a troca quando um deles cai.
+        self.http = Transport(base_url)
+
+        # GETs idênticos em andamento (ou quase simultâneos) viram uma só requisição.
+        self._flight = SingleFlight(linger=1.0, esperar=lote.esperar)
+
+        # GETs de chamadas disparadas juntas (AsyncDatabase.em_lote) saem numa requisição
+        # só para a rota de lote; se a API não tiver a rota, cada um volta a ir sozinho.
+        self.lote_suportado = True
+
+        # Cache de leituras (TTL por rota, ETag, stale-while-revalidate).
+        self.cache = ResponseCache()
+        self._revalidating = set()
+        self._revalidating_lock = threading.Lock()
+        # Funções chamadas quando uma revalidação em segundo plano traz dados novos: fn(path, data)
+        self.refresh_listeners = []
+        # Pool de threads do app (PoolPrioridades), definido pelo CognitiveApp.
+        # Sem ele (scripts, benchmarks), cada revalidação usa uma thread própria.
+        self.pool = None
+
+        self.http.write_listeners.append(self._on_write)
+
+    # --- LEITURA COM CACHE ---
+    def _get_json(self, path, **kwargs):
+        """
+        GET compartilhado: retorna (status_code, json ou None).
+        O json é o mesmo objeto para todos que pediram a mesma URL, não modifique.
+        """
+        path = "/" + path.lstrip("/")
+        params = kwargs.get("params")
+        # A chave é só a rota: todos os endereços servem os mesmos dados
+        key = path
+        if params:
+            key += "?" + urlencode(sorted(params.items()))
+
+        entry = self.cache.get(key)
+        if entry is not None:
+            if entry.is_fresh():
+                return entry.status, entry.data
+            if entry.is_usable_stale():
+                # Serve o que tem e atualiza por trás
+                self._revalidate_in_background(key, path, kwargs)
+                return entry.status, entry.data
+
+        try:
+            return self._flight.do(key, lambda: self._fetch_json(key, path, **kwargs))
+        except cancelamento.Cancelado:
+            token = cancelamento.atual()
+            if token is not None and token.cancelado:
+                raise
+            # Quem estava buscando por nós (outra tela) desistiu: busca de novo
+            return self._flight.do(key, lambda: self._fetch_json(key, path, **kwargs))
+
+    def _fetch_json(self, key, path, **kwargs):
+        generation = self.cache.generation
+        entry = self.cache.get(key)
+
+        headers = dict(kwargs.pop("headers", None) or {})
+        if entry is not None:
+            headers.update(entry.validators())
+
+        res = None
+        lote_atual = lote.atual()
+        if lote_atual is not None and self.lote_suportado and set(kwargs) <= {"params"}:
+            res = lote_atual.pedir(path, kwargs.get("params"), headers, self._enviar_lote)
+        if res is None:
+            res = self.http.get(path, headers=headers, **kwargs)
+
+        if res.status_code == 304 and entry is not None:
+            # Nada mudou no servidor: reaproveita o corpo guardado
+            entry.touch()
+            return entry.status, entry.data
+
+        try:
+            data = res.json()
+        except ValueError:
+            data = None
+
+        if res.status_code == 200:
+            policy = self.cache.policy_for(path)
+            ttl, stale = (policy.ttl, policy.stale) if policy else (0, 0)
+            etag = res.headers.get("ETag")
+            last_modified = res.headers.get("Last-Modified")
+            if ttl or etag or last_modified:
+                new_entry = CacheEntry(200, data, len(res.content), etag, last_modified, ttl, stale)
+                self.cache.put(key, path, new_entry, generation)
+
+        return res.status_code, data
+
+    def _enviar_lote(self, pedidos):
+        """
+        Manda vários GETs numa requisição só. Contrato com a API:
+        POST /batch {"requests": [{"path", "params"?, "headers"?}, ...]}
+        -> {"responses": [{"status", "body", "headers"?}, ...]} na mesma ordem.
+        Retorna False se cada pedido deve ir sozinho.
+        """
+        if not self.lote_suportado:
+            return False
+        try:
+            res = self.http.post(lote.ROTA, leitura=True, json={"requests": [p.como_json() for p in pedidos]})
+        except cancelamento.Cancelado:
+            raise
+        except Exception as e:
+            print(f"[LOTE] Falha ao enviar {len(pedidos)} leituras juntas: {e}")
+            return False
+
+        if res.status_code in lote.SEM_SUPORTE:
+            print("[LOTE] API sem rota de lote: as leituras seguem uma a uma")
+            self.lote_suportado = False
+            return False
+        try:
+            respostas = res.json().get("responses") if res.status_code == 200 else None
+        except ValueError:
+            respostas = None
+        if not isinstance(respostas, list) or len(respostas) != len(pedidos):
+            return False
+
+        for pedido, item in zip(pedidos, respostas):
+            resposta = lote.RespostaLote(item) if isinstance(item, dict) else None
+            # Falha do servidor num item: esse repete sozinho (com os retries do Transport)
+            pedido.resposta = resposta if resposta is not None and resposta.status_code < 500 else None
+        return True
+
+    def _revalidate_in_background(self, key, path, kwargs):
+        with self._revalidating_lock:
+            if key in self._revalidating:
+                return
+            self._revalidating.add(key)
+        if self.pool is not None:
+            self.pool.enviar(FUNDO, self._revalidate, key, path, dict(kwargs))
+        else:
+            threading.Thread(target=self._revalidate, args=(key, path, dict(kwargs)), daemon=True).start()
+
+    def _revalidate(self, key, path, kwargs):
+        try:
+            old = self.cache.get(key)
+            status, data = self._flight.do(key, lambda: self._fetch_json(key, path, **kwargs))
+            if status == 200 and (old is None or data is not old.data):
+                for listener in list(self.refresh_listeners):
+                    listener(path, data)
+        except Exception as e:
+            print(f"[CACHE] Falha ao revalidar {path}: {e}")
+        finally:
+            with self._revalidating_lock:
+                self._revalidating.discard(key)
+
+    def _on_write(self, method, url, res):
+        """Depois de uma escrita, descarta o que ficou desatualizado."""
+        self._flight.forget()
+        if not (200 <= res.status_code < 300):
+            return
+
+        path = self.http.rota(url).split("?", 1)[0]
+        for regex, prefixes in INVALIDATIONS:
+            match = regex.search(path)
+            if match:
+                if prefixes:
+                    groups = match.groups()
+                    self.cache.invalidate(*[p.format(*groups) for p in prefixes])
+                return
+        self.cache.clear()
+
+    @staticmethod
+    def _idempotency_headers(idempotency_key):
+        """Com a chave, a API descarta repetições do mesmo POST (retries da outbox)."""
+        return {"Idempotency-Key": idempotency_key} if idempotency_key else None
+
+    def clear_cache(self):
+        """Esquece tudo (ex: no logout, para não vazar dados de outro usuário)."""
+        self._flight.forget()
+        self.cache.clear()
     
     # --- AUTH ---
     def register_user(self, username, password, user_type, email, data_nascimento_str):
-        url = f"{self.base_url}/register"
+        url = "/register"
         payload = {
             "username": username, "password": password, 
             "user_type": user_type, "email": email, 
             "data_nascimento": data_nascimento_str
         }
         try:
-            res = requests.post(url, json=payload)
+            res = self.http.post(url, json=payload)
             if res.status_code == 200:
                 return True, "Registrado com sucesso!", res.json().get("id")
             else:
@@ -26,9 +221,9 @@ class Database:
             return False, str(e), None
 
     def verify_user(self, email, password):
-        url = f"{self.base_url}/login"
+        url = "/login"
         try:
-            res = requests.post(url, json={"email": email, "password": password})
+            res = self.http.post(url, json={"email": email, "password": password})
             if res.status_code == 200:
                 d = res.json()
                 return True, "Login OK", d['user_type'], d['id'], d['username']
@@ -41,13 +236,13 @@ class Database:
         Envia solicitação para trocar a senha.
         """
         try:
-            url = f"{self.base_url}/users/{user_id}/password"
+            url = f"/users/{user_id}/password"
             payload = {
                 "old_password": old_pass, 
                 "new_password": new_pass
             }
             
-            res = requests.put(url, json=payload)
+            res = self.http.put(url, json=payload)
             
             if res.status_code == 200:
                 return True, "Senha alterada com sucesso!"
@@ -62,11 +257,11 @@ class Database:
     # --- PSICÓLOGO ---
     def get_patient_count(self, psicologo_id):
         try:
-            res = requests.get(f"{self.base_url}/psicologo/{psicologo_id}/stats")
-            if res.status_code == 200:
-                return True, res.json()['pacientes_count']
+            status, data = self._get_json(f"/psicologo/{psicologo_id}/stats")
+            if status == 200:
+                return True, data['pacientes_count']
             # --- DEBUG ---
-            print(f"Erro API Stats: {res.status_code} - {res.text}") 
+            print(f"Erro API Stats: {status} - {data}") 
             return False, 0
         except Exception as e: 
             print(f"Erro Conexão Stats: {e}")
@@ -74,34 +269,34 @@ class Database:
 
     def get_next_appointment(self, psicologo_id):
         try:
-            res = requests.get(f"{self.base_url}/psicologo/{psicologo_id}/stats")
-            if res.status_code == 200:
-                data = res.json()['proxima_consulta'] # Retorna lista [data, nome] ou None
+            status, data = self._get_json(f"/psicologo/{psicologo_id}/stats")
+            if status == 200:
+                data = data['proxima_consulta'] # Retorna lista [data, nome] ou None
                 return True, tuple(data) if data else None
             return False, None
         except: return False, None
 
     def get_pacientes_do_psicologo(self, psicologo_id):
         try:
-            res = requests.get(f"{self.base_url}/psicologo/{psicologo_id}/pacientes")
-            if res.status_code == 200:
+            status, data = self._get_json(f"/psicologo/{psicologo_id}/pacientes")
+            if status == 200:
                 # API retorna lista de listas [[1, "joao"]], convertemos para lista de tuplas
-                return [tuple(x) for x in res.json()['pacientes']]
+                return [tuple(x) for x in data['pacientes']]
             return []
         except: return []
 
     # --- ATIVIDADES ---
     def get_atividades_template(self):
         try:
-            res = requests.get(f"{self.base_url}/atividades")
-            if res.status_code == 200:
-                return True, [tuple(x) for x in res.json()['atividades']]
+            status, data = self._get_json("/atividades")
+            if status == 200:
+                return True, [tuple(x) for x in data['atividades']]
             return False, []
         except: return False, []
 
     def adicionar_atividade_template(self, texto, psicologo_id):
         try:
-            res = requests.post(f"{self.base_url}/atividades", json={"texto": texto, "psicologo_id": psicologo_id})
+            res = self.http.post("/atividades", json={"texto": texto, "psicologo_id": psicologo_id})
             if res.status_code == 200:
                 return True, "Criado com sucesso"
             return False, res.json().get("detail")
@@ -109,52 +304,85 @@ class Database:
 
     def delete_atividade_template(self, atividade_id):
         try:
-            res = requests.delete(f"{self.base_url}/atividades/{atividade_id}")
+            res = self.http.delete(f"/atividades/{atividade_id}")
             if res.status_code == 200: return True, "Excluído"
             return False, res.json().get("detail")
         except Exception as e: return False, str(e)
 
     def update_atividade_template(self, atividade_id, novo_texto):
         try:
-            res = requests.put(f"{self.base_url}/atividades/{atividade_id}?novo_texto={novo_texto}")
+            res = self.http.put(f"/atividades/{atividade_id}", params={"novo_texto": novo_texto})
             if res.status_code == 200: return True, "Atualizado"
             return False, res.json().get("detail")
         except: return False, "Erro"
 
     # --- DIÁRIO ---
-    def add_entrada_completa_diario(self, user_id, data_hora, sentimento_id, anotacao, atividades_ids):
-        url = f"{self.base_url}/diario"
-        payload = {
+    @staticmethod
+    def payload_entrada_diario(user_id, data_hora, sentimento_id, anotacao, atividades_ids):
+        return {
             "paciente_id": user_id,
             "data_hora_iso": data_hora,
             "sentimento_id": sentimento_id,
             "anotacao": anotacao,
             "atividades_ids": atividades_ids
         }
+
+    def add_entrada_completa_diario(self, user_id, data_hora, sentimento_id, anotacao, atividades_ids, idempotency_key=None):
+        url = "/diario"
+        payload = self.payload_entrada_diario(user_id, data_hora, sentimento_id, anotacao, atividades_ids)
         try:
-            res = requests.post(url, json=payload)
+            res = self.http.post(url, json=payload, headers=self._idempotency_headers(idempotency_key))
             if res.status_code == 200: return True, "Salvo!"
             return False, res.json().get("detail")
         except Exception as e: return False, str(e)
 
     def get_entradas_historico(self, user_id):
         try:
-            res = requests.get(f"{self.base_url}/diario/historico/{user_id}")
-            if res.status_code == 200:
-                return True, [tuple(x) for x in res.json()['historico']]
+            status, data = self._get_json(f"/diario/historico/{user_id}")
+            if status == 200:
+                return True, [tuple(x) for x in data['historico']]
             return False, []
         except: return False, []
+
+    def get_entradas_historico_pagina(self, user_id, limite=30, antes=None):
+        """
+        Uma página do histórico, da mais nova para a mais antiga.
+        'antes' é o cursor devolvido pela página anterior (None = primeira página).
+        Retorna (True, [tuplas], proximo_cursor) ou (False, [], None).
+        """
+        try:
+            params = {"limit": limite}
+            if antes:
+                params["before"] = antes
+            status, data = self._get_json(f"/diario/historico/{user_id}", params=params)
+            if status == 200:
+                return True, [tuple(x) for x in data['historico']], data.get('next_cursor')
+            return False, [], None
+        except Exception as e:
+            print(f"[ERRO API] get_entradas_historico_pagina: {e}")
+            return False, [], None
     
+    def get_versao_diario(self, paciente_id):
+        """
+        "Versão" dos dados do paciente: a data da entrada mais recente do diário
+        (só a primeira página, com 1 item). Retorna (True, versao) — "" se o
+        diário estiver vazio — ou (False, None) se a API falhou.
+        """
+        ok, linhas, _ = self.get_entradas_historico_pagina(paciente_id, limite=1)
+        if not ok:
+            return False, None
+        datas = [str(x[1]) for x in linhas if x[1]]
+        return True, max(datas) if datas else ""
+
     def get_psicologo_id_by_paciente(self, paciente_id):
         """
         Busca qual é o ID do psicólogo vinculado a este paciente via API.
         """
         try:
-            url = f"{self.base_url}/paciente/{paciente_id}/psicologo"
-            res = requests.get(url)
+            url = f"/paciente/{paciente_id}/psicologo"
+            status, data = self._get_json(url)
             
-            if res.status_code == 200:
-                data = res.json()
+            if status == 200:
                 return data.get('psicologo_id') # Retorna o ID (int) ou None
             return None
             
@@ -170,11 +398,10 @@ class Database:
         """
         try:
             # A rota espera o código na URL
-            url = f"{self.base_url}/codigos/master/validar/{codigo}"
-            res = requests.get(url)
+            url = f"/codigos/master/validar/{codigo}"
+            status, data = self._get_json(url)
             
-            if res.status_code == 200:
-                data = res.json()
+            if status == 200:
                 if data.get("valid") is True:
                     return data.get("id") # Retorna o ID (ex: 1)
             
@@ -189,10 +416,10 @@ class Database:
         Avisa a API para marcar esse código como utilizado por este usuário.
         """
         try:
-            url = f"{self.base_url}/codigos/master/usar"
+            url = "/codigos/master/usar"
             payload = {"codigo_id": codigo_id, "user_id": user_id}
             
-            res = requests.post(url, json=payload)
+            res = self.http.post(url, json=payload)
             return res.status_code == 200
             
         except Exception as e:
@@ -206,10 +433,10 @@ class Database:
         """
         try:
             # A rota na API é: POST /codigos/gerar/{psicologo_id}
-            url = f"{self.base_url}/codigos/gerar/{psicologo_id}"
+            url = f"/codigos/gerar/{psicologo_id}"
             
             # Enviamos um POST (mesmo sem corpo JSON, a rota exige POST para criar dados)
-            res = requests.post(url)
+            res = self.http.post(url)
             
             if res.status_code == 200:
                 data = res.json()
@@ -229,11 +456,10 @@ class Database:
         """
         try:
             # Reutiliza a rota que já criamos na API
-            url = f"{self.base_url}/psicologo/{psicologo_id}/pacientes"
-            res = requests.get(url)
+            url = f"/psicologo/{psicologo_id}/pacientes"
+            status, data = self._get_json(url)
             
-            if res.status_code == 200:
-                data = res.json()
+            if status == 200:
                 # A API retorna lista de listas: [[1, "Joao"], [2, "Maria"]]
                 # O App espera lista de tuplas: [(1, "Joao"), (2, "Maria")]
                 return [tuple(x) for x in data.get('pacientes', [])]
@@ -251,11 +477,10 @@ class Database:
         """
         try:
             # Chama a rota GET /agenda/psicologo/{id} que criamos na API
-            url = f"{self.base_url}/agenda/psicologo/{psicologo_id}"
-            res = requests.get(url)
+            url = f"/agenda/psicologo/{psicologo_id}"
+            status, data = self._get_json(url)
             
-            if res.status_code == 200:
-                data = res.json()
+            if status == 200:
                 # A API retorna {'agenda': [[1, '2023-10...', 5], ...]}
                 # Convertemos para lista de tuplas para o Kivy usar
                 return [tuple(x) for x in data.get('agenda', [])]
@@ -271,11 +496,12 @@ class Database:
         Busca detalhes do usuário (nome, email, nascimento) via API.
         """
         try:
-            url = f"{self.base_url}/users/{user_id}"
-            res = requests.get(url)
+            url = f"/users/{user_id}"
+            status, data = self._get_json(url)
             
-            if res.status_code == 200:
-                data = res.json()
+            if status == 200:
+                # Cópia: o json original é compartilhado com outras chamadas
+                data = dict(data)
                 
                 # Opcional: Converter a data de YYYY-MM-DD para DD/MM/YYYY se seu app precisar
                 if data.get('data_nascimento'):
@@ -301,7 +527,7 @@ class Database:
         Retorna: (True, "Sucesso") ou (False, "Mensagem de Erro")
         """
         try:
-            url = f"{self.base_url}/vincular"
+            url = "/vincular"
             
             # A rota na API espera um JSON com 'paciente_id' e 'codigo'
             payload = {
@@ -309,7 +535,7 @@ class Database:
                 "codigo": codigo
             }
             
-            res = requests.post(url, json=payload)
+            res = self.http.post(url, json=payload)
             
             if res.status_code == 200:
                 # Se deu certo, retorna sucesso
@@ -329,7 +555,7 @@ class Database:
         Espera data_nascimento no formato DD/MM/YYYY.
         """
         try:
-            url = f"{self.base_url}/users/{user_id}"
+            url = f"/users/{user_id}"
             
             payload = {
                 "username": username,
@@ -338,7 +564,7 @@ class Database:
             }
             
             # Envia requisição PUT
-            res = requests.put(url, json=payload)
+            res = self.http.put(url, json=payload)
             
             if res.status_code == 200:
                 return True, "Dados atualizados com sucesso!"
@@ -364,14 +590,14 @@ class Database:
             else:
                 data_iso = str(data_hora_obj)
 
-            url = f"{self.base_url}/agenda/disponibilidade"
+            url = "/agenda/disponibilidade"
             
             payload = {
                 "psicologo_id": psicologo_id,
                 "data_hora_iso": data_iso
             }
 
-            res = requests.post(url, json=payload)
+            res = self.http.post(url, json=payload)
 
             if res.status_code == 200:
                 return True, "Horário adicionado com sucesso!"
@@ -389,8 +615,8 @@ class Database:
         Remove um horário da agenda via API.
         """
         try:
-            url = f"{self.base_url}/agenda/{agenda_id}"
-            res = requests.delete(url)
+            url = f"/agenda/{agenda_id}"
+            res = self.http.delete(url)
             
             if res.status_code == 200:
                 return True, "Horário removido."
@@ -407,11 +633,10 @@ class Database:
         2. Horários Agendados por MIM (x[2] == meu_id)
         """
         try:
-            url = f"{self.base_url}/agenda/psicologo/{psicologo_id}"
-            res = requests.get(url)
+            url = f"/agenda/psicologo/{psicologo_id}"
+            status, data = self._get_json(url)
             
-            if res.status_code == 200:
-                data = res.json()
+            if status == 200:
                 todos = data.get('agenda', [])
                 
                 # Filtra: Mostra se estiver LIVRE ou se for MEU
@@ -430,10 +655,10 @@ class Database:
         Reserva um horário específico para o paciente logado.
         """
         try:
-            url = f"{self.base_url}/agenda/{agenda_id}/reservar"
+            url = f"/agenda/{agenda_id}/reservar"
             payload = {"paciente_id": paciente_id}
             
-            res = requests.put(url, json=payload)
+            res = self.http.put(url, json=payload)
             
             if res.status_code == 200:
                 return True, "Agendamento confirmado!"
@@ -452,11 +677,11 @@ class Database:
         """
         try:
             # A rota na API é: PUT /agenda/{id}/reservar
-            url = f"{self.base_url}/agenda/{agenda_id}/reservar"
+            url = f"/agenda/{agenda_id}/reservar"
             
             payload = {"paciente_id": paciente_id}
             
-            res = requests.put(url, json=payload)
+            res = self.http.put(url, json=payload)
             
             if res.status_code == 200:
                 return True, "Agendamento confirmado com sucesso!"
@@ -475,11 +700,10 @@ class Database:
         Retorna lista de tuplas: [(id, data, texto), ...]
         """
         try:
-            url = f"{self.base_url}/consultas/{psicologo_id}/{paciente_id}"
-            res = requests.get(url)
+            url = f"/consultas/{psicologo_id}/{paciente_id}"
+            status, data = self._get_json(url)
             
-            if res.status_code == 200:
-                data = res.json()
+            if status == 200:
                 # Converte lista de listas para lista de tuplas
                 return [tuple(x) for x in data.get('anotacoes', [])]
             
@@ -489,23 +713,27 @@ class Database:
             print(f"[ERRO API] get_anotacoes_paciente: {e}")
             return []
 
-    def salvar_anotacao_psicologo(self, psicologo_id, paciente_id, texto, data_hora_iso):
+    @staticmethod
+    def payload_anotacao(psicologo_id, paciente_id, texto, data_hora_iso):
+        return {
+            "psicologo_id": psicologo_id,
+            "paciente_id": paciente_id,
+            "anotacao": texto,
+            "data_hora_iso": data_hora_iso
+        }
+
+    def salvar_anotacao_psicologo(self, psicologo_id, paciente_id, texto, data_hora_iso, idempotency_key=None):
         """
         Salva uma nova anotação/relatório de consulta.
-        Chamado pela tela 'consulta_anotacao'.
+        Normalmente passa pela outbox (app.outbox.salvar_anotacao).
         """
         try:
             # Rota da API que criamos anteriormente (POST /consultas)
-            url = f"{self.base_url}/consultas"
+            url = "/consultas"
             
-            payload = {
-                "psicologo_id": psicologo_id,
-                "paciente_id": paciente_id,
-                "anotacao": texto,
-                "data_hora_iso": data_hora_iso
-            }
+            payload = self.payload_anotacao(psicologo_id, paciente_id, texto, data_hora_iso)
             
-            res = requests.post(url, json=payload)
+            res = self.http.post(url, json=payload, headers=self._idempotency_headers(idempotency_key))
             
             if res.status_code == 200:
                 return True, "Relatório salvo com sucesso!"
@@ -523,14 +751,14 @@ class Database:
             Pede para a API gerar um código e enviar por e-mail (Resend).
             """
             try:
-                url = f"{self.base_url}/email/enviar_convite"
+                url = "/email/enviar_convite"
                 payload = {
                     "psicologo_id": psicologo_id,
                     "email_paciente": email_paciente
                 }
                 
                 # Envia a requisição para a API
-                res = requests.post(url, json=payload)
+                res = self.http.post(url, json=payload)
                 
                 if res.status_code == 200:
                     return True, "Convite enviado com sucesso!"
@@ -545,19 +773,38 @@ class Database:
             
     def get_minhas_notificacoes(self, user_id):
         try:
-            res = requests.get(f"{self.base_url}/notificacoes/{user_id}")
-            return res.json().get("notificacoes", []) if res.status_code == 200 else []
+            status, data = self._get_json(f"/notificacoes/{user_id}")
+            return data.get("notificacoes", []) if status == 200 else []
         except: return []
 
+    def get_notificacoes_desde(self, user_id, depois_de=None):
+        """
+        Só as notificações com id maior que 'depois_de' (None = todas).
+        Se a API ignorar o ?after_id, o filtro é feito aqui mesmo.
+        Retorna (True, [dicts]) ou (False, []).
+        """
+        try:
+            params = {"after_id": depois_de} if depois_de is not None else None
+            status, data = self._get_json(f"/notificacoes/{user_id}", params=params)
+            if status != 200:
+                return False, []
+            novas = data.get("notificacoes", [])
+            if depois_de is not None:
+                novas = [n for n in novas if n["id"] > depois_de]
+            return True, novas
+        except Exception as e:
+            print(f"[ERRO API] get_notificacoes_desde: {e}")
+            return False, []
+
     def deletar_notificacao(self, notif_id):
         try:
-            requests.delete(f"{self.base_url}/notificacoes/{notif_id}")
+            self.http.delete(f"/notificacoes/{notif_id}")
             return True
         except: return False
     
     def marcar_notificacoes_lidas(self, user_id):
         try:
-            requests.put(f"{self.base_url}/notificacoes/marcar_lida/{user_id}")
+            self.http.put(f"/notificacoes/marcar_lida/{user_id}")
             return True
         except: return False
 
@@ -568,13 +815,76 @@ class Database:
         Busca o link atualizado do Power BI na API.
         """
         try:
-            url = f"{self.base_url}/config/powerbi"
-            res = requests.get(url)
+            url = "/config/powerbi"
+            status, data = self._get_json(url)
             
-            if res.status_code == 200:
-                return res.json().get("url")
+            if status == 200:
+                return data.get("url")
             
             return None
         except Exception as e:
             print(f"[ERRO API] get_powerbi_url: {e}")
-            return None
\ No newline at end of file
+            return None
+
+    # --- RELATÓRIOS ---
+    def get_relatorio_analise(self, paciente_id):
+        """
+        Busca a análise do paciente (texto de resumo + gráficos em base64).
+        Retorna o dicionário da API ou {} se der erro.
+        """
+        try:
+            status, data = self._get_json(f"/relatorios/analise/{paciente_id}")
+            return data if status == 200 else {}
+        except Exception as e:
+            print(f"[ERRO API] get_relatorio_analise: {e}")
+            return {}
+
+    def get_relatorio_dados(self, paciente_id):
+        """
+        Busca só os números do relatório (humor médio por dia, contagem de
+        sentimentos e de atividades), sem imagens: os gráficos são desenhados no app.
+        Retorna o dicionário da API ou None (erro, ou API antiga sem esse endpoint).
+        """
+        try:
+            status, data = self._get_json(f"/relatorios/dados/{paciente_id}")
+            return data if status == 200 and isinstance(data, dict) else None
+        except Exception as e:
+            print(f"[ERRO API] get_relatorio_dados: {e}")
+            return None
+
+    def get_grafico_atividades(self, paciente_id):
+        """
+        Busca o gráfico de atividades do paciente.
+        Pede o PNG binário (1/3 menor que base64); se a API só tiver JSON,
+        decodifica o campo "base64". Retorna os bytes do PNG ou None.
+        """
+        try:
+            res = self.http.get(
+                f"/relatorios/grafico_atividades/{paciente_id}",
+                headers={"Accept": "image/png, application/json;q=0.9"},
+            )
+            if res.status_code != 200:
+                return None
+            if res.headers.get("Content-Type", "").startswith("image/"):
+                return res.content
+            b64 = res.json().get("base64")
+            return base64.b64decode(b64) if b64 else None
+        except Exception as e:
+            print(f"[ERRO API] get_grafico_atividades: {e}")
+            return None
+
+    # --- SINCRONIZAÇÃO (espelho local) ---
+    def get_alteracoes(self, path, since=None):
+        """
+        Busca um recurso para o espelho local, enviando ?since=<watermark> quando houver.
+        Retorna (True, dict do JSON) ou (False, None).
+        """
+        try:
+            params = {"since": since} if since else None
+            status, data = self._get_json(path, params=params)
+            if status == 200 and isinstance(data, dict):
+                return True, data
+            return False, None
+        except Exception as e:
+            print(f"[ERRO API] get_alteracoes {path}: {e}")
+            return False, None
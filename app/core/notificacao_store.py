@@ -0,0 +1,90 @@
+from kivy.clock import Clock
+from kivy.event import EventDispatcher
+from kivy.properties import ListProperty, NumericProperty, BooleanProperty
+
+from app.core.pool import ESCRITA
+
+
+class NotificacaoStore(EventDispatcher):
+    """
+    Estado único das notificações do usuário logado, compartilhado pelas telas.
+
+    Quem quer mostrar notificações faz bind em 'itens' ou 'nao_lidas' (o sino
+    da home, a lista, o aviso em segundo plano) em vez de buscar na API: uma
+    única leitura atualiza todos. As buscas ficam aqui (atualizar() e o
+    NotificacaoPoller em 'poller'), assim como marcar como lidas e excluir,
+    que mudam a tela na hora e depois vão para a API.
+    """
+
+    itens = ListProperty([])        # dicts da API, mais nova primeiro
+    nao_lidas = NumericProperty(0)
+    atualizando = BooleanProperty(False)
+
+    def __init__(self, async_db, sync_engine, poller, **kwargs):
+        super().__init__(**kwargs)
+        self.async_db = async_db
+        self.sync_engine = sync_engine
+        self.poller = poller
+        self.user_id = None
+        # O poller (ou o push) gravou linhas novas no espelho: relê na thread da UI
+        poller.listeners_mudanca.append(lambda user_id: Clock.schedule_once(lambda dt: self._recarregar(user_id)))
+
+    # --- SESSÃO ---
+    def entrar(self, user_id):
+        self.user_id = user_id
+        self._recarregar(user_id)
+        self.poller.entrar(user_id)
+
+    def sair(self):
+        self.poller.sair()
+        self.user_id = None
+        self.itens = []
+        self.nao_lidas = 0
+
+    # --- LEITURA ---
+    async def atualizar(self):
+        """Lista completa da API (pega também o que foi lido ou excluído em outro aparelho)."""
+        user_id = self.user_id
+        if user_id is None or self.atualizando:
+            return
+        self.atualizando = True
+        try:
+            mudou = await self.async_db.run(self.sync_engine.sync, "notificacoes", user_id)
+            if mudou or not self.itens:
+                self._recarregar(user_id)
+        finally:
+            self.atualizando = False
+
+    def recarregar(self):
+        """Relê o espelho local (ex: depois de um sync feito junto com outras leituras)."""
+        self._recarregar(self.user_id)
+
+    def _recarregar(self, user_id):
+        if user_id != self.user_id:
+            return
+        self._publicar(self.sync_engine.local("notificacoes", user_id))
+
+    def _publicar(self, itens):
+        self.itens = itens
+        self.nao_lidas = sum(1 for n in itens if not n.get("lida"))
+
+    # --- ALTERAÇÕES ---
+    async def marcar_lidas(self):
+        """Marca todas como lidas (uma requisição só, e só se houver alguma não lida)."""
+        user_id = self.user_id
+        if user_id is None or not self.nao_lidas:
+            return
+        lidas = [dict(n, lida=True) for n in self.itens]
+        self._publicar(lidas)
+        await self.async_db.run_prioridade(ESCRITA, self.sync_engine.semear, "notificacoes", user_id, rows=lidas)
+        if not await self.async_db.marcar_notificacoes_lidas(user_id):
+            await self.atualizar()  # não chegou na API: volta ao que o servidor tem
+
+    async def deletar(self, notif_id):
+        user_id = self.user_id
+        if user_id is None:
+            return
+        self._publicar([n for n in self.itens if n["id"] != notif_id])
+        await self.async_db.run_prioridade(ESCRITA, self.sync_engine.store.delete_ids, "notificacoes", [notif_id])
+        if not await self.async_db.deletar_notificacao(notif_id):
+            await self.atualizar()
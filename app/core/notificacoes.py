@@ -0,0 +1,171 @@
+import random
+import threading
+
+
+class NotificacaoPoller:
+    """
+    Checagem de notificações novas em segundo plano (fora da thread da UI).
+
+    Cada rodada pede só as notificações com id maior que o último já visto e
+    as guarda no espelho local, de onde as telas leem. Sem novidade (ou com
+    erro), o intervalo dobra até INTERVALO_MAX; com o app em segundo plano
+    (pausar) o teto passa a ser INTERVALO_PAUSADO. Qualquer novidade, ou
+    retomar(), volta ao INTERVALO_MIN.
+
+    Os ids já anunciados ficam guardados no aparelho: a mesma notificação
+    nunca gera dois avisos, nem depois de reabrir o app.
+
+    Com o canal de push conectado (usar_push), as notificações chegam por
+    receber() e o polling vira só uma rede de segurança a cada INTERVALO_COM_PUSH.
+    """
+
+    INTERVALO_MIN = 30            # segundos
+    INTERVALO_MAX = 15 * 60
+    INTERVALO_PAUSADO = 60 * 60
+    INTERVALO_COM_PUSH = 30 * 60
+    MAX_ANUNCIADOS = 200          # ids lembrados por usuário
+
+    def __init__(self, db, sync_engine):
+        self.db = db
+        self.sync_engine = sync_engine
+        self.store = sync_engine.store
+        # Funções chamadas (na thread do poller) quando chegam notificações para anunciar:
+        # listener(user_id, novas), com novas = lista de dicts da API
+        self.listeners = []
+        # Funções chamadas (na thread do poller ou do push) sempre que o espelho local
+        # de notificações recebe linhas novas: listener(user_id)
+        self.listeners_mudanca = []
+
+        self._user_id = None
+        self._intervalo = self.INTERVALO_MIN
+        self._pausado = False
+        self._push = False
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # --- SESSÃO ---
+    def entrar(self, user_id):
+        """Começa a checar para o usuário que acabou de fazer login."""
+        self._user_id = user_id
+        self._intervalo = self.INTERVALO_MIN
+        self.start()
+        self._wake.set()
+
+    def sair(self):
+        self._user_id = None
+
+    # --- CICLO DE VIDA ---
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="cognitive-notificacoes", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def pausar(self):
+        """App foi para segundo plano: continua, mas espaçando bem mais as checagens."""
+        self._pausado = True
+
+    def retomar(self):
+        """App voltou para a frente: checa agora e volta ao intervalo curto."""
+        self._pausado = False
+        self._intervalo = self.INTERVALO_MIN
+        self._wake.set()
+
+    def checar_agora(self):
+        self._wake.set()
+
+    def usar_push(self, ativo):
+        """Canal de push conectou (True) ou caiu (False). Ao cair, checa na hora o que pode ter se perdido."""
+        self._push = ativo
+        if not ativo:
+            self._intervalo = self.INTERVALO_MIN
+            self._wake.set()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            user_id = self._user_id
+            espera = None  # sem usuário: dorme até entrar()
+            if user_id is not None:
+                try:
+                    novas = self.checar(user_id)
+                except Exception as e:
+                    print(f"[NOTIFICAÇÕES] Erro na checagem: {e}")
+                    novas = None
+                espera = self._proxima_espera(novas)
+            self._wake.wait(timeout=espera)
+            self._wake.clear()
+
+    def _proxima_espera(self, novas):
+        if self._push and not self._pausado:
+            return self.INTERVALO_COM_PUSH
+        if novas:
+            self._intervalo = self.INTERVALO_MIN
+        else:
+            teto = self.INTERVALO_PAUSADO if self._pausado else self.INTERVALO_MAX
+            self._intervalo = min(teto, self._intervalo * 2)
+        # Espalha as checagens de vários aparelhos no tempo
+        return self._intervalo * random.uniform(0.8, 1.2)
+
+    # --- CHECAGEM ---
+    def checar(self, user_id):
+        """
+        Uma rodada: busca as novas, guarda no espelho local e avisa os listeners
+        das que ainda não foram anunciadas.
+        Retorna a lista de novas ([] se nada mudou) ou None se a API falhou.
+        """
+        chave = f"notificacoes:{user_id}"
+        ultimo_id = self.store.get_meta(chave, {}).get("ultimo_id")
+
+        ok, novas = self.db.get_notificacoes_desde(user_id, ultimo_id)
+        if not ok:
+            return None
+        # Logout durante a requisição: não grava nada do usuário anterior
+        if not novas or self._user_id != user_id:
+            return []
+
+        # O push pode ter entregado alguma destas enquanto a requisição corria
+        with self._lock:
+            estado = self.store.get_meta(chave, {"ultimo_id": None, "anunciados": []})
+            self._registrar(user_id, novas, chave, estado)
+        return novas
+
+    def receber(self, user_id, novas):
+        """Notificações que chegaram pelo canal de push: mesmo tratamento de uma checagem."""
+        if not novas or self._user_id != user_id:
+            return
+        chave = f"notificacoes:{user_id}"
+        with self._lock:
+            estado = self.store.get_meta(chave, {"ultimo_id": None, "anunciados": []})
+            self._registrar(user_id, novas, chave, estado)
+
+    def _registrar(self, user_id, novas, chave, estado):
+        """Guarda no espelho local, avança o último id e anuncia o que ainda não foi anunciado."""
+        self.sync_engine.semear("notificacoes", user_id, rows=novas)
+
+        anunciados = set(estado["anunciados"])
+        anunciar = [n for n in novas if n["id"] not in anunciados and not n.get("lida")]
+        ids = [n["id"] for n in novas]
+        if estado["ultimo_id"] is not None:
+            ids.append(estado["ultimo_id"])
+        estado["ultimo_id"] = max(ids)
+        estado["anunciados"] = (estado["anunciados"] + [n["id"] for n in anunciar])[-self.MAX_ANUNCIADOS:]
+        self.store.set_meta(chave, estado)
+
+        self._notify(self.listeners_mudanca, user_id)
+        if anunciar:
+            self._notify(self.listeners, user_id, anunciar)
+
+    @staticmethod
+    def _notify(listeners, *args):
+        for listener in list(listeners):
+            try:
+                listener(*args)
+            except Exception as e:
+                print(f"[NOTIFICAÇÕES] Erro no listener: {e}")
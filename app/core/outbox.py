@@ -0,0 +1,169 @@
+import json
+import random
+import threading
+import time
+import uuid
+
+from app.core.neon import Database
+
+
+class Outbox:
+    """
+    Fila persistente de escritas (diário e anotações de consulta).
+
+    Salvar = gravar no SQLite local e responder na hora; uma thread de fundo
+    envia os pendentes em lotes, com uma Idempotency-Key por item para que
+    repetir o envio nunca crie entradas duplicadas na API.
+
+    Enquanto o item não é enviado, uma linha com id negativo (-id da outbox)
+    aparece no espelho local, então a tela já mostra o que foi salvo.
+    """
+
+    BATCH_SIZE = 20
+    BACKOFF_BASE = 5       # segundos
+    BACKOFF_MAX = 300      # segundos
+    INTERVALO = 60         # checagem periódica mesmo sem novos itens
+
+    def __init__(self, db, store, sync_engine=None):
+        self.db = db
+        self.store = store
+        self.sync_engine = sync_engine
+        # Funções chamadas (na thread de envio) quando um item é enviado ou descartado:
+        # listener(evento, tabela, escopo) com evento "enviado" ou "falhou"
+        self.listeners = []
+
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # --- ENFILEIRAR (chamado pelas telas) ---
+    def salvar_entrada_diario(self, user_id, data_hora, sentimento_id, anotacao, atividades_ids, atividades_txt=None):
+        payload = Database.payload_entrada_diario(user_id, data_hora, sentimento_id, anotacao, atividades_ids)
+        linha = (data_hora, sentimento_id, anotacao, atividades_txt or "")
+        return self._enqueue("POST", "/diario", payload, "diario", (user_id,), linha)
+
+    def salvar_anotacao(self, psicologo_id, paciente_id, texto, data_hora_iso):
+        payload = Database.payload_anotacao(psicologo_id, paciente_id, texto, data_hora_iso)
+        linha = (data_hora_iso, texto)
+        return self._enqueue("POST", "/consultas", payload, "anotacoes", (psicologo_id, paciente_id), linha)
+
+    def _enqueue(self, method, path, payload, tabela, escopo, linha):
+        chave = str(uuid.uuid4())
+        with self.store.transaction():
+            item_id = self.store.execute(
+                "INSERT INTO outbox (chave, method, path, payload, tabela, escopo, criado_em) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (chave, method, path, json.dumps(payload), tabela, json.dumps(list(escopo)), time.time()),
+            )
+            self.store.upsert(tabela, escopo, [(-item_id,) + tuple(linha)])
+        self._wake.set()
+        return chave
+
+    def pendentes(self):
+        return self.store.query("SELECT COUNT(*) FROM outbox WHERE estado = 'pendente'")[0][0]
+
+    # --- ENVIO ---
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="cognitive-outbox", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def flush_now(self):
+        """Acorda a thread de envio (ex: ao voltar a ter rede ou ao retomar o app)."""
+        self._wake.set()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"[OUTBOX] Erro no envio: {e}")
+            self._wake.wait(timeout=self._proxima_espera())
+            self._wake.clear()
+
+    def _proxima_espera(self):
+        row = self.store.query("SELECT MIN(proxima_tentativa) FROM outbox WHERE estado = 'pendente'")
+        proxima = row[0][0] if row else None
+        if proxima is None:
+            return self.INTERVALO
+        return max(1.0, min(self.INTERVALO, proxima - time.time()))
+
+    def flush(self):
+        """Envia um lote de pendentes. Retorna quantos foram enviados."""
+        itens = self.store.query(
+            "SELECT id, chave, method, path, payload, tabela, escopo, tentativas FROM outbox "
+            "WHERE estado = 'pendente' AND proxima_tentativa <= ? ORDER BY id LIMIT ?",
+            (time.time(), self.BATCH_SIZE),
+        )
+        enviados = 0
+        entregues = {}  # (tabela, escopo) -> ids da outbox já entregues, a concluir
+        # Inclui os entregues de uma execução interrompida (app fechado antes de concluir)
+        for item_id, tabela, escopo in self.store.query("SELECT id, tabela, escopo FROM outbox WHERE estado = 'entregue'"):
+            entregues.setdefault((tabela, tuple(json.loads(escopo))), []).append(item_id)
+        for item_id, chave, method, path, payload, tabela, escopo, tentativas in itens:
+            escopo = tuple(json.loads(escopo))
+            try:
+                res = self.db.http.request(method, path, json=json.loads(payload), headers={"Idempotency-Key": chave})
+            except Exception as e:
+                # Sem rede: não adianta tentar o resto do lote agora
+                self._reagendar(item_id, tentativas, str(e))
+                break
+
+            # 409 = a API já tinha recebido esta chave (envio anterior chegou)
+            if 200 <= res.status_code < 300 or res.status_code == 409:
+                # A linha só sai da outbox junto com a provisória (-id), em _concluir
+                self.store.execute("UPDATE outbox SET estado = 'entregue' WHERE id = ?", (item_id,))
+                entregues.setdefault((tabela, escopo), []).append(item_id)
+                enviados += 1
+            elif res.status_code in (408, 429) or res.status_code >= 500:
+                self._reagendar(item_id, tentativas, f"HTTP {res.status_code}")
+            else:
+                # Erro do cliente (dados inválidos): repetir não resolve
+                self._falhar(item_id, tabela, escopo, f"HTTP {res.status_code}: {res.text[:200]}")
+
+        for (tabela, escopo), ids in entregues.items():
+            self._concluir(tabela, escopo, ids)
+        return enviados
+
+    def _reagendar(self, item_id, tentativas, erro):
+        espera = min(self.BACKOFF_MAX, self.BACKOFF_BASE * 2 ** tentativas) * random.uniform(0.5, 1.5)
+        self.store.execute(
+            "UPDATE outbox SET tentativas = tentativas + 1, proxima_tentativa = ?, ultimo_erro = ? WHERE id = ?",
+            (time.time() + espera, erro, item_id),
+        )
+
+    def _concluir(self, tabela, escopo, ids):
+        """Um sync (delta) por escopo depois do lote, não um por item enviado."""
+        # Traz as linhas definitivas (id da API) antes de tirar as provisórias, evitando "buraco" na tela
+        if self.sync_engine is not None:
+            try:
+                if tabela == "diario":
+                    self.sync_engine.atualizar_diario(*escopo)
+                else:
+                    self.sync_engine.sync(tabela, *escopo)
+            except Exception as e:
+                print(f"[OUTBOX] Falha ao sincronizar {tabela}: {e}")
+        with self.store.transaction():
+            marks = ", ".join("?" for _ in ids)
+            self.store.execute(f"DELETE FROM outbox WHERE id IN ({marks})", tuple(ids))
+            self.store.delete_ids(tabela, [-item_id for item_id in ids])
+        self._notify("enviado", tabela, escopo)
+
+    def _falhar(self, item_id, tabela, escopo, erro):
+        print(f"[OUTBOX] Item {item_id} recusado pela API: {erro}")
+        with self.store.transaction():
+            self.store.execute("UPDATE outbox SET estado = 'falhou', ultimo_erro = ? WHERE id = ?", (erro, item_id))
+            self.store.delete_ids(tabela, [-item_id])
+        self._notify("falhou", tabela, escopo)
+
+    def _notify(self, evento, tabela, escopo):
+        for listener in list(self.listeners):
+            try:
+                listener(evento, tabela, escopo)
+            except Exception as e:
+                print(f"[OUTBOX] Erro no listener: {e}")
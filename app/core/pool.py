@@ -0,0 +1,177 @@
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, Future
+
+# Classes de prioridade (menor número = sai da fila antes)
+VISIVEL = 0      # leitura que a tela aberta está esperando
+ESCRITA = 1      # gravação pedida pelo usuário
+PREFETCH = 2     # adiantar dados de telas que provavelmente vêm a seguir
+FUNDO = 3        # revalidações e checagens em segundo plano
+
+NOMES = {VISIVEL: "visivel", ESCRITA: "escrita", PREFETCH: "prefetch", FUNDO: "fundo"}
+
+
+class _Tarefa:
+    __slots__ = ("future", "fn", "args", "kwargs", "prioridade", "enfileirada")
+
+    def __init__(self, future, fn, args, kwargs, prioridade):
+        self.future = future
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.prioridade = prioridade
+        self.enfileirada = time.monotonic()
+
+
+class _Fila(Executor):
+    """Visão do pool com prioridade fixa (para quem só sabe chamar submit, como o asynckivy)."""
+
+    def __init__(self, pool, prioridade):
+        self._pool = pool
+        self._prioridade = prioridade
+
+    def submit(self, fn, /, *args, **kwargs):
+        return self._pool.enviar(self._prioridade, fn, *args, **kwargs)
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        pass  # quem encerra é o dono do pool
+
+
+class PoolPrioridades(Executor):
+    """
+    Pool único de threads do app (criado pelo CognitiveApp), com número fixo
+    de workers e fila por prioridade: o que a tela aberta espera passa na
+    frente de gravações, que passam na frente de prefetch e de tarefas de
+    fundo. Dentro da mesma classe, a ordem é a de chegada.
+
+    Como cada worker tem a sua Session (Transport), o número de threads e de
+    conexões fica limitado a WORKERS, por mais que o usuário navegue rápido.
+    Tarefas canceladas enquanto esperam na fila (tela fechada) nem chegam a
+    rodar.
+
+    metricas() traz a profundidade da fila e o tempo de espera por classe.
+    """
+
+    WORKERS = 4
+    AMOSTRAS = 200   # esperas guardadas por classe para as métricas
+
+    def __init__(self, workers=None, nome="cognitive-pool"):
+        self.workers = workers or self.WORKERS
+        self.nome = nome
+        self._fila = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._threads = []
+        self._ociosos = 0
+        self._iniciando = 0   # threads criadas que ainda não pegaram o lock
+        self._rodando = 0
+        self._fechado = False
+        self._filas = {p: _Fila(self, p) for p in NOMES}
+
+        self._esperas = {p: deque(maxlen=self.AMOSTRAS) for p in NOMES}
+        self._canceladas = 0
+        self._maior_fila = 0
+
+    # --- ENVIO ---
+    def submit(self, fn, /, *args, **kwargs):
+        return self.enviar(VISIVEL, fn, *args, **kwargs)
+
+    def enviar(self, prioridade, fn, *args, **kwargs):
+        """Enfileira fn(*args, **kwargs) na classe 'prioridade'; retorna um Future."""
+        future = Future()
+        with self._cond:
+            if self._fechado:
+                raise RuntimeError("pool encerrado")
+            tarefa = _Tarefa(future, fn, args, kwargs, prioridade)
+            heapq.heappush(self._fila, (prioridade, next(self._seq), tarefa))
+            self._maior_fila = max(self._maior_fila, len(self._fila))
+            # Um ocioso já avisado (que ainda não acordou) continua contado em _ociosos,
+            # mas vai pegar uma das tarefas da fila: só há quem pegue esta se houver
+            # mais ociosos (e threads começando) do que tarefas esperando
+            if len(self._fila) > self._ociosos + self._iniciando and len(self._threads) < self.workers:
+                self._nova_thread()
+            self._cond.notify()
+        return future
+
+    def fila(self, prioridade):
+        """Executor que envia sempre com a mesma prioridade (ak.run_in_executor(pool.fila(PREFETCH), ...))."""
+        return self._filas[prioridade]
+
+    def _nova_thread(self):
+        thread = threading.Thread(target=self._worker, name=f"{self.nome}-{len(self._threads)}", daemon=True)
+        self._threads.append(thread)
+        self._iniciando += 1
+        thread.start()
+
+    # --- WORKERS ---
+    def _worker(self):
+        with self._cond:
+            self._iniciando -= 1
+        while True:
+            with self._cond:
+                while not self._fila and not self._fechado:
+                    self._ociosos += 1
+                    self._cond.wait()
+                    self._ociosos -= 1
+                if not self._fila:
+                    return  # encerrado e sem nada pendente
+                _, _, tarefa = heapq.heappop(self._fila)
+                if not tarefa.future.set_running_or_notify_cancel():
+                    self._canceladas += 1
+                    continue
+                self._esperas[tarefa.prioridade].append(time.monotonic() - tarefa.enfileirada)
+                self._rodando += 1
+
+            try:
+                resultado = tarefa.fn(*tarefa.args, **tarefa.kwargs)
+            except BaseException as e:
+                tarefa.future.set_exception(e)
+            else:
+                tarefa.future.set_result(resultado)
+            finally:
+                tarefa = None  # não segura a referência enquanto espera a próxima
+                with self._cond:
+                    self._rodando -= 1
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        with self._cond:
+            self._fechado = True
+            if cancel_futures:
+                while self._fila:
+                    _, _, tarefa = heapq.heappop(self._fila)
+                    tarefa.future.cancel()
+            self._cond.notify_all()
+            threads = list(self._threads)
+        if wait:
+            for thread in threads:
+                thread.join()
+
+    # --- MÉTRICAS ---
+    def metricas(self):
+        """{"threads", "rodando", "na_fila": {classe: n}, "maior_fila", "canceladas", "espera_ms": {classe: {...}}}"""
+        with self._cond:
+            na_fila = {nome: 0 for nome in NOMES.values()}
+            for prioridade, _, _ in self._fila:
+                na_fila[NOMES[prioridade]] += 1
+            espera = {}
+            for prioridade, amostras in self._esperas.items():
+                ordenadas = sorted(amostras)
+                if not ordenadas:
+                    continue
+                espera[NOMES[prioridade]] = {
+                    "n": len(ordenadas),
+                    "media": round(sum(ordenadas) / len(ordenadas) * 1000, 2),
+                    "p95": round(ordenadas[int(len(ordenadas) * 0.95)] * 1000, 2),
+                    "max": round(ordenadas[-1] * 1000, 2),
+                }
+            return {
+                "threads": len(self._threads),
+                "rodando": self._rodando,
+                "na_fila": na_fila,
+                "maior_fila": self._maior_fila,
+                "canceladas": self._canceladas,
+                "espera_ms": espera,
+            }
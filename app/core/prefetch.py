@@ -0,0 +1,194 @@
+import threading
+import time
+from collections import deque
+
+from app.core import cancelamento
+from app.core.pool import PREFETCH
+
+PACIENTE = "Paciente"
+PSICOLOGO = "Psicólogo"
+
+# papel -> tela aberta (None = logo depois do login) -> dados das telas que costumam vir a seguir.
+# A tela aberta busca os próprios dados: aqui só entra o que ela ainda não pediu.
+PLANOS = {
+    PSICOLOGO: {
+        None: ["estatisticas", "pacientes", "agenda_psicologo"],
+        "home_psicologo": ["pacientes", "agenda_psicologo", "atividades"],
+        "pacientes": ["estatisticas", "agenda_psicologo"],
+        "disponibilidade": ["estatisticas", "pacientes"],
+        "lista_atividade": ["estatisticas"],
+        "consulta_anotacao": ["estatisticas"],
+        "conta": ["estatisticas"],
+    },
+    PACIENTE: {
+        None: ["diario", "agenda_paciente", "usuario"],
+        "home": ["diario", "agenda_paciente", "usuario"],
+        "diario": ["agenda_paciente"],
+        "agendamento": ["diario"],
+        "conta": ["diario"],
+    },
+}
+
+
+class PlanoPrefetch:
+    """
+    Adianta, com folga de rede, os dados das telas que o usuário provavelmente
+    abre a seguir: depois do login (entrar) e a cada troca de tela (na_tela),
+    conforme PLANOS. Leituras da API aquecem o cache de respostas; agenda,
+    diário e anotações vão para o espelho local (SyncEngine). Quando a tela
+    abre, pinta na hora e a conferida com a API não traz nada novo.
+
+    As ações rodam uma por vez, na classe PREFETCH do pool (atrás de tudo que
+    uma tela espera ou que o usuário gravou). A mais recente passa na frente
+    da fila; a mesma ação feita há menos de RECENTE segundos é pulada. Sair
+    da conta cancela o que estiver em andamento.
+    """
+
+    RECENTE = 60        # segundos
+    MAX_FILA = 12
+    VIZINHOS = 1        # pacientes de cada lado do selecionado no menu das anotações
+
+    def __init__(self, db, sync_engine, pool):
+        self.db = db
+        self.sync = sync_engine
+        self.pool = pool
+        self._lock = threading.Lock()
+        self._fila = deque()       # (ação, *args)
+        self._feitas = {}          # (ação, *args) -> instante em que terminou
+        self._rodando = None
+        self._token = None
+        self._user_id = None
+        self._papel = None
+
+        self.executadas = 0
+        self.puladas = 0
+        self.falhas = 0
+
+    # --- SESSÃO ---
+    def entrar(self, user_id, papel):
+        self.sair()
+        with self._lock:
+            self._user_id = user_id
+            self._papel = papel
+            self._token = cancelamento.Token()
+        self.na_tela(None)
+
+    def sair(self):
+        with self._lock:
+            token, self._token = self._token, None
+            self._user_id = self._papel = None
+            self._fila.clear()
+            self._feitas.clear()
+        if token is not None:
+            token.cancelar()
+
+    # --- GATILHOS ---
+    def na_tela(self, nome):
+        """Chamado a cada troca de tela (e com None logo depois do login)."""
+        plano = PLANOS.get(self._papel, {}).get(nome, [])
+        self._planejar([(acao, self._user_id) for acao in plano])
+
+    def anotacoes_vizinhas(self, pacientes, paciente_id=None):
+        """
+        Menu de pacientes das anotações: adianta o histórico dos vizinhos do
+        selecionado (ou dos primeiros da lista, antes de alguém ser escolhido).
+        """
+        if self._papel != PSICOLOGO or not pacientes:
+            return
+        if paciente_id in pacientes:
+            i = pacientes.index(paciente_id)
+            ids = pacientes[max(0, i - self.VIZINHOS):i] + pacientes[i + 1:i + 1 + self.VIZINHOS]
+        else:
+            ids = pacientes[:1 + self.VIZINHOS]
+        self._planejar([("anotacoes", self._user_id, pid) for pid in ids])
+
+    # --- FILA ---
+    def _planejar(self, acoes):
+        with self._lock:
+            if self._token is None:
+                return
+            agora = time.monotonic()
+            for acao in reversed(acoes):
+                feita = self._feitas.get(acao)
+                if (feita is not None and agora - feita < self.RECENTE) or acao == self._rodando:
+                    self.puladas += 1
+                    continue
+                if acao in self._fila:
+                    self._fila.remove(acao)
+                self._fila.appendleft(acao)
+            while len(self._fila) > self.MAX_FILA:
+                self._fila.pop()
+        self._proxima()
+
+    def _proxima(self):
+        with self._lock:
+            if self._rodando is not None or not self._fila or self._token is None:
+                return
+            acao = self._rodando = self._fila.popleft()
+            token = self._token
+        try:
+            future = self.pool.enviar(PREFETCH, cancelamento.rodar, token, self._executar, acao)
+        except RuntimeError:
+            # Pool encerrado (app fechando)
+            with self._lock:
+                self._rodando = None
+            return
+        future.add_done_callback(lambda f: self._terminou(acao, token, f))
+
+    def _terminou(self, acao, token, future):
+        erro = None if future.cancelled() else future.exception()
+        with self._lock:
+            self._rodando = None
+            if token is not self._token:
+                return  # saiu da conta enquanto rodava
+            if erro is None and not future.cancelled():
+                self._feitas[acao] = time.monotonic()
+                self.executadas += 1
+            elif not isinstance(erro, cancelamento.Cancelado):
+                self.falhas += 1
+        if erro is not None and not isinstance(erro, cancelamento.Cancelado):
+            print(f"[PREFETCH] {acao[0]} falhou: {erro}")
+        self._proxima()
+
+    def _executar(self, acao):
+        nome, *args = acao
+        getattr(self, f"_{nome}")(*args)
+
+    # --- AÇÕES (rodam numa thread do pool) ---
+    def _estatisticas(self, psicologo_id):
+        self.db.get_patient_count(psicologo_id)
+
+    def _pacientes(self, psicologo_id):
+        self.db.get_pacientes_do_psicologo(psicologo_id)
+
+    def _atividades(self, psicologo_id):
+        self.db.get_atividades_template()
+
+    def _agenda_psicologo(self, psicologo_id):
+        self.sync.sync("agenda", psicologo_id)
+
+    def _anotacoes(self, psicologo_id, paciente_id):
+        self.sync.sync("anotacoes", psicologo_id, paciente_id)
+
+    def _diario(self, paciente_id):
+        self.sync.atualizar_diario(paciente_id)
+
+    def _agenda_paciente(self, paciente_id):
+        psicologo_id = self.db.get_psicologo_id_by_paciente(paciente_id)
+        if not psicologo_id:
+            return
+        if psicologo_id != self.sync.psicologo_do_paciente(paciente_id):
+            self.sync.lembrar_psicologo(paciente_id, psicologo_id)
+        self.sync.sync("agenda", psicologo_id)
+
+    def _usuario(self, user_id):
+        self.db.get_user_details(user_id)
+
+    def metricas(self):
+        with self._lock:
+            return {
+                "executadas": self.executadas,
+                "puladas": self.puladas,
+                "falhas": self.falhas,
+                "na_fila": len(self._fila),
+            }
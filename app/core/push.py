@@ -0,0 +1,240 @@
+import json
+import random
+import re
+import threading
+import time
+
+_FIM_DE_LINHA = re.compile(rb"\r\n|\r|\n")
+
+
+class LeitorSSE:
+    """
+    Interpreta um stream text/event-stream aos pedaços (qualquer tamanho).
+    alimentar(bytes) devolve os eventos completos: dicts {"evento", "dados", "id"}.
+    """
+
+    def __init__(self):
+        self.ultimo_id = None
+        self.retry = None       # ms pedidos pelo servidor para reconectar
+        self._buffer = b""
+        self._pular_lf = False  # o pedaço anterior terminou em \r
+        self._evento = ""
+        self._dados = []
+
+    def alimentar(self, pedaco):
+        if self._pular_lf and pedaco[:1] == b"\n":
+            pedaco = pedaco[1:]
+        self._pular_lf = False
+        self._buffer += pedaco
+
+        eventos = []
+        inicio = 0
+        for fim in _FIM_DE_LINHA.finditer(self._buffer):
+            evento = self._linha(self._buffer[inicio:fim.start()].decode("utf-8", "replace"))
+            if evento:
+                eventos.append(evento)
+            inicio = fim.end()
+            if fim.group() == b"\r" and inicio == len(self._buffer):
+                self._pular_lf = True
+        self._buffer = self._buffer[inicio:]
+        return eventos
+
+    def _linha(self, linha):
+        if not linha:
+            return self._despachar()
+        if linha.startswith(":"):
+            return None  # comentário (heartbeat do servidor)
+        campo, _, valor = linha.partition(":")
+        if valor.startswith(" "):
+            valor = valor[1:]
+        if campo == "event":
+            self._evento = valor
+        elif campo == "data":
+            self._dados.append(valor)
+        elif campo == "id" and "\0" not in valor:
+            self.ultimo_id = valor
+        elif campo == "retry" and valor.isdigit():
+            self.retry = int(valor)
+        return None
+
+    def _despachar(self):
+        evento, dados = self._evento or "message", self._dados
+        self._evento, self._dados = "", []
+        if not dados:
+            return None
+        return {"evento": evento, "dados": "\n".join(dados), "id": self.ultimo_id}
+
+
+class CanalPush:
+    """
+    Eventos empurrados pela API (Server-Sent Events) em /eventos/{user_id}:
+    notificações e mudanças na agenda chegam em menos de um segundo, sem
+    esperar a próxima checagem.
+
+    Roda numa thread própria e reconecta sozinho (backoff com jitter, enviando
+    Last-Event-ID para o servidor repetir o que se perdeu). Enquanto não está
+    conectado, quem depende dele continua no polling: os listeners de estado
+    avisam quando o canal cai ou volta. Se a API não tiver o endpoint, tenta
+    de novo só depois de SEM_ENDPOINT segundos.
+    """
+
+    PATH = "/eventos/{0}"
+    LEITURA = 45            # s sem nenhum byte (nem heartbeat) = conexão morta
+    BACKOFF_BASE = 2        # s
+    BACKOFF_MAX = 300
+    SEM_ENDPOINT = 30 * 60
+    CONEXAO_ESTAVEL = 30    # s conectado para zerar o backoff
+
+    def __init__(self, db):
+        self.db = db
+        # listener(evento, dados) na thread do canal; dados já vem do JSON
+        self.listeners = []
+        # listener_estado(conectado) na thread do canal
+        self.listeners_estado = []
+        self.conectado = False
+
+        self._user_id = None
+        self._pausado = False
+        self._ultimo_id = None
+        self._falhas = 0
+        self._retry_servidor = None
+        self._resposta = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # --- SESSÃO / CICLO DE VIDA ---
+    def entrar(self, user_id):
+        self._user_id = user_id
+        self._ultimo_id = None
+        self._falhas = 0
+        self._wake.set()
+        self.start()
+
+    def sair(self):
+        self._user_id = None
+        self._fechar_conexao()
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="cognitive-push", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._fechar_conexao()
+        self._wake.set()
+
+    def pausar(self):
+        """App em segundo plano: larga a conexão (o polling espaçado assume)."""
+        self._pausado = True
+        self._fechar_conexao()
+
+    def retomar(self):
+        self._pausado = False
+        self._falhas = 0
+        self._wake.set()
+
+    def _fechar_conexao(self):
+        # Fechar a resposta destrava a leitura bloqueada na thread do canal
+        with self._lock:
+            resposta, self._resposta = self._resposta, None
+        if resposta is not None:
+            try:
+                resposta.close()
+            except Exception:
+                pass
+
+    # --- LAÇO ---
+    def _loop(self):
+        while not self._stop.is_set():
+            user_id = self._user_id
+            if user_id is None or self._pausado:
+                self._wake.wait()
+                self._wake.clear()
+                continue
+
+            # Pedidos para (re)conectar feitos até aqui já são atendidos por esta tentativa
+            self._wake.clear()
+            inicio = time.monotonic()
+            try:
+                resultado = self._escutar(user_id)
+            except Exception as e:
+                if not self._stop.is_set() and self._user_id == user_id and not self._pausado:
+                    print(f"[PUSH] Conexão caiu: {e}")
+                resultado = "erro"
+            finally:
+                self._set_conectado(False)
+
+            if resultado == "sem_endpoint":
+                espera = self.SEM_ENDPOINT
+            else:
+                if time.monotonic() - inicio >= self.CONEXAO_ESTAVEL:
+                    self._falhas = 0
+                espera = self._proxima_espera()
+            self._wake.wait(timeout=espera)
+            self._wake.clear()
+
+    def _proxima_espera(self):
+        base = self._retry_servidor / 1000 if self._retry_servidor else self.BACKOFF_BASE
+        espera = min(self.BACKOFF_MAX, base * 2 ** self._falhas)
+        self._falhas += 1
+        return espera * random.uniform(0.5, 1.5)
+
+    def _escutar(self, user_id):
+        headers = {"Accept": "text/event-stream", "Cache-Control": "no-cache", "Accept-Encoding": "identity"}
+        if self._ultimo_id:
+            headers["Last-Event-ID"] = self._ultimo_id
+        http = self.db.http
+        res = http.get(self.PATH.format(user_id), headers=headers, stream=True,
+                       timeout=(http.connect_timeout, self.LEITURA))
+        with self._lock:
+            self._resposta = res
+        try:
+            if res.status_code in (404, 405, 501):
+                print(f"[PUSH] API sem canal de eventos (HTTP {res.status_code}); seguindo só com polling")
+                return "sem_endpoint"
+            if res.status_code != 200:
+                return "erro"
+
+            self._set_conectado(True)
+            leitor = LeitorSSE()
+            # read1: devolve o que já chegou (até 8 KB) sem esperar encher o buffer,
+            # então cada evento sai assim que chega (o stream nunca "termina")
+            while True:
+                pedaco = res.raw.read1(8192)
+                if not pedaco or self._stop.is_set() or self._pausado or self._user_id != user_id:
+                    break
+                for evento in leitor.alimentar(pedaco):
+                    self._ultimo_id = evento["id"] or self._ultimo_id
+                    self._despachar(evento)
+                if leitor.retry:
+                    self._retry_servidor = leitor.retry
+            return "fim"
+        finally:
+            self._fechar_conexao()
+            res.close()
+
+    def _despachar(self, evento):
+        try:
+            dados = json.loads(evento["dados"])
+        except ValueError:
+            dados = evento["dados"]
+        for listener in list(self.listeners):
+            try:
+                listener(evento["evento"], dados)
+            except Exception as e:
+                print(f"[PUSH] Erro no listener: {e}")
+
+    def _set_conectado(self, conectado):
+        if conectado == self.conectado:
+            return
+        self.conectado = conectado
+        for listener in list(self.listeners_estado):
+            try:
+                listener(conectado)
+            except Exception as e:
+                print(f"[PUSH] Erro no listener de estado: {e}")
@@ -0,0 +1,158 @@
+import json
+import os
+import threading
+import time
+import zlib
+
+from app.core.inicio import sob_demanda
+
+# Só para remontar o Bitmap lido do disco; evita importar o PIL na abertura
+imagens = sob_demanda("app.core.imagens")
+
+
+class CacheRelatorios:
+    """
+    Relatórios prontos (texto + dados dos gráficos ou gráficos já decodificados) gravados no aparelho,
+    um por paciente, junto com a "versão" dos dados que os gerou.
+
+    Os pixels ficam comprimidos com zlib (gráficos têm muita cor chapada) e o
+    total em disco é limitado por max_bytes: sai primeiro o paciente aberto há
+    mais tempo (LRU).
+    """
+
+    INDICE = "indice.json"
+
+    def __init__(self, pasta, max_bytes=32 * 1024 * 1024):
+        self.pasta = pasta
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(pasta, exist_ok=True)
+        # paciente_id (str) -> {"versao", "bytes", "usado_em", "arquivos"}
+        self._indice = self._ler_indice()
+
+    # --- LEITURA ---
+    def get(self, paciente_id):
+        """Retorna (versao, relatorio) ou None. relatorio = {"resumo_texto", "dados", "graficos", "atividades"}."""
+        chave = str(paciente_id)
+        with self._lock:
+            item = self._indice.get(chave)
+            if item is None:
+                return None
+            try:
+                with open(self._caminho(chave, "json"), "r", encoding="utf-8") as f:
+                    meta = json.load(f)
+                relatorio = {
+                    "resumo_texto": meta.get("resumo_texto"),
+                    "dados": meta.get("dados"),
+                    "graficos": {nome: self._ler_bitmap(chave, nome, info)
+                                 for nome, info in meta.get("graficos", {}).items()},
+                    "atividades": self._ler_bitmap(chave, "atividades", meta.get("atividades")),
+                }
+            except (OSError, ValueError, zlib.error) as e:
+                print(f"[CACHE RELATÓRIO] Entrada corrompida ({chave}): {e}")
+                self._remover(chave)
+                self._gravar_indice()
+                return None
+
+            item["usado_em"] = time.time()
+            self._gravar_indice()
+            return item["versao"], relatorio
+
+    # --- ESCRITA ---
+    def put(self, paciente_id, versao, relatorio):
+        chave = str(paciente_id)
+        with self._lock:
+            self._remover(chave)
+            arquivos = []
+            total = 0
+            # "dados" (agregados dos gráficos desenhados no app) é pequeno e vai no próprio JSON
+            meta = {"resumo_texto": relatorio.get("resumo_texto"), "dados": relatorio.get("dados"),
+                    "graficos": {}, "atividades": None}
+            try:
+                for nome, bitmap in relatorio.get("graficos", {}).items():
+                    meta["graficos"][nome], n = self._gravar_bitmap(chave, nome, bitmap, arquivos)
+                    total += n
+                meta["atividades"], n = self._gravar_bitmap(chave, "atividades", relatorio.get("atividades"), arquivos)
+                total += n
+
+                caminho = self._caminho(chave, "json")
+                with open(caminho, "w", encoding="utf-8") as f:
+                    json.dump(meta, f)
+                arquivos.append(os.path.basename(caminho))
+                total += os.path.getsize(caminho)
+            except OSError as e:
+                print(f"[CACHE RELATÓRIO] Falha ao gravar ({chave}): {e}")
+                self._apagar_arquivos(arquivos)
+                return
+
+            self._indice[chave] = {"versao": versao, "bytes": total, "usado_em": time.time(), "arquivos": arquivos}
+            self._evict(manter=chave)
+            self._gravar_indice()
+
+    def limpar(self):
+        """Apaga todos os relatórios (logout)."""
+        with self._lock:
+            for chave in list(self._indice):
+                self._remover(chave)
+            self._gravar_indice()
+
+    # --- INTERNOS (chamados com o lock) ---
+    def _caminho(self, chave, sufixo):
+        return os.path.join(self.pasta, f"{chave}.{sufixo}")
+
+    def _gravar_bitmap(self, chave, nome, bitmap, arquivos):
+        if bitmap is None:
+            return None, 0
+        caminho = self._caminho(chave, f"{nome}.rgba.z")
+        dados = zlib.compress(bitmap.pixels, 1)
+        with open(caminho, "wb") as f:
+            f.write(dados)
+        arquivos.append(os.path.basename(caminho))
+        return {"largura": bitmap.largura, "altura": bitmap.altura}, len(dados)
+
+    def _ler_bitmap(self, chave, nome, info):
+        if not info:
+            return None
+        with open(self._caminho(chave, f"{nome}.rgba.z"), "rb") as f:
+            pixels = zlib.decompress(f.read())
+        return imagens.Bitmap(info["largura"], info["altura"], pixels)
+
+    def _evict(self, manter=None):
+        total = sum(item["bytes"] for item in self._indice.values())
+        for chave in sorted(self._indice, key=lambda c: self._indice[c]["usado_em"]):
+            if total <= self.max_bytes:
+                break
+            if chave == manter:
+                continue
+            total -= self._indice[chave]["bytes"]
+            self._remover(chave)
+
+    def _remover(self, chave):
+        item = self._indice.pop(chave, None)
+        if item:
+            self._apagar_arquivos(item.get("arquivos", []))
+
+    def _apagar_arquivos(self, arquivos):
+        for nome in arquivos:
+            try:
+                os.remove(os.path.join(self.pasta, nome))
+            except OSError:
+                pass
+
+    def _ler_indice(self):
+        try:
+            with open(os.path.join(self.pasta, self.INDICE), "r", encoding="utf-8") as f:
+                indice = json.load(f)
+            return indice if isinstance(indice, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _gravar_indice(self):
+        caminho = os.path.join(self.pasta, self.INDICE)
+        temp = caminho + ".tmp"
+        try:
+            with open(temp, "w", encoding="utf-8") as f:
+                json.dump(self._indice, f)
+            os.replace(temp, caminho)
+        except OSError as e:
+            print(f"[CACHE RELATÓRIO] Falha ao gravar índice: {e}")
@@ -0,0 +1,107 @@
+from app.core import datas
+from app.core.inicio import sob_demanda
+
+# PIL só é importado quando chega o primeiro PNG para decodificar
+imagens = sob_demanda("app.core.imagens")
+
+# Gráficos que vêm dentro da análise: campo da API -> nome usado pela tela
+GRAFICOS_ANALISE = {
+    "grafico_evolucao_base64": "evolucao",
+    "grafico_distribuicao_base64": "distribuicao",
+}
+
+# Quantas atividades aparecem no gráfico (as mais frequentes)
+MAX_ATIVIDADES = 10
+
+
+class Relatorios:
+    """
+    Monta o relatório de um paciente fora da thread da UI.
+
+    O caminho normal é dados(): só os números agregados, e a tela desenha os
+    gráficos no tamanho real dela. Se a API não tiver esse endpoint, analise()
+    e grafico_atividades() trazem os PNGs já decodificados (Bitmap), de modo
+    que a tela só precise copiar os pixels para a textura.
+
+    Com um CacheRelatorios, o último relatório de cada paciente fica no
+    aparelho junto com a versão dos dados (data da última entrada do diário);
+    enquanto a versão no servidor for a mesma, nada é baixado de novo.
+    """
+
+    def __init__(self, db, cache=None):
+        self.db = db
+        self.cache = cache
+
+    def dados(self, paciente_id):
+        """
+        {"resumo_texto", "dados": {"evolucao", "distribuicao", "atividades"}, "graficos": {}, "atividades": None}
+        ou None se a API não mandou os agregados (aí vale o caminho dos PNGs).
+        """
+        data = self.db.get_relatorio_dados(paciente_id)
+        if data is None:
+            return None
+        return {
+            "resumo_texto": data.get("resumo_texto"),
+            "dados": {
+                "evolucao": serie_diaria(data.get("humor_diario")),
+                "distribuicao": contagens(data.get("sentimentos")),
+                "atividades": contagens(data.get("atividades"), MAX_ATIVIDADES),
+            },
+            "graficos": {},
+            "atividades": None,
+        }
+
+    def analise(self, paciente_id):
+        """{"resumo_texto": str | None, "graficos": {nome: Bitmap | None}}"""
+        data = self.db.get_relatorio_analise(paciente_id)
+        return {
+            "resumo_texto": data.get("resumo_texto"),
+            "graficos": {nome: imagens.decodificar_png(data.get(campo)) for campo, nome in GRAFICOS_ANALISE.items()},
+        }
+
+    def grafico_atividades(self, paciente_id):
+        return imagens.decodificar_png(self.db.get_grafico_atividades(paciente_id))
+
+    # --- CACHE EM DISCO ---
+    def do_cache(self, paciente_id):
+        """(versao, relatorio) guardado no aparelho, ou None."""
+        if self.cache is None:
+            return None
+        return self.cache.get(paciente_id)
+
+    def versao_atual(self, paciente_id):
+        """(True, versao) ou (False, None) se não deu para consultar o servidor."""
+        return self.db.get_versao_diario(paciente_id)
+
+    def guardar(self, paciente_id, versao, relatorio):
+        if self.cache is not None:
+            self.cache.put(paciente_id, versao, relatorio)
+
+
+# --- AGREGADOS -> SÉRIES DOS GRÁFICOS ---
+def serie_diaria(itens):
+    """
+    [[data, media], ...] ou [{"data", "media"}, ...] da API -> [(dia, media), ...]
+    em ordem de data (dia = datas.dia). Itens sem data ou sem valor são ignorados.
+    """
+    serie = []
+    for item in itens or ():
+        if isinstance(item, dict):
+            data, media = item.get("data"), item.get("media")
+        else:
+            data, media = item[0], item[1]
+        d = datas.dia(data)
+        if d is None or media is None:
+            continue
+        serie.append((d, float(media)))
+    serie.sort()
+    return serie
+
+
+def contagens(itens, limite=None):
+    """{rotulo: n} ou [[rotulo, n], ...] -> [(rotulo, n), ...] do maior para o menor."""
+    if isinstance(itens, dict):
+        itens = itens.items()
+    pares = [(str(rotulo), int(n)) for rotulo, n in itens or () if n]
+    pares.sort(key=lambda p: -p[1])
+    return pares[:limite] if limite else pares
@@ -0,0 +1,84 @@
+import threading
+import time
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.finished_at = None
+
+
+class SingleFlight:
+    """
+    Agrupa chamadas idênticas em andamento numa só.
+
+    Se duas threads pedem a mesma chave ao mesmo tempo, só a primeira executa
+    a função; a outra espera e recebe o mesmo resultado (ou a mesma exceção).
+    O resultado ainda fica disponível por 'linger' segundos, cobrindo chamadas
+    quase simultâneas (ex: get_patient_count seguido de get_next_appointment).
+
+    Atenção: o resultado é compartilhado entre os chamadores, não modifique.
+
+    esperar(evento) é como as outras threads aguardam o resultado
+    (padrão: evento.wait()).
+    """
+
+    def __init__(self, linger=1.0, esperar=None):
+        self.linger = linger
+        self._esperar = esperar or (lambda evento: evento.wait())
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._proxima_limpeza = 0.0
+
+    def do(self, key, func):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None and call.done.is_set() and not self._is_fresh(call):
+                call = None
+            owner = call is None
+            if owner:
+                self._limpar()
+                call = _Call()
+                self._calls[key] = call
+
+        if owner:
+            try:
+                call.result = func()
+            except Exception as e:
+                call.error = e
+            finally:
+                call.finished_at = time.monotonic()
+                call.done.set()
+                with self._lock:
+                    # Erros não ficam guardados: a próxima chamada tenta de novo
+                    if call.error is not None and self._calls.get(key) is call:
+                        del self._calls[key]
+        else:
+            self._esperar(call.done)
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def _limpar(self):
+        """Tira as chamadas terminadas que já passaram do linger (no máximo uma vez por linger)."""
+        agora = time.monotonic()
+        if agora < self._proxima_limpeza:
+            return
+        self._proxima_limpeza = agora + self.linger
+        vencidas = [k for k, c in self._calls.items() if c.done.is_set() and not self._is_fresh(c)]
+        for k in vencidas:
+            del self._calls[k]
+
+    def _is_fresh(self, call):
+        return call.finished_at is not None and time.monotonic() - call.finished_at < self.linger
+
+    def forget(self):
+        """
+        Descarta tudo o que foi guardado. Chamadas em andamento terminam para
+        quem já estava esperando, mas novas chamadas vão buscar de novo.
+        """
+        with self._lock:
+            self._calls = {}
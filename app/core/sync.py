@@ -0,0 +1,166 @@
+import json
+
+
+def _notificacao_para_linha(n):
+    return (n["id"], json.dumps(n))
+
+
+def _linha_para_notificacao(row):
+    return json.loads(row[1])
+
+
+# Recursos espelhados no LocalStore.
+# path: rota da API (formatada com o escopo); key: campo da lista no JSON;
+# to_row/from_row: conversão entre o formato da API e a linha (id, *colunas).
+RESOURCES = {
+    "diario": {
+        "table": "diario",
+        "path": "/diario/historico/{0}",
+        "key": "historico",
+        "to_row": tuple,
+        "from_row": tuple,
+    },
+    "anotacoes": {
+        "table": "anotacoes",
+        "path": "/consultas/{0}/{1}",
+        "key": "anotacoes",
+        "to_row": tuple,
+        "from_row": tuple,
+    },
+    "agenda": {
+        "table": "agenda",
+        "path": "/agenda/psicologo/{0}",
+        "key": "agenda",
+        "to_row": tuple,
+        "from_row": tuple,
+    },
+    "notificacoes": {
+        "table": "notificacoes",
+        "path": "/notificacoes/{0}",
+        "key": "notificacoes",
+        "to_row": _notificacao_para_linha,
+        "from_row": _linha_para_notificacao,
+    },
+}
+
+
+class SyncEngine:
+    """
+    Mantém o LocalStore em dia com a API buscando só o que mudou.
+
+    Cada sync envia ?since=<watermark> guardado. Contrato com a API:
+    - resposta com "delta": true  -> só as linhas alteradas; "deleted" traz ids removidos;
+    - resposta sem "delta"        -> lista completa (servidor ignorou o since);
+    - "watermark" (opcional)      -> valor a enviar no próximo sync.
+    O watermark é sempre o que o servidor mandou (id ou instante de gravação
+    dele). Sem watermark, o próximo sync pede a lista completa: deduzir um
+    valor das linhas (ex: a maior data_hora) perderia entradas gravadas depois
+    com data anterior, como as que chegam atrasadas da outbox de outro aparelho.
+    """
+
+    def __init__(self, db, store):
+        self.db = db
+        self.store = store
+
+    @staticmethod
+    def recurso_id(nome, scope):
+        return ":".join([nome] + [str(s) for s in scope])
+
+    def local(self, nome, *scope):
+        """Linhas guardadas no aparelho, no mesmo formato que a API devolve."""
+        spec = RESOURCES[nome]
+        return [spec["from_row"](r) for r in self.store.select(spec["table"], scope)]
+
+    def pagina(self, nome, *scope, limite=30, cursor=None):
+        """Uma página das linhas locais: (linhas, proximo_cursor). Ver LocalStore.select_page."""
+        spec = RESOURCES[nome]
+        rows, proximo = self.store.select_page(spec["table"], scope, limite, cursor)
+        return [spec["from_row"](r) for r in rows], proximo
+
+    def semear(self, nome, *scope, rows=()):
+        """
+        Guarda linhas avulsas (ex: a primeira página vinda da API) sem mexer no watermark,
+        para a tela aparecer antes do primeiro sync completo terminar.
+        """
+        spec = RESOURCES[nome]
+        return self.store.upsert(spec["table"], scope, [spec["to_row"](x) for x in rows])
+
+    def sync(self, nome, *scope):
+        """
+        Busca as alterações e aplica no LocalStore.
+        Retorna quantas linhas mudaram, ou None se a API falhou.
+        """
+        spec = RESOURCES[nome]
+        recurso = self.recurso_id(nome, scope)
+        since = self.store.get_watermark(recurso)
+
+        ok, payload = self.db.get_alteracoes(spec["path"].format(*scope), since)
+        if not ok:
+            return None
+
+        rows = [spec["to_row"](x) for x in payload.get(spec["key"], [])]
+
+        with self.store.transaction():
+            if payload.get("delta") is True:
+                changed = self.store.upsert(spec["table"], scope, rows)
+                changed += self.store.delete_ids(spec["table"], payload.get("deleted", []))
+            else:
+                changed = self.store.replace_scope(spec["table"], scope, rows)
+
+            self.store.set_watermark(recurso, payload.get("watermark"))
+
+        return changed
+
+    # --- ATALHOS USADOS PELAS TELAS ---
+    def psicologo_do_paciente(self, paciente_id):
+        """Último psicólogo conhecido do paciente (para pintar a agenda sem rede)."""
+        return self.store.get_meta(f"psicologo:{paciente_id}")
+
+    def lembrar_psicologo(self, paciente_id, psicologo_id):
+        self.store.set_meta(f"psicologo:{paciente_id}", psicologo_id)
+
+    # --- DIÁRIO POR PÁGINAS ---
+    # Sem watermark do servidor, um sync do diário baixaria o histórico inteiro.
+    # Nesse caso o aparelho vai recebendo o histórico aos poucos, pelas páginas
+    # da API (cursor "before"), e guarda o cursor da página mais antiga já buscada.
+    def atualizar_diario(self, paciente_id, limite=30):
+        """
+        Deixa o topo do diário em dia: sync delta se o servidor já mandou um
+        watermark (o aparelho tem o histórico todo); senão, só a primeira página.
+        Retorna quantas linhas mudaram, ou None se a API falhou.
+        """
+        if self.store.get_watermark(self.recurso_id("diario", (paciente_id,))) is not None:
+            return self.sync("diario", paciente_id)
+
+        ok, linhas, proximo = self.db.get_entradas_historico_pagina(paciente_id, limite)
+        if not ok:
+            return None
+        chave = f"diario_cursor:{paciente_id}"
+        changed = self.semear("diario", paciente_id, rows=linhas)
+        # Primeira vez, ou a página veio inteira nova (pode haver um buraco até o que já estava aqui)
+        if self.store.get_meta(chave) is None or (linhas and changed == len(linhas)):
+            self.store.set_meta(chave, {"cursor": proximo})
+        return changed
+
+    def cursor_diario(self, paciente_id):
+        """Cursor da próxima página antiga na API; None = o aparelho já tem o histórico todo."""
+        if self.store.get_watermark(self.recurso_id("diario", (paciente_id,))) is not None:
+            return None
+        estado = self.store.get_meta(f"diario_cursor:{paciente_id}")
+        return estado["cursor"] if estado else None
+
+    def diario_anterior(self, paciente_id, limite=30):
+        """
+        Busca na API a página seguinte à mais antiga já buscada e guarda no aparelho.
+        Retorna o novo cursor (None = acabou o histórico), ou False se a API falhou.
+        """
+        cursor = self.cursor_diario(paciente_id)
+        if cursor is None:
+            return None
+        ok, linhas, proximo = self.db.get_entradas_historico_pagina(paciente_id, limite, antes=cursor)
+        if not ok:
+            return False
+        with self.store.transaction():
+            self.semear("diario", paciente_id, rows=linhas)
+            self.store.set_meta(f"diario_cursor:{paciente_id}", {"cursor": proximo})
+        return proximo
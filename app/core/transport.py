@@ -0,0 +1,378 @@
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from app.core import cancelamento, endpoints
+from app.core.inicio import sob_demanda
+
+# requests/urllib3 só são importados na primeira requisição (fora da abertura do app)
+requests = sob_demanda("requests")
+adapters = sob_demanda("requests.adapters")
+retry_urllib3 = sob_demanda("urllib3.util.retry")
+excecoes_urllib3 = sob_demanda("urllib3.exceptions")
+
+# Verbos que podem ser repetidos sem efeito colateral
+IDEMPOTENT_METHODS = frozenset(["GET", "HEAD", "OPTIONS", "PUT", "DELETE"])
+
+# Tamanho dos pedaços lidos entre uma checagem de cancelamento e outra
+CHUNK_CANCELAVEL = 64 * 1024
+
+# Verbos que só leem dados
+SAFE_METHODS = frozenset(["GET", "HEAD", "OPTIONS"])
+
+# Respostas que contam como falha do endereço (disjuntor e troca de endereço)
+STATUS_FALHA = frozenset([502, 503, 504])
+
+
+def _env_float(name, default):
+    try:
+        return float(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_int(name, default):
+    try:
+        return int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+class Transport:
+    """
+    Camada HTTP usada pelo Database.
+    Mantém uma requests.Session por thread (keep-alive), aplica timeouts
+    e repete verbos idempotentes com backoff exponencial + jitter.
+
+    A API pode ter vários endereços (endpoints.resolver): cada requisição vai
+    para o mais rápido entre os que estão de pé, medido por aquecer(). Falhas
+    de conexão e 5xx contam para o disjuntor do endereço e, quando repetir é
+    seguro, a requisição passa para o próximo. Com COGNITIVE_RESERVA_MS, um
+    GET que demora mais que isso é pedido também ao segundo endereço e vale
+    a resposta que chegar primeiro.
+    """
+
+    # Rota pedida na sondagem (qualquer resposta abaixo de 500 conta como de pé)
+    ROTA_SONDA = os.environ.get("COGNITIVE_API_SONDA", "/")
+    # aquecer(recente=True) não sonda se a API respondeu há menos que isso (s)
+    AINDA_QUENTE = 300.0
+
+    def __init__(self, base_url=None, connect_timeout=None, read_timeout=None,
+                 retries=None, backoff=None, pool_size=None, atraso_reserva=None):
+        self.endpoints = endpoints.Endpoints(endpoints.resolver(base_url))
+        self.connect_timeout = connect_timeout if connect_timeout is not None else _env_float("COGNITIVE_CONNECT_TIMEOUT", 5)
+        self.read_timeout = read_timeout if read_timeout is not None else _env_float("COGNITIVE_READ_TIMEOUT", 20)
+        self.retries = retries if retries is not None else _env_int("COGNITIVE_RETRIES", 2)
+        self.backoff = backoff if backoff is not None else _env_float("COGNITIVE_BACKOFF", 0.3)
+        self.pool_size = pool_size if pool_size is not None else _env_int("COGNITIVE_POOL_SIZE", 4)
+        # Segundos até pedir um GET lento também ao segundo endereço (0 = desligado)
+        self.atraso_reserva = atraso_reserva if atraso_reserva is not None else \
+            _env_float("COGNITIVE_RESERVA_MS", 0) / 1000
+
+        self._local = threading.local()
+        self._sessions = []
+        self._lock = threading.Lock()
+        self._reservas = None   # threads dos pedidos de reserva (criadas no primeiro uso)
+        self.ultima_resposta = None  # time.monotonic() da última resposta boa da API
+
+        # Funções chamadas após cada escrita (POST/PUT/DELETE): listener(method, url, response)
+        self.write_listeners = []
+
+    @property
+    def base_url(self):
+        """Endereço que a próxima requisição vai usar."""
+        return self.endpoints.escolher().url
+
+    @property
+    def timeout(self):
+        return (self.connect_timeout, self.read_timeout)
+
+    def url(self, path, endpoint=None):
+        """Junta o endereço da API e a rota sem gerar barras duplicadas."""
+        if path.startswith("http://") or path.startswith("https://"):
+            return path
+        base = endpoint.url if endpoint is not None else self.base_url
+        return f"{base}/{path.lstrip('/')}"
+
+    def rota(self, url):
+        """Rota de uma URL completa, seja qual for o endereço que atendeu."""
+        return self.endpoints.rota(url)
+
+    # --- SESSÕES ---
+    def _build_session(self):
+        retry = retry_urllib3.Retry(
+            total=self.retries,
+            connect=self.retries,
+            read=self.retries,
+            status=self.retries,
+            backoff_factor=self.backoff,
+            backoff_jitter=self.backoff,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=IDEMPOTENT_METHODS,
+            raise_on_status=False,
+            respect_retry_after_header=True,
+        )
+        adapter = adapters.HTTPAdapter(
+            pool_connections=self.pool_size,
+            pool_maxsize=self.pool_size,
+            max_retries=retry,
+        )
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update({"Accept": "application/json"})
+        return session
+
+    @property
+    def session(self):
+        """Session da thread atual (criada na primeira chamada)."""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._build_session()
+            self._local.session = session
+            with self._lock:
+                self._sessions.append(session)
+        return session
+
+    def close(self):
+        """Fecha todas as conexões abertas (ex: no logout ou ao sair do app)."""
+        with self._lock:
+            sessions, self._sessions = self._sessions, []
+        for session in sessions:
+            try:
+                session.close()
+            except Exception:
+                pass
+        self._local = threading.local()
+        with self._lock:
+            reservas, self._reservas = self._reservas, None
+        if reservas is not None:
+            reservas.shutdown(wait=False, cancel_futures=True)
+
+    # --- REQUISIÇÕES ---
+    def request(self, method, path, leitura=False, **kwargs):
+        """leitura=True: POST que só lê (ex: lote de GETs), sem avisar os write_listeners."""
+        method = method.upper()
+        kwargs.setdefault("timeout", self.timeout)
+        token = cancelamento.atual()
+        repetivel = method in IDEMPOTENT_METHODS or "Idempotency-Key" in (kwargs.get("headers") or {})
+        tentados = []
+
+        while True:
+            endpoint = self.endpoints.escolher(excluir=tentados)
+            tentados.append(endpoint)
+            resta_outro = len(tentados) < len(self.endpoints)
+            url = self.url(path, endpoint)
+            try:
+                res, endpoint = self._enviar(token, method, url, endpoint, tentados, dict(kwargs))
+            except cancelamento.Cancelado:
+                raise
+            except requests.RequestException as e:
+                endpoint.falha()
+                # Sem resposta: só repete em outro endereço se não há risco de gravar duas vezes
+                if resta_outro and (repetivel or self._nao_enviada(e)):
+                    print(f"[API] {endpoint.url} falhou ({type(e).__name__}); tentando outro endereço")
+                    continue
+                raise
+
+            if res.status_code in STATUS_FALHA:
+                endpoint.falha()
+                if resta_outro and repetivel:
+                    res.close()
+                    continue
+            else:
+                endpoint.sucesso()
+                self.ultima_resposta = time.monotonic()
+            break
+
+        if method not in SAFE_METHODS and not leitura:
+            for listener in list(self.write_listeners):
+                listener(method, url, res)
+        return res
+
+    def _enviar(self, token, method, url, endpoint, tentados, kwargs):
+        """Uma tentativa num endereço. Retorna (resposta, endereço que respondeu)."""
+        if method == "GET" and self.atraso_reserva > 0 and not kwargs.get("stream"):
+            reserva = self.endpoints.escolher(excluir=tentados)
+            if reserva not in tentados and reserva.disponivel:
+                return self._get_com_reserva(token, endpoint, url, reserva, kwargs)
+        if token is None:
+            return self.session.request(method, url, **kwargs), endpoint
+        return self._request_cancelavel(token, method, url, kwargs), endpoint
+
+    @staticmethod
+    def _nao_enviada(erro):
+        """A conexão nem chegou a abrir (o servidor não recebeu nada)."""
+        if isinstance(erro, requests.exceptions.ConnectTimeout):
+            return True
+        motivo = getattr(erro.args[0], "reason", None) if erro.args else None
+        return isinstance(motivo, excecoes_urllib3.NewConnectionError)
+
+    # --- PEDIDO DE RESERVA (hedged request) ---
+    def _get_com_reserva(self, token, principal, url, reserva, kwargs):
+        """
+        GET no endereço principal; se não responder em atraso_reserva, o mesmo
+        GET vai também para a reserva e fica a primeira resposta boa. As duas
+        correm em threads próprias (a espera pelo cabeçalho não pode ser
+        interrompida de fora), e quem perde tem a conexão derrubada assim que
+        começa a baixar o corpo.
+        """
+        executor = self._executor_reservas()
+        mudou = threading.Event()
+        corridas = {}
+
+        def correr(endpoint, endereco):
+            corrida = corridas[endpoint] = cancelamento.Token()
+            futuro = executor.submit(self._request_cancelavel, corrida, "GET", endereco, dict(kwargs))
+            futuro.add_done_callback(lambda f: mudou.set())
+            return futuro
+
+        def desistir():
+            for corrida in list(corridas.values()):
+                corrida.cancelar()
+            mudou.set()
+
+        try:
+            if token is not None:
+                token.acompanhar(desistir)
+            futuros = {principal: correr(principal, url)}
+            limite = time.monotonic() + self.atraso_reserva
+            while True:
+                if token is not None:
+                    token.verificar()
+                for endpoint, futuro in list(futuros.items()):
+                    if not futuro.done():
+                        continue
+                    erro = futuro.exception()
+                    res = None if erro is not None else futuro.result()
+                    if res is not None and res.status_code not in STATUS_FALHA:
+                        # Chegou primeiro: a outra corrida é derrubada
+                        for outro, corrida in corridas.items():
+                            if outro is not endpoint:
+                                corrida.cancelar()
+                        return res, endpoint
+                    if len(futuros) == 1 and reserva not in futuros:
+                        # O principal falhou antes da hora da reserva: quem decide é request()
+                        if erro is not None:
+                            raise erro
+                        return res, endpoint
+                    del futuros[endpoint]
+                    if not futuros:
+                        # As duas falharam: a última vai para request() (disjuntor e troca de endereço)
+                        if erro is not None:
+                            raise erro
+                        return res, endpoint
+                    if not isinstance(erro, cancelamento.Cancelado):
+                        endpoint.falha()
+                    if res is not None:
+                        res.close()
+                if reserva not in corridas and time.monotonic() >= limite:
+                    futuros[reserva] = correr(reserva, self.url(self.rota(url), reserva))
+                mudou.clear()
+                espera = None if reserva in corridas else max(0.0, limite - time.monotonic())
+                if not any(f.done() for f in futuros.values()):
+                    mudou.wait(espera)
+        finally:
+            if token is not None:
+                token.soltar(desistir)
+
+    def _executor_reservas(self):
+        with self._lock:
+            if self._reservas is None:
+                # Duas corridas por worker do pool do app
+                self._reservas = ThreadPoolExecutor(max_workers=2 * self.pool_size,
+                                                    thread_name_prefix="cognitive-reserva")
+            return self._reservas
+
+    # --- AQUECIMENTO ---
+    def sondar(self, endpoint):
+        """
+        Acorda o endereço (a primeira requisição paga a partida a frio do
+        serverless e o TLS) e mede a latência numa segunda, já quente.
+        """
+        url = self.url(self.ROTA_SONDA, endpoint)
+        try:
+            for _ in range(2):
+                inicio = time.monotonic()
+                res = self.session.get(url, timeout=self.timeout)
+                res.close()
+                if res.status_code in STATUS_FALHA:
+                    raise requests.HTTPError(f"status {res.status_code}")
+            latencia = time.monotonic() - inicio
+        except requests.RequestException as e:
+            print(f"[API] {endpoint.url} não respondeu à sondagem: {e}")
+            endpoint.abrir()
+            return None
+        endpoint.sucesso(latencia)
+        self.ultima_resposta = time.monotonic()
+        print(f"[API] {endpoint.url}: {latencia * 1000:.0f} ms")
+        return latencia
+
+    def aquecer(self, executor=None, recente=False):
+        """
+        Sonda todos os endereços em paralelo (executor.submit, ex: uma fila do
+        pool do app; sem executor, uma thread por endereço). Retorna os futures.
+        recente=True: não faz nada se a API respondeu há menos de AINDA_QUENTE
+        segundos (ex: ao voltar de uma pausa curta, ela ainda está acordada).
+        """
+        if recente and self.ultima_resposta is not None and \
+                time.monotonic() - self.ultima_resposta < self.AINDA_QUENTE:
+            return []
+        if executor is None:
+            executor = ThreadPoolExecutor(max_workers=len(self.endpoints), thread_name_prefix="cognitive-sonda")
+            futures = [executor.submit(self.sondar, e) for e in self.endpoints]
+            executor.shutdown(wait=False)
+            return futures
+        return [executor.submit(self.sondar, e) for e in self.endpoints]
+
+    def _request_cancelavel(self, token, method, url, kwargs):
+        """
+        Requisição feita em nome de uma tela (cancelamento.Token): não sai se
+        a tela já desistiu, e o corpo é baixado em pedaços para que cancelar()
+        feche a conexão no meio do download.
+        """
+        token.verificar()
+        stream = kwargs.pop("stream", False)
+        res = self.session.request(method, url, stream=True, **kwargs)
+        abortar = lambda: self._abortar(res)
+        token.acompanhar(abortar)
+        try:
+            if not stream:
+                partes = []
+                for parte in res.iter_content(CHUNK_CANCELAVEL):
+                    token.verificar()
+                    partes.append(parte)
+                res._content = b"".join(partes)
+        except Exception:
+            res.close()
+            if token.cancelado:
+                raise cancelamento.Cancelado()
+            raise
+        finally:
+            token.soltar(abortar)
+        return res
+
+    @staticmethod
+    def _abortar(res):
+        # close() sozinho não acorda a thread parada no recv: shutdown derruba a conexão na hora
+        conexao = getattr(res.raw, "_connection", None)
+        sock = getattr(conexao, "sock", None)
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        res.close()
+
+    def get(self, path, **kwargs):
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request("POST", path, **kwargs)
+
+    def put(self, path, **kwargs):
+        return self.request("PUT", path, **kwargs)
+
+    def delete(self, path, **kwargs):
+        return self.request("DELETE", path, **kwargs)
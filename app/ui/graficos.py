@@ -0,0 +1,338 @@
+# app/ui/graficos.py
+import numpy as np
+
+from kivy.uix.widget import Widget
+from kivy.properties import (
+    StringProperty,
+    ColorProperty,
+    ObjectProperty,
+    BooleanProperty,
+    NumericProperty,
+    ListProperty,
+)
+from kivy.graphics import Color, Line, Rectangle, Ellipse
+from kivy.core.text import Label as CoreLabel
+from kivy.metrics import dp, sp
+from kivy.clock import Clock
+from kivy.utils import get_color_from_hex
+
+from app.core import amostragem, datas
+
+# Cores das barras (repetem se houver mais itens)
+PALETA = [get_color_from_hex(c) for c in (
+    "#92C7A3", "#4CAF50", "#FF9800", "#F44336", "#9E9E9E", "#5C9DD6",
+    "#AB7AC6", "#E0C14F", "#6FB8B0", "#D67A9C", "#8D8D5C",
+)]
+
+
+class Grafico(Widget):
+    """
+    Base dos gráficos do relatório, desenhados no canvas a partir dos dados
+    agregados: tudo sai no tamanho real do widget, sem imagem para baixar.
+
+    dados: lista de pares (formato de cada subclasse); [] mostra 'vazio'.
+    imagem: textura usada quando não há dados (PNG da API antiga).
+    Tocar no gráfico seleciona o item mais próximo e mostra o valor dele.
+    """
+    titulo = StringProperty()
+    dados = ObjectProperty(None, allownone=True)
+    imagem = ObjectProperty(None, allownone=True)
+    selecionado = ObjectProperty(None, allownone=True)
+    vazio = StringProperty("Sem registros no período.")
+    cor = ColorProperty(get_color_from_hex("#92C7A3"))
+    cor_texto = ColorProperty([0.3, 0.3, 0.3, 1])
+    cor_grade = ColorProperty([0, 0, 0, 0.08])
+    tamanho_fonte = NumericProperty(sp(11))
+
+    MAX_TEXTOS = 256
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._textos = {}
+        self._area = None
+        self._redesenhar = Clock.create_trigger(self._desenhar)
+        self.bind(pos=self._redesenhar, size=self._redesenhar, imagem=self._redesenhar,
+                  selecionado=self._redesenhar, titulo=self._redesenhar)
+
+    def on_dados(self, *args):
+        self.selecionado = None
+        self._redesenhar()
+
+    def limpar(self):
+        self.dados = None
+        self.imagem = None
+
+    # --- DESENHO ---
+    def _desenhar(self, *args):
+        self.canvas.clear()
+        x, y, w, h = self.x, self.y, self.width, self.height
+        with self.canvas:
+            if self.titulo:
+                tex = self.texto(self.titulo, self.tamanho_fonte * 1.2)
+                Color(1, 1, 1, 1)
+                Rectangle(texture=tex, size=tex.size, pos=(x, y + h - tex.height))
+                h -= tex.height + dp(6)
+            self._area = (x, y, w, h)
+
+            if self.dados:
+                self.desenhar(x, y, w, h)
+                if self.selecionado is not None:
+                    self.desenhar_selecao(x, y, w, h, self.selecionado)
+            elif self.imagem is not None:
+                self._desenhar_imagem(x, y, w, h)
+            elif self.dados is not None:
+                self.escrever(self.vazio, x + w / 2, y + h / 2, centro=True)
+
+    def _desenhar_imagem(self, x, y, w, h):
+        # Mesmo comportamento do Image com keep_ratio
+        iw, ih = self.imagem.size
+        escala = min(w / iw, h / ih) if iw and ih else 0
+        dw, dh = iw * escala, ih * escala
+        Color(1, 1, 1, 1)
+        Rectangle(texture=self.imagem, size=(dw, dh), pos=(x + (w - dw) / 2, y + (h - dh) / 2))
+
+    def desenhar(self, x, y, w, h):
+        raise NotImplementedError
+
+    def desenhar_selecao(self, x, y, w, h, indice):
+        pass
+
+    def indice_em(self, tx, ty):
+        """Índice do item sob o toque (ou None)."""
+        return None
+
+    # --- TEXTO ---
+    def texto(self, texto, tamanho=None, cor=None):
+        """Textura do texto; fica em cache porque o redesenho acontece a cada resize."""
+        tamanho = tamanho or self.tamanho_fonte
+        cor = tuple(cor or self.cor_texto)
+        chave = (texto, tamanho, cor)
+        tex = self._textos.get(chave)
+        if tex is None:
+            if len(self._textos) >= self.MAX_TEXTOS:
+                self._textos.clear()
+            rotulo = CoreLabel(text=texto, font_size=tamanho, color=cor)
+            rotulo.refresh()
+            tex = self._textos[chave] = rotulo.texture
+        return tex
+
+    def escrever(self, texto, x, y, centro=False, direita=False, cor=None):
+        """Escreve com (x, y) no canto esquerdo, no centro ou no canto direito do texto (meio da altura)."""
+        tex = self.texto(texto, cor=cor)
+        if centro:
+            x -= tex.width / 2
+        elif direita:
+            x -= tex.width
+        Color(1, 1, 1, 1)
+        Rectangle(texture=tex, size=tex.size, pos=(x, y - tex.height / 2))
+        return tex.size
+
+    def balao(self, texto, x, y):
+        """Caixa com o valor selecionado, mantida dentro do widget."""
+        tex = self.texto(texto, cor=(1, 1, 1, 1))
+        pad = dp(4)
+        w, h = tex.width + 2 * pad, tex.height + 2 * pad
+        x = min(max(self.x, x - w / 2), self.right - w)
+        y = min(y + dp(8), self.top - h)
+        Color(0.2, 0.2, 0.2, 0.85)
+        Rectangle(pos=(x, y), size=(w, h))
+        Color(1, 1, 1, 1)
+        Rectangle(texture=tex, size=tex.size, pos=(x + pad, y + pad))
+
+    # --- TOQUE ---
+    def on_touch_down(self, touch):
+        if self.dados and self._area and self.collide_point(*touch.pos):
+            indice = self.indice_em(*touch.pos)
+            self.selecionado = None if indice == self.selecionado else indice
+        return super().on_touch_down(touch)
+
+
+class GraficoEvolucao(Grafico):
+    """
+    Linha do humor médio por dia. dados = [(dia, valor), ...] em ordem de dia
+    (dia como em datas.dia). minimo/maximo fixam o eixo Y; sem eles, ajusta aos dados.
+
+    Com muito mais dias que pixels, só os pontos de amostragem.reduzir (um por
+    pixel, picos preservados) são desenhados; o custo do desenho não cresce com o histórico.
+    """
+    minimo = ObjectProperty(None, allownone=True)
+    maximo = ObjectProperty(None, allownone=True)
+    linhas_grade = NumericProperty(4)
+    formato_data = StringProperty("%d/%m/%y")
+
+    def __init__(self, **kwargs):
+        self._x = self._y = None
+        self._visiveis = None
+        super().__init__(**kwargs)
+
+    def on_dados(self, *args):
+        if self.dados:
+            serie = np.asarray(self.dados, dtype=float).reshape(-1, 2)
+            self._x, self._y = serie[:, 0], serie[:, 1]
+        else:
+            self._x = self._y = None
+        self._visiveis = None
+        super().on_dados(*args)
+
+    def visiveis(self, largura):
+        """(dias, valores) a desenhar (ver amostragem.reduzir); guardado até a largura mudar."""
+        n = max(2, int(largura))
+        if self._visiveis is None or self._visiveis[0] != n:
+            idx = amostragem.reduzir(self._x, self._y, n)
+            self._visiveis = (n, self._x[idx], self._y[idx])
+        return self._visiveis[1], self._visiveis[2]
+
+    def _escala(self, x, y, w, h):
+        margem_y = dp(30)   # rótulos do eixo Y
+        margem_x = dp(18)   # datas embaixo
+        px, py, pw, ph = x + margem_y, y + margem_x, max(1, w - margem_y - dp(6)), max(1, h - margem_x - dp(6))
+
+        x0, x1 = float(self._x[0]), float(self._x[-1])
+        y0 = self.minimo if self.minimo is not None else float(self._y.min())
+        y1 = self.maximo if self.maximo is not None else float(self._y.max())
+        if y1 == y0:
+            y0, y1 = y0 - 1, y1 + 1
+        sx = pw / (x1 - x0) if x1 != x0 else 0
+        sy = ph / (y1 - y0)
+        return (px, py, pw, ph), (x0, y0, y1), (sx, sy)
+
+    def desenhar(self, x, y, w, h):
+        (px, py, pw, ph), (x0, y0, y1), (sx, sy) = self._escala(x, y, w, h)
+
+        # Grade + rótulos do eixo Y
+        passos = max(1, int(self.linhas_grade))
+        for i in range(passos + 1):
+            valor = y0 + (y1 - y0) * i / passos
+            gy = py + ph * i / passos
+            Color(*self.cor_grade)
+            Line(points=[px, gy, px + pw, gy], width=1)
+            self.escrever(f"{valor:.1f}", px - dp(4), gy, direita=True)
+
+        # Datas da primeira e da última entrada
+        d0, d1 = int(self._x[0]), int(self._x[-1])
+        self.escrever(self._data(d0), px, y + dp(8))
+        if d1 != d0:
+            self.escrever(self._data(d1), px + pw, y + dp(8), direita=True)
+
+        dias, valores = self.visiveis(pw)
+        xs = px + (dias - x0) * sx if sx else np.full(len(dias), px + pw / 2)
+        ys = py + (valores - y0) * sy
+        pontos = np.column_stack((xs, ys)).ravel().tolist()
+
+        Color(*self.cor)
+        if len(pontos) >= 4:
+            Line(points=pontos, width=dp(1.5), joint="round")
+        # Bolinhas só quando há espaço para vê-las
+        if len(dias) <= pw / dp(8):
+            r = dp(3)
+            for i in range(0, len(pontos), 2):
+                Ellipse(pos=(pontos[i] - r, pontos[i + 1] - r), size=(2 * r, 2 * r))
+
+    def desenhar_selecao(self, x, y, w, h, indice):
+        (px, py, pw, ph), (x0, y0, _), (sx, sy) = self._escala(x, y, w, h)
+        dias, valores = self.visiveis(pw)
+        if indice >= len(dias):
+            return
+        d, v = float(dias[indice]), float(valores[indice])
+        cx = px + (d - x0) * sx if sx else px + pw / 2
+        cy = py + (v - y0) * sy
+        Color(*self.cor_texto[:3], 0.4)
+        Line(points=[cx, py, cx, py + ph], width=1)
+        Color(*self.cor)
+        r = dp(5)
+        Ellipse(pos=(cx - r, cy - r), size=(2 * r, 2 * r))
+        self.balao(f"{self._data(int(d))}: {v:.1f}", cx, cy)
+
+    def indice_em(self, tx, ty):
+        (px, _, pw, _), (x0, _, _), (sx, _) = self._escala(*self._area)
+        if not sx:
+            return 0
+        alvo = x0 + (tx - px) / sx
+        dias, _ = self.visiveis(pw)
+        i = int(np.searchsorted(dias, alvo))
+        if i == len(dias) or (i > 0 and alvo - dias[i - 1] < dias[i] - alvo):
+            i -= 1
+        return max(0, i)
+
+    def _data(self, dia):
+        return datas.formatar(dia * 86400, self.formato_data, local=False)
+
+
+class GraficoBarras(Grafico):
+    """
+    Barras de contagem. dados = [(rotulo, valor), ...] na ordem em que devem aparecer.
+    horizontal=True põe o rótulo à esquerda de cada barra (bom para nomes longos).
+    """
+    horizontal = BooleanProperty(False)
+    cores = ListProperty(PALETA)
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.bind(horizontal=self._redesenhar, cores=self._redesenhar)
+
+    def _cor(self, i):
+        return self.cores[i % len(self.cores)] if self.cores else self.cor
+
+    def _faixas(self, x, y, w, h):
+        """(posição, espessura) de cada barra no eixo das categorias."""
+        n = len(self.dados)
+        if self.horizontal:
+            faixa = h / n
+            return [(y + h - (i + 1) * faixa, faixa) for i in range(n)]
+        faixa = w / n
+        return [(x + i * faixa, faixa) for i in range(n)]
+
+    def desenhar(self, x, y, w, h):
+        maior = max(v for _, v in self.dados) or 1
+        faixas = self._faixas(x, y, w, h)
+        if self.horizontal:
+            rotulo_w = w * 0.35
+            valor_w = dp(28)
+            comp = max(1, w - rotulo_w - valor_w)
+            for i, ((rotulo, valor), (pos, esp)) in enumerate(zip(self.dados, faixas)):
+                meio = pos + esp / 2
+                barra = max(dp(2), comp * valor / maior)
+                self.escrever(self._cortar(rotulo, rotulo_w - dp(6)), x, meio)
+                Color(*self._cor(i))
+                Rectangle(pos=(x + rotulo_w, meio - esp * 0.35), size=(barra, esp * 0.7))
+                self.escrever(str(valor), x + rotulo_w + barra + dp(4), meio)
+        else:
+            base = y + dp(18)
+            alto = max(1, h - dp(18) - dp(16))
+            for i, ((rotulo, valor), (pos, esp)) in enumerate(zip(self.dados, faixas)):
+                meio = pos + esp / 2
+                barra = max(dp(2), alto * valor / maior)
+                Color(*self._cor(i))
+                Rectangle(pos=(pos + esp * 0.15, base), size=(esp * 0.7, barra))
+                self.escrever(str(valor), meio, base + barra + dp(8), centro=True)
+                self.escrever(self._cortar(rotulo, esp - dp(2)), meio, y + dp(8), centro=True)
+
+    def desenhar_selecao(self, x, y, w, h, indice):
+        rotulo, valor = self.dados[indice]
+        total = sum(v for _, v in self.dados) or 1
+        pos, esp = self._faixas(x, y, w, h)[indice]
+        if self.horizontal:
+            cx, cy = x + w / 2, pos + esp / 2
+        else:
+            cx, cy = pos + esp / 2, y + h / 2
+        self.balao(f"{rotulo}: {valor} ({100 * valor / total:.0f}%)", cx, cy)
+
+    def indice_em(self, tx, ty):
+        for i, (pos, esp) in enumerate(self._faixas(*self._area)):
+            if pos <= (ty if self.horizontal else tx) < pos + esp:
+                return i
+        return None
+
+    def _cortar(self, texto, largura):
+        """Encurta o rótulo com '…' até caber na largura (mede sem criar textura)."""
+        medir = CoreLabel(font_size=self.tamanho_fonte).get_extents
+        if medir(texto)[0] <= largura:
+            return texto
+        lo, hi = 0, len(texto)
+        while lo < hi:
+            meio = (lo + hi + 1) // 2
+            if medir(texto[:meio] + "…")[0] <= largura:
+                lo = meio
+            else:
+                hi = meio - 1
+        return texto[:lo] + "…"
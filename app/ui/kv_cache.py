@@ -0,0 +1,203 @@
+import copyreg
+import hashlib
+import hmac
+import importlib.util
+import io
+import marshal
+import os
+import pickle
+import types
+
+import kivy
+from kivy.lang import builder as _builder
+from kivy.lang.parser import Parser
+
+from app.core.inicio import perfil
+
+# Muda quando o formato gravado muda (os arquivos antigos passam a ser ignorados)
+FORMATO = 2
+# Nome do App (CognitiveApp -> "cognitive"): define a pasta de dados dele
+NOME_APP = "cognitive"
+
+
+def _reduzir_codigo(codigo):
+    # As expressões do .kv já vêm compiladas; pickle não sabe gravar código, marshal sabe
+    return marshal.loads, (marshal.dumps(codigo),)
+
+
+class CacheKV:
+    """
+    Guarda em disco as regras do .kv já interpretadas (o Parser do Kivy, com as
+    expressões compiladas), com a chave sendo o hash do conteúdo do arquivo.
+    Nas próximas aberturas o Builder recebe o Parser pronto: o texto não é
+    tokenizado nem compilado de novo. Mudou o .kv (ou a versão do Kivy/Python),
+    muda a chave e o arquivo é interpretado e gravado outra vez.
+
+    Vale para Builder.load_file e Builder.load_string (os .kv das telas, o
+    styles.kv, o lista.kv e as regras embutidas do KivyMD).
+
+    Carregar um pickle executa código: cada arquivo leva um HMAC-SHA256 feito
+    com uma chave aleatória do aparelho (guardada na mesma pasta privada) e só
+    é carregado se a assinatura confere. Qualquer problema ao ler = interpreta o .kv.
+    """
+
+    def __init__(self, pasta):
+        self.pasta = pasta
+        self.acertos = 0
+        self.erros = 0
+        self._ativo = False
+        self._chave = None
+        # O hash também depende das versões: o marshal muda entre versões do Python
+        self._versao = f"{FORMATO}|{kivy.__version__}|{importlib.util.MAGIC_NUMBER.hex()}".encode()
+
+    def ativar(self):
+        """Passa a interceptar a criação do Parser dentro do Builder."""
+        if self._ativo:
+            return
+        try:
+            os.makedirs(self.pasta, exist_ok=True)
+            self._chave = self._carregar_chave()
+        except OSError as e:
+            print(f"[KV] Cache de regras desligado ({self.pasta}): {e}")
+            return
+        self._ativo = True
+        _builder.Parser = self.parser
+
+    def desativar(self):
+        self._ativo = False
+        _builder.Parser = Parser
+
+    # --- PARSER ---
+    def parser(self, content, filename=None, **kwargs):
+        chave = hashlib.sha1(self._versao + content.encode("utf-8")).hexdigest()
+        prefixo = self._prefixo(filename)
+        arquivo = os.path.join(self.pasta, f"{prefixo}-{chave}.kvc")
+
+        parser = self._ler(arquivo)
+        if parser is not None:
+            self.acertos += 1
+            parser.filename = filename
+            # Diretivas (#:import, #:set, #:include) mexem no estado global: rodam sempre
+            parser.execute_directives()
+            return parser
+
+        self.erros += 1
+        with perfil.trecho(f"kv parse {prefixo}"):
+            parser = Parser(content=content, filename=filename, **kwargs)
+        self._gravar(arquivo, parser, prefixo if filename else None)
+        return parser
+
+    @staticmethod
+    def _prefixo(filename):
+        if not filename:
+            return "string"
+        return os.path.basename(filename).replace(".", "_")
+
+    def _carregar_chave(self):
+        """Chave do HMAC: criada uma vez por instalação, legível só pelo app."""
+        caminho = os.path.join(self.pasta, "chave")
+        try:
+            with open(caminho, "rb") as f:
+                chave = f.read()
+            if len(chave) == 32:
+                return chave
+        except FileNotFoundError:
+            pass
+        chave = os.urandom(32)
+        temporario = f"{caminho}.{os.getpid()}.tmp"
+        fd = os.open(temporario, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(chave)
+        os.replace(temporario, caminho)
+        # Arquivos assinados com a chave anterior não servem mais
+        self._remover_antigos(None, None)
+        return chave
+
+    def _assinatura(self, dados):
+        if self._chave is None:
+            self._chave = self._carregar_chave()
+        return hmac.new(self._chave, dados, hashlib.sha256).digest()
+
+    def _ler(self, arquivo):
+        try:
+            with open(arquivo, "rb") as f:
+                conteudo = f.read()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            print(f"[KV] Cache ilegível em {os.path.basename(arquivo)}: {e}")
+            return None
+
+        assinatura, dados = conteudo[:32], conteudo[32:]
+        try:
+            valido = hmac.compare_digest(assinatura, self._assinatura(dados))
+        except OSError as e:
+            print(f"[KV] Sem chave para conferir o cache: {e}")
+            return None
+        if not valido:
+            # Truncado, de outra chave ou alterado: não carrega, interpreta de novo e regrava
+            print(f"[KV] Cache com assinatura inválida em {os.path.basename(arquivo)}")
+            return None
+        try:
+            return pickle.loads(dados)
+        except Exception as e:
+            print(f"[KV] Cache inválido em {os.path.basename(arquivo)}: {e}")
+            return None
+
+    def _gravar(self, arquivo, parser, prefixo_antigos):
+        temporario = f"{arquivo}.{os.getpid()}.tmp"
+        try:
+            buffer = io.BytesIO()
+            pickler = pickle.Pickler(buffer, protocol=pickle.HIGHEST_PROTOCOL)
+            pickler.dispatch_table = copyreg.dispatch_table.copy()
+            pickler.dispatch_table[types.CodeType] = _reduzir_codigo
+            pickler.dump(parser)
+            dados = buffer.getvalue()
+            with open(temporario, "wb") as f:
+                f.write(self._assinatura(dados) + dados)
+            os.replace(temporario, arquivo)
+        except Exception as e:
+            print(f"[KV] Não foi possível guardar {os.path.basename(arquivo)}: {e}")
+            try:
+                os.remove(temporario)
+            except OSError:
+                pass
+            return
+        # Versões anteriores do mesmo .kv não servem mais
+        if prefixo_antigos:
+            self._remover_antigos(prefixo_antigos, os.path.basename(arquivo))
+
+    def _remover_antigos(self, prefixo, atual):
+        """Apaga os .kvc do prefixo (None = todos), menos o atual."""
+        try:
+            nomes = os.listdir(self.pasta)
+        except OSError:
+            return
+        for nome in nomes:
+            if (prefixo is None or nome.startswith(prefixo + "-")) and nome.endswith(".kvc") and nome != atual:
+                try:
+                    os.remove(os.path.join(self.pasta, nome))
+                except OSError:
+                    pass
+
+
+def pasta_padrao():
+    """
+    Dentro da pasta de dados do app (a mesma de App.user_data_dir: privada no
+    Android), calculada antes de o App existir, pois o KivyMD carrega regras no import.
+    """
+    if os.environ.get("COGNITIVE_CACHE_KV"):
+        return os.environ["COGNITIVE_CACHE_KV"]
+    from kivy.app import App
+    return os.path.join(App._get_user_data_dir(types.SimpleNamespace(name=NOME_APP)), "cache_kv")
+
+
+def ativar(pasta=None):
+    try:
+        pasta = pasta or pasta_padrao()
+    except Exception as e:
+        print(f"[KV] Cache de regras desligado: {e}")
+        return None
+    cache = CacheKV(pasta)
+    cache.ativar()
+    return cache
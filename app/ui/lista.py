@@ -0,0 +1,133 @@
+# app/ui/lista.py
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
+from kivy.properties import (
+    StringProperty,
+    ColorProperty,
+    NumericProperty,
+    BooleanProperty,
+    ObjectProperty,
+)
+from kivy.metrics import dp
+from kivy.clock import Clock
+from kivymd.uix.list import MDListItem
+from kivymd.uix.card import MDCard
+from kivymd.uix.label import MDLabel
+
+
+class ListaVirtual(RecycleView):
+    """
+    Lista virtualizada usada pelas telas: só os itens visíveis viram widgets,
+    e eles são reaproveitados ao rolar. Cada linha é um dict com as propriedades
+    da classe de linha (viewclass padrão da lista ou a chave "viewclass" do dict).
+    """
+    espacamento = NumericProperty(dp(10))
+    margem = NumericProperty(dp(20))
+    altura_linha = NumericProperty(dp(72))
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._relayout = Clock.create_trigger(lambda dt: self.refresh_from_data())
+
+    def mostrar(self, linhas, vazio=""):
+        """Troca todo o conteúdo; sem linhas, mostra a mensagem 'vazio'."""
+        linhas = list(linhas)
+        if not linhas and vazio:
+            linhas = [linha_mensagem(vazio)]
+        self.data = linhas
+
+    def agendar_relayout(self):
+        """Junta várias mudanças de altura num único relayout no próximo frame."""
+        self._relayout()
+
+
+# --- LINHAS ---
+# Os dicts sempre trazem todas as propriedades: um widget reaproveitado
+# não pode ficar com o ícone ou a ação da linha que mostrava antes.
+
+def linha_item(titulo, subtitulo="", icone="circle-outline", cor_icone=(0.5, 0.5, 0.5, 1),
+               ao_tocar=None, icone_acao="", cor_acao=(0.5, 0.5, 0.5, 1), ao_acionar=None,
+               cor_fundo=(1, 1, 1, 1), subtitulo_destaque=False, **extra):
+    return dict({
+        "viewclass": "LinhaLista",
+        "titulo": titulo,
+        "subtitulo": subtitulo,
+        "icone": icone,
+        "cor_icone": list(cor_icone),
+        "ao_tocar": ao_tocar,
+        "icone_acao": icone_acao,
+        "cor_acao": list(cor_acao),
+        "ao_acionar": ao_acionar,
+        "cor_fundo": list(cor_fundo),
+        "subtitulo_destaque": subtitulo_destaque,
+    }, **extra)
+
+
+def linha_card(texto, icone="circle-outline", cor_fundo=(1, 1, 1, 1), cor_texto=(0, 0, 0, 0.8),
+               ao_tocar=None, **extra):
+    return dict({
+        "viewclass": "CardLista",
+        "texto": texto,
+        "icone": icone,
+        "cor_fundo": list(cor_fundo),
+        "cor_texto": list(cor_texto),
+        "ao_tocar": ao_tocar,
+        "height": dp(80),
+    }, **extra)
+
+
+def linha_mensagem(texto, **extra):
+    return dict({"viewclass": "MensagemLista", "texto": texto, "height": dp(80)}, **extra)
+
+
+def linha_cabecalho(texto, secundario=False, **extra):
+    return dict({"viewclass": "CabecalhoLista", "texto": texto, "secundario": secundario, "height": dp(48)}, **extra)
+
+
+class LinhaLista(RecycleDataViewBehavior, MDListItem):
+    """
+    Item padrão (ícone, título, subtítulo e um botão opcional à direita).
+    ao_tocar / ao_acionar: funções sem argumentos vindas do dict da linha.
+    """
+    icone = StringProperty("circle-outline")
+    cor_icone = ColorProperty([0.5, 0.5, 0.5, 1])
+    titulo = StringProperty()
+    subtitulo = StringProperty()
+    subtitulo_destaque = BooleanProperty(False)
+    cor_fundo = ColorProperty([1, 1, 1, 1])
+    icone_acao = StringProperty("")
+    cor_acao = ColorProperty([0.5, 0.5, 0.5, 1])
+    ao_tocar = ObjectProperty(None, allownone=True)
+    ao_acionar = ObjectProperty(None, allownone=True)
+
+    def tocar(self):
+        if self.ao_tocar:
+            self.ao_tocar()
+
+    def acionar(self):
+        if self.ao_acionar:
+            self.ao_acionar()
+
+
+class CardLista(RecycleDataViewBehavior, MDCard):
+    """Card de uma linha só (ícone + texto), usado na escolha de horários."""
+    icone = StringProperty("circle-outline")
+    texto = StringProperty()
+    cor_fundo = ColorProperty([1, 1, 1, 1])
+    cor_texto = ColorProperty([0, 0, 0, 0.8])
+    ao_tocar = ObjectProperty(None, allownone=True)
+
+    def tocar(self):
+        if self.ao_tocar:
+            self.ao_tocar()
+
+
+class CabecalhoLista(RecycleDataViewBehavior, MDLabel):
+    """Título de seção dentro de uma lista virtual."""
+    texto = StringProperty()
+    secundario = BooleanProperty(False)
+
+
+class MensagemLista(RecycleDataViewBehavior, MDLabel):
+    """Aviso centralizado (lista vazia, erro de conexão...)."""
+    texto = StringProperty()
@@ -1,48 +1,165 @@
-from kivy.uix.screenmanager import ScreenManager, SlideTransition
+import importlib
+from collections import OrderedDict
+from kivy.core.window import Window
+from kivy.uix.screenmanager import ScreenManager, ScreenManagerException, SlideTransition
 from kivy.lang import Builder
 from pathlib import Path
-#--- IMPORTA TODAS AS CLASSES QUE VAI GERIR ---
-from app.ui.telas.home import HomeScreen, AgendamentoScreen, NotificationScreen
-from app.ui.telas.home_psicologo import PsychoHomeScreen, PatientListScreen, ListAtividadeScreen, DisponibilidadeScreen, RelatorioPacienteScreen
-from app.ui.telas.login import LoginScreen
-from app.ui.telas.main import MainScreen
-from app.ui.telas.register import RegisterScreen
-from app.ui.telas.diario import DiarioScreen
-from app.ui.telas.register_activity import RegisterActivityScreen, SentimentoScreen, AnotacaoDiaScreen
-from app.ui.telas.consulta_anotacao import ConsultaAnotacaoScreen
-from app.ui.telas.conta import ContaScreen, EditarDadosScreen
+from app.core.async_db import EscopoTela
+from app.core.inicio import perfil
 
 kv_path = Path(__file__).parent / "styles.kv"
 if kv_path.exists():
-    Builder.load_file(str(kv_path))
+    with perfil.trecho("kv styles.kv"):
+        Builder.load_file(str(kv_path))
+
+PACIENTE = "Paciente"
+PSICOLOGO = "Psicólogo"
+
+# --- TODAS AS TELAS QUE O APP GERE ---
+# nome: (módulo, classe, arquivo .kv com as regras, papel que usa a tela; None = qualquer um)
+# Nada aqui é importado ou construído antes da primeira navegação para a tela.
+TELAS = {
+    "main": ("app.ui.telas.main", "MainScreen", "app/ui/telas/main.kv", None),
+    "login": ("app.ui.telas.login", "LoginScreen", "app/ui/telas/login.kv", None),
+    "register": ("app.ui.telas.register", "RegisterScreen", "app/ui/telas/register.kv", None),
+    "conta": ("app.ui.telas.conta", "ContaScreen", "app/ui/telas/conta.kv", None),
+    "editar_dados": ("app.ui.telas.conta", "EditarDadosScreen", "app/ui/telas/conta.kv", None),
+    "notifications": ("app.ui.telas.home", "NotificationScreen", "app/ui/telas/home.kv", None),
+
+    "home": ("app.ui.telas.home", "HomeScreen", "app/ui/telas/home.kv", PACIENTE),
+    "agendamento": ("app.ui.telas.home", "AgendamentoScreen", "app/ui/telas/home.kv", PACIENTE),
+    "diario": ("app.ui.telas.diario", "DiarioScreen", "app/ui/telas/diario.kv", PACIENTE),
+    "sentimento": ("app.ui.telas.register_activity", "SentimentoScreen", "app/ui/telas/register_activity.kv", PACIENTE),
+    "register_activity": ("app.ui.telas.register_activity", "RegisterActivityScreen", "app/ui/telas/register_activity.kv", PACIENTE),
+    "anotacao_dia": ("app.ui.telas.register_activity", "AnotacaoDiaScreen", "app/ui/telas/register_activity.kv", PACIENTE),
+
+    "home_psicologo": ("app.ui.telas.home_psicologo", "PsychoHomeScreen", "app/ui/telas/home_psicologo.kv", PSICOLOGO),
+    "pacientes": ("app.ui.telas.home_psicologo", "PatientListScreen", "app/ui/telas/home_psicologo.kv", PSICOLOGO),
+    "lista_atividade": ("app.ui.telas.home_psicologo", "ListAtividadeScreen", "app/ui/telas/home_psicologo.kv", PSICOLOGO),
+    "disponibilidade": ("app.ui.telas.home_psicologo", "DisponibilidadeScreen", "app/ui/telas/home_psicologo.kv", PSICOLOGO),
+    "relatorio_paciente": ("app.ui.telas.home_psicologo", "RelatorioPacienteScreen", "app/ui/telas/home_psicologo.kv", PSICOLOGO),
+    "consulta_anotacao": ("app.ui.telas.consulta_anotacao", "ConsultaAnotacaoScreen", "app/ui/telas/consulta_anotacao.kv", PSICOLOGO),
+}
 
 
 class ScreenController(ScreenManager):
-    def __init__(self, app, **kwargs):
+    """
+    Constrói cada tela só na primeira vez que alguém navega para ela
+    (current = "nome" ou get_screen("nome")): importa o módulo, carrega o .kv
+    e instancia. Telas do outro papel (paciente x psicólogo) nunca são
+    construídas para o usuário logado.
+
+    Cada tela recebe um EscopoTela em 'escopo': o que ela pede por ele é
+    cancelado no on_leave. A cada troca, o PlanoPrefetch do app adianta os
+    dados das telas que costumam vir a seguir.
+
+    Ficam no máximo MAX_TELAS construídas; passando disso, a usada há mais
+    tempo sai (e o .kv dela, se nenhuma outra tela o usa). Em pouca memória
+    (aviso do sistema ou app em segundo plano) sai tudo menos a tela atual.
+    """
+
+    MAX_TELAS = 8
+
+    def __init__(self, app, resource_path=lambda caminho: caminho, **kwargs):
         super().__init__(transition=SlideTransition(), **kwargs)
         self.app = app
+        self.resource_path = resource_path
+        self._usadas = OrderedDict()   # nome -> None, da menos para a mais recente
+        self._kv_carregados = set()
 
-        # adiciona telas (Toda a lógica está centralizada aqui)
-        self.add_widget(HomeScreen(name="home"))
-        self.add_widget(LoginScreen(name="login"))
-        self.add_widget(RegisterScreen(name="register"))
-        self.add_widget(DiarioScreen(name="diario"))
-        self.add_widget(SentimentoScreen(name="sentimento"))
-        self.add_widget(MainScreen(name="main"))
-        self.add_widget(PsychoHomeScreen(name="home_psicologo"))
-        self.add_widget(PatientListScreen(name="pacientes"))
-        self.add_widget(ListAtividadeScreen(name="lista_atividade"))
-        self.add_widget(DisponibilidadeScreen(name="disponibilidade"))
-        self.add_widget(RegisterActivityScreen(name="register_activity"))
-        self.add_widget(ConsultaAnotacaoScreen(name="consulta_anotacao"))
-        self.add_widget(AnotacaoDiaScreen(name="anotacao_dia"))
-        self.add_widget(ContaScreen(name="conta"))
-        self.add_widget(AgendamentoScreen(name="agendamento"))
-        self.add_widget(EditarDadosScreen(name="editar_dados"))
-        self.add_widget(NotificationScreen(name="notifications"))
-        self.add_widget(RelatorioPacienteScreen(name="relatorio_paciente"))
-
+        if Window.is_event_type("on_memorywarning"):
+            Window.bind(on_memorywarning=lambda *args: self.liberar())
 
         # Mudei a tela inicial para "main", que parece ser sua tela
         # de boas-vindas. Se for "login", apenas mude aqui.
-        self.current = "main"
\ No newline at end of file
+        self.current = "main"
+
+    # --- CONSTRUÇÃO SOB DEMANDA ---
+    def on_current(self, instance, value):
+        if value and not self._do_perfil(value):
+            print(f"[TELAS] Tela '{value}' não é do perfil {self.app.logged_user_type}; navegação ignorada")
+            self.current = self.current_screen.name if self.current_screen else None
+            return
+        super().on_current(instance, value)
+        # Adianta os dados das telas que costumam vir depois desta
+        prefetch = getattr(self.app, "prefetch", None)
+        if prefetch is not None and value:
+            prefetch.na_tela(value)
+
+    def _do_perfil(self, nome):
+        papel = TELAS[nome][3] if nome in TELAS else None
+        papel_logado = getattr(self.app, "logged_user_type", None)
+        return not (papel and papel_logado and papel != papel_logado)
+
+    def get_screen(self, name):
+        # O ScreenManager também passa por aqui ao trocar 'current'
+        if not self.has_screen(name):
+            self._construir(name)
+        self._usadas[name] = None
+        self._usadas.move_to_end(name)
+        return super().get_screen(name)
+
+    def _construir(self, nome):
+        with perfil.trecho(f"tela {nome}"):
+            self._construir_tela(nome)
+
+    def _construir_tela(self, nome):
+        if nome not in TELAS:
+            raise ScreenManagerException(f'No Screen with name "{nome}".')
+        modulo, classe, kv, papel = TELAS[nome]
+        papel_logado = getattr(self.app, "logged_user_type", None)
+        if not self._do_perfil(nome):
+            raise ScreenManagerException(f'Tela "{nome}" não é do perfil {papel_logado}.')
+
+        # Trocou de usuário/papel: as telas do papel anterior não servem mais
+        if papel_logado:
+            for outra in list(self._usadas):
+                if TELAS[outra][3] not in (None, papel_logado):
+                    self._descarregar(outra)
+
+        # O módulo antes do .kv: as regras usam as classes que ele registra
+        cls = getattr(importlib.import_module(modulo), classe)
+        if kv not in self._kv_carregados:
+            with perfil.trecho(f"kv {kv}"):
+                Builder.load_file(self.resource_path(kv))
+            self._kv_carregados.add(kv)
+        tela = cls(name=nome)
+        # Pedidos feitos pela tela (tela.escopo.start) morrem quando ela sai
+        tela.escopo = EscopoTela(self.app.async_db)
+        tela.bind(on_leave=lambda *args: tela.escopo.cancelar())
+        self.add_widget(tela)
+        self._limitar()
+
+    # --- DESCARTE ---
+    def _limitar(self):
+        excesso = len(self.screens) - self.MAX_TELAS
+        for nome in list(self._usadas):
+            if excesso <= 0:
+                break
+            if self._descarregar(nome):
+                excesso -= 1
+
+    def liberar(self):
+        """Descarta todas as telas construídas, menos a que está na frente."""
+        for nome in list(self._usadas):
+            self._descarregar(nome)
+
+    def _descarregar(self, nome):
+        if not self.has_screen(nome):
+            self._usadas.pop(nome, None)
+            return False
+        tela = super().get_screen(nome)
+        # Nem a tela atual nem a que está saindo na animação
+        if tela is self.current_screen or nome == self.current:
+            return False
+        if self.transition.is_active and tela is self.transition.screen_out:
+            return False
+
+        tela.escopo.cancelar()
+        self.remove_widget(tela)
+        self._usadas.pop(nome, None)
+        kv = TELAS[nome][2]
+        if not any(TELAS[s.name][2] == kv for s in self.screens if s.name in TELAS):
+            Builder.unload_file(self.resource_path(kv))
+            self._kv_carregados.discard(kv)
+        return True
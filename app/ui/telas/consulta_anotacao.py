@@ -9,13 +9,14 @@ from kivymd.uix.dialog import (
 from kivymd.uix.button import MDButton, MDButtonText
 from kivymd.uix.label import MDLabel
 from kivymd.uix.card import MDCard
-from datetime import datetime
-import pytz
+from app.core import datas
+import asynckivy as ak
 
 class ConsultaAnotacaoScreen(MDScreen):
     dialog = None
     menu = None
     paciente_selecionado_id = None
+    _pacientes_ids = []
 
     def on_enter(self, *args):
         """Chamado ao entrar na tela. Prepara o menu."""
@@ -27,19 +28,22 @@ class ConsultaAnotacaoScreen(MDScreen):
         self.ids.lista_historico.clear_widgets()
         
         self.load_pacientes_menu()
+        self.escopo.ao_atualizar(r"^/psicologo/\d+/pacientes$", lambda *args: self.load_pacientes_menu())
 
     def get_db(self):
-        return self.manager.app.db
+        return self.manager.app.async_db
     
     def get_user_id(self):
         return self.manager.app.logged_user_id
 
     def load_pacientes_menu(self):
+        self.escopo.start(self._load_pacientes_menu)
+
+    async def _load_pacientes_menu(self, db):
         psicologo_id = self.get_user_id()
-        db = self.get_db()
         
         # Busca lista [(id, "Nome"), ...]
-        pacientes = db.get_pacientes_do_psicologo_com_nomes(psicologo_id)
+        pacientes = await db.get_pacientes_do_psicologo_com_nomes(psicologo_id)
         
         if not pacientes:
             self.ids.lbl_btn_paciente.text = "Nenhum paciente vinculado"
@@ -63,6 +67,10 @@ class ConsultaAnotacaoScreen(MDScreen):
         )
         self.ids.btn_selecionar_paciente.disabled = False
 
+        # Enquanto o usuário escolhe, o histórico dos primeiros da lista já vai chegando
+        self._pacientes_ids = [pid for pid, _ in pacientes]
+        self.manager.app.prefetch.anotacoes_vizinhas(self._pacientes_ids)
+
     def selecionar_paciente(self, paciente_id, nome_paciente):
         """
         Atualiza o ID interno E O TEXTO DO BOTÃO.
@@ -74,25 +82,37 @@ class ConsultaAnotacaoScreen(MDScreen):
         
         self.menu.dismiss()
         self.load_historico(paciente_id)
+        # Quem está ao lado no menu costuma ser o próximo a ser consultado
+        self.manager.app.prefetch.anotacoes_vizinhas(self._pacientes_ids, paciente_id)
 
     def load_historico(self, paciente_id):
         """Mostra o histórico assim que seleciona o paciente."""
+        # Trocou de paciente: o histórico do anterior deixa de ser buscado
+        self.escopo.start(self._load_historico, paciente_id)
+
+    async def _load_historico(self, db, paciente_id):
+        sync = self.manager.app.sync_engine
+        psicologo_id = self.get_user_id()
+
+        # Pinta o que já está no aparelho e depois busca só o que mudou
+        anotacoes = sync.local("anotacoes", psicologo_id, paciente_id)
+        if anotacoes:
+            self.render_historico(anotacoes)
+
+        mudou = await db.run(sync.sync, "anotacoes", psicologo_id, paciente_id)
+        if mudou or not anotacoes:
+            self.render_historico(sync.local("anotacoes", psicologo_id, paciente_id))
+
+    def render_historico(self, anotacoes):
         lista = self.ids.lista_historico
         lista.clear_widgets()
         
-        db = self.get_db()
-        psicologo_id = self.get_user_id()
-        anotacoes = db.get_anotacoes_paciente(psicologo_id, paciente_id)
-        
         if not anotacoes:
             lista.add_widget(MDLabel(text="Nenhuma anotação anterior.", halign="center", theme_text_color="Secondary"))
             return
 
-        for an_id, data_iso, conteudo in anotacoes:
-            try:
-                data_fmt = data_iso.strftime("%d/%m/%Y às %H:%M")
-            except:
-                data_fmt = str(data_iso)
+        datas_fmt = datas.formatar_lote([a[1] for a in anotacoes], "%d/%m/%Y às %H:%M")
+        for (an_id, data_iso, conteudo), data_fmt in zip(anotacoes, datas_fmt):
 
             card = MDCard(
                 style="elevated",
@@ -118,19 +138,20 @@ class ConsultaAnotacaoScreen(MDScreen):
             self.show_popup("Atenção", "Escreva algo na anotação.")
             return
 
-        db = self.get_db()
+        ak.start(self._salvar_anotacao(self.paciente_selecionado_id, texto))
+
+    async def _salvar_anotacao(self, paciente_id, texto):
+        app = self.manager.app
         psicologo_id = self.get_user_id()
         
-        data_hora_agora = datetime.now(pytz.utc).isoformat()
+        data_hora_agora = datas.agora_iso()
 
-        success, msg = db.salvar_anotacao_psicologo(psicologo_id, self.paciente_selecionado_id, texto, data_hora_agora)
+        # Grava no aparelho; a outbox envia para a API em segundo plano
+        await self.get_db().run(app.outbox.salvar_anotacao, psicologo_id, paciente_id, texto, data_hora_agora)
         
-        if success:
-            self.show_popup("Sucesso", "Anotação salva!")
-            self.ids.anotacao_input.text = ""
-            self.load_historico(self.paciente_selecionado_id) # Atualiza a lista na hora
-        else:
-            self.show_popup("Erro", msg)
+        self.show_popup("Sucesso", "Anotação salva!")
+        self.ids.anotacao_input.text = ""
+        self.load_historico(paciente_id) # Atualiza a lista na hora
 
     def show_popup(self, title, text):
         if self.dialog: self.dialog.dismiss()
@@ -13,6 +13,7 @@ from kivy.uix.widget import Widget
 from kivymd.uix.textfield import MDTextField, MDTextFieldHintText
 from kivymd.uix.boxlayout import MDBoxLayout
 from datetime import datetime
+import asynckivy as ak
 
 class BaseScreen(Screen):
 
@@ -21,8 +22,8 @@ class BaseScreen(Screen):
         return MDApp.get_running_app()
 
     def get_db(self):
-        """Atalho para acessar o banco de dados."""
-        return self.get_app().db
+        """Atalho para acessar o banco de dados (versão assíncrona)."""
+        return self.get_app().async_db
     
     def get_user_id(self):
         """Atalho para pegar o ID do usuário logado."""
@@ -68,6 +69,7 @@ class ContaScreen(BaseScreen):
     def on_enter(self, *args):
         self.carregar_dados()
         self.montar_menu()
+        self.escopo.ao_atualizar(rf"^/users/{self.get_user_id()}$", lambda *args: self.escopo.start(self._carregar_detalhes))
     
     def _calcular_idade(self, data_nasc_str):
         """
@@ -103,13 +105,15 @@ class ContaScreen(BaseScreen):
         tipo = self.get_user_type()
         self.ids.lbl_email.text = f"Perfil: {tipo}"
 
-        # Busca detalhes na API
+        # Busca detalhes na API sem travar a tela
+        self.escopo.start(self._carregar_detalhes)
+
+    async def _carregar_detalhes(self, db):
         try:
-            db = self.get_db()
             user_id = self.get_user_id()
             
             # Retorna DICT: {'username': '...', 'data_nascimento': '01/01/2000', ...}
-            dados = db.get_user_details(user_id) 
+            dados = await db.get_user_details(user_id) 
             
             if dados:
                 # --- CORREÇÃO AQUI ---
@@ -215,12 +219,15 @@ class ContaScreen(BaseScreen):
         """
         Busca e exibe os dados do profissional vinculado a este paciente.
         """
+        ak.start(self._ver_meu_psicologo())
+
+    async def _ver_meu_psicologo(self):
         try:
             db = self.get_db()
             paciente_id = self.get_user_id()
             
             # 1. Descobre o ID do psicólogo
-            psicologo_id = db.get_psicologo_id_by_paciente(paciente_id)
+            psicologo_id = await db.get_psicologo_id_by_paciente(paciente_id)
             
             if not psicologo_id:
                 self.show_popup("Meu Psicólogo", "Você ainda não está vinculado a nenhum profissional.")
@@ -228,7 +235,7 @@ class ContaScreen(BaseScreen):
 
             # 2. Busca os dados pessoais desse ID (Nome, Email)
             # Reutilizamos a função que já existe para buscar dados de usuário
-            dados_psi = db.get_user_details(psicologo_id)
+            dados_psi = await db.get_user_details(psicologo_id)
             
             if dados_psi:
                 nome = dados_psi.get("username", "Desconhecido")
@@ -292,21 +299,27 @@ class ContaScreen(BaseScreen):
             print("Preencha os campos") 
             return
 
-        # Chama o banco
+        self.dialog_senha.dismiss()
+        ak.start(self._trocar_senha(old, new))
+
+    async def _trocar_senha(self, old, new):
         db = self.get_db()
         user_id = self.get_user_id()
         
-        success, msg = db.change_password(user_id, old, new)
-        
-        self.dialog_senha.dismiss()
+        success, msg = await db.change_password(user_id, old, new)
         self.show_popup("Aviso", msg) # Usa seu show_popup existente para o resultado
 
     def fazer_logout(self, *args):
         app = self.get_app()
+        app.sair()
+        app.db.clear_cache()
+        app.store.clear()
+        app.relatorios.cache.limpar()
         app.logged_user_id = None
         app.logged_user_name = None
         app.logged_user_type = None
         app.root.current = "main"
+        app.root.liberar() # Telas do usuário que saiu não ficam na memória
     
     
 
@@ -319,11 +332,13 @@ class EditarDadosScreen(BaseScreen):
     # --- FUNÇÃO REMOVIDA DAQUI (calcular_e_exibir_idade) ---
 
     def carregar_dados_atuais(self):
+        self.escopo.start(self._carregar_dados_atuais)
+
+    async def _carregar_dados_atuais(self, db):
         try:
-            user_id = self.manager.app.logged_user_id
-            db = self.manager.app.db
+            user_id = self.get_user_id()
             
-            dados = db.get_user_details(user_id)
+            dados = await db.get_user_details(user_id)
             
             if dados:
                 self.ids.field_username.text = dados.get("username", "")
@@ -342,10 +357,6 @@ class EditarDadosScreen(BaseScreen):
             print(f"Erro no carregamento: {e}")
 
     def salvar_dados(self):
-        # ... (seu código de salvar continua igual) ...
-        db = self.get_db()
-        user_id = self.get_user_id()
-        
         username = self.ids.field_username.text.strip()
         email = self.ids.field_email.text.strip()
         nascimento = self.ids.field_nasc.text.strip()
@@ -353,8 +364,14 @@ class EditarDadosScreen(BaseScreen):
         if not (username and email and nascimento):
             self.show_popup("Erro", "Todos os campos são obrigatórios.")
             return
+
+        ak.start(self._salvar_dados(username, email, nascimento))
+
+    async def _salvar_dados(self, username, email, nascimento):
+        db = self.get_db()
+        user_id = self.get_user_id()
             
-        success, message = db.update_user_details(user_id, username, email, nascimento)
+        success, message = await db.update_user_details(user_id, username, email, nascimento)
         
         if success:
             app = self.get_app()
@@ -1,22 +1,70 @@
 # app/ui/telas/diario.py
 from kivymd.uix.screen import MDScreen
-from kivymd.uix.label import MDLabel
-from kivymd.uix.boxlayout import MDBoxLayout
-from datetime import datetime
+from kivymd.uix.card import MDCard
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
+from kivy.properties import StringProperty, ColorProperty, NumericProperty
+from kivy.utils import get_color_from_hex
+from kivy.core.window import Window
+from kivy.metrics import dp
+from app.core import datas
 from app.ui.telas.register_activity import EMOCOES_MAP
-import pytz
-from kivy.factory import Factory
+from app.ui.lista import ListaVirtual  # noqa: F401 - importada só para a Factory do Kivy achar a classe usada no diario.kv
+import math
+
+
+class DiarioCard(RecycleDataViewBehavior, MDCard):
+    """
+    Card do diário reaproveitado pela RecycleView: só existem os cards visíveis
+    e cada um recebe um dict pronto (ver DiarioScreen.montar_linhas).
+    """
+    sentimento = StringProperty()
+    data_formatada = StringProperty()
+    atividades = StringProperty()
+    anotacao = StringProperty()
+    icone = StringProperty("emoticon-outline")
+    cor_icone = ColorProperty(get_color_from_hex("#92C7A3"))
+    index = NumericProperty(-1)
+
+    def refresh_view_attrs(self, rv, index, data):
+        self.index = index
+        self._rv = rv
+        return super().refresh_view_attrs(rv, index, data)
+
+    def on_minimum_height(self, instance, altura):
+        # A altura do dict é uma estimativa; corrige com a medida real do conteúdo
+        rv = getattr(self, "_rv", None)
+        if rv is None or not (0 <= self.index < len(rv.data)):
+            return
+        linha = rv.data[self.index]
+        if abs(linha.get("height", 0) - altura) > 1:
+            linha["height"] = altura
+            rv.agendar_relayout()
+
 
 class DiarioScreen(MDScreen):
+    # Entradas buscadas por vez (primeira página e a cada rolagem até o fim)
+    PAGE_SIZE = 30
+    # Quando scroll_y fica abaixo disso, a próxima página começa a carregar
+    LIMIAR_ROLAGEM = 0.15
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._cursor = None      # Cursor da próxima página local (None = acabou o que há no aparelho)
+        self._mais_na_api = False  # A API ainda tem entradas mais antigas que o aparelho não tem
+        self._ultima = None      # Posição da entrada mais antiga na tela (onde a rolagem continua)
+        self._carregadas = 0     # Quantas entradas já estão na tela
+        self._buscando = False
+        self._versao = 0         # Muda a cada render completo (descarta páginas atrasadas)
+
     def on_enter(self, *args):
         self.load_notas()
     
-    def get_db(self):
-        return self.manager.app.db
-    
     def get_user_id(self):
         return self.manager.app.logged_user_id
 
+    def get_sync(self):
+        return self.manager.app.sync_engine
+
     def get_icon_for_sentiment(self, sentimento_txt):
         s = sentimento_txt.lower()
         if "feliz" in s or "bem" in s or "ótimo" in s:
@@ -30,85 +78,145 @@ class DiarioScreen(MDScreen):
         return "emoticon-outline", "#92C7A3"
 
     def load_notas(self):
-        tabela_container = self.ids.tabela_container
-        tabela_container.clear_widgets()
-        
+        self.escopo.start(self._load_notas)
+
+    async def _load_notas(self, db):
         user_id = self.get_user_id()
         
         if not user_id:
+            self._versao += 1
+            self._cursor = None
+            self._mais_na_api = False
+            self.ids.lista_diario.data = []
             self.show_message("Faça login para ver seu diário.")
             return
             
-        db = self.get_db()
-        success, lista_notas = db.get_entradas_historico(user_id)
-        
-        if not success:
-            self.show_message("Erro ao conectar ao banco de dados.")
+        # 1. Pinta na hora só a primeira página do que já está no aparelho
+        sync = self.get_sync()
+        pagina, cursor = sync.pagina("diario", user_id, limite=self.PAGE_SIZE)
+        if pagina:
+            self.render_notas(pagina, cursor)
+
+        # 2. Atualiza só o topo (delta ou primeira página da API), nunca o histórico todo
+        mudou = await db.run(sync.atualizar_diario, user_id, self.PAGE_SIZE)
+        self._mais_na_api = sync.cursor_diario(user_id) is not None
+
+        if mudou is None:
+            if not pagina:
+                self._versao += 1
+                self._cursor = None
+                self.ids.lista_diario.data = []
+                self.show_message("Erro ao conectar ao banco de dados.")
             return
+
+        if mudou or not pagina:
+            # Recarrega tantas entradas quantas já estavam na tela, para não perder a rolagem
+            limite = max(self.PAGE_SIZE, self._carregadas)
+            pagina, cursor = sync.pagina("diario", user_id, limite=limite)
+            self.render_notas(pagina, cursor)
+
+    def render_notas(self, lista_notas, cursor=None):
+        self._versao += 1
+        self._carregadas = 0
+        self._cursor = cursor
             
+        self._ultima = None
         if not lista_notas:
+            self.ids.lista_diario.data = []
             self.show_message("Seu histórico está vazio. \nRegistre como foi seu dia!")
             return
-        
-        # Ordena a lista pela data (Decrescente)
-        lista_notas.sort(key=lambda x: x[1], reverse=True)
-        
-        for (reg_id, data_iso, sentimento_id, anotacao, atividades_txt) in lista_notas:
-            sentimento_txt = EMOCOES_MAP.get(sentimento_id, "Desconhecido")
-            
-            # --- CORREÇÃO DA DATA AQUI ---
-            try:
-                dt = None
-                # 1. Tenta o padrão ISO estrito (YYYY-MM-DDTHH:MM:SS)
-                try:
-                    dt = datetime.fromisoformat(data_iso)
-                except ValueError:
-                    # 2. Se falhar (ex: 2025-9-5...), tenta parse manual flexível
-                    # O strptime aceita digitos unicos
-                    dt = datetime.strptime(data_iso, "%Y-%m-%dT%H:%M:%S")
-
-                # 3. Garante Fuso Horário
-                if dt:
-                    # Se a data não tiver info de fuso, assume UTC para converter corretamente
-                    if dt.tzinfo is None:
-                        dt = pytz.utc.localize(dt)
-                    
-                    dt_local = dt.astimezone(pytz.timezone('America/Sao_Paulo'))
-                    data_formatada = dt_local.strftime("%d/%m • %H:%M")
-                else:
-                    data_formatada = data_iso # Fallback
-                    
-            except Exception as e:
-                # Se tudo falhar, mostra a data crua
-                print(f"Erro data: {e}") 
-                data_formatada = data_iso 
-            # -----------------------------
-
-            icon_name, icon_color = self.get_icon_for_sentiment(sentimento_txt)
-
-            card = Factory.DiarioCard()
-            
-            card.ids.lbl_sentimento.text = sentimento_txt
-            card.ids.lbl_data.text = data_formatada
-            card.ids.lbl_atividades.text = atividades_txt if atividades_txt else "Sem atividades registradas"
-            card.ids.lbl_anotacao.text = anotacao if anotacao else "Sem anotações"
-            
-            card.ids.icon_sentimento.icon = icon_name
-            card.ids.icon_sentimento.text_color = icon_color
 
-            tabela_container.add_widget(card)
+        self.show_message("")
+        self.ids.lista_diario.data = self.montar_linhas(lista_notas)
+        self._carregadas = len(lista_notas)
+        self._marcar_ultima(lista_notas)
+
+    def adicionar_notas(self, lista_notas):
+        """Acrescenta entradas no fim da lista (as páginas já vêm em ordem, da mais nova para a mais antiga)."""
+        self.ids.lista_diario.data.extend(self.montar_linhas(lista_notas))
+        self._carregadas += len(lista_notas)
+        self._marcar_ultima(lista_notas)
+
+    def _marcar_ultima(self, lista_notas):
+        # Posição (mesmo formato do cursor local) da entrada mais antiga na tela
+        nota = lista_notas[-1]
+        self._ultima = (nota[1] or "", nota[0])
+
+    def montar_linhas(self, lista_notas):
+        # Todas as datas da página são convertidas de uma vez
+        datas_fmt = datas.formatar_lote([n[1] for n in lista_notas], "%d/%m • %H:%M")
+        return [self.montar_linha(n, d) for n, d in zip(lista_notas, datas_fmt)]
+
+    def montar_linha(self, nota, data_formatada):
+        """Converte uma tupla do diário no dict que o DiarioCard exibe (tudo já formatado)."""
+        reg_id, data_iso, sentimento_id, anotacao, atividades_txt = nota
+        sentimento_txt = EMOCOES_MAP.get(sentimento_id, "Desconhecido")
+        icon_name, icon_color = self.get_icon_for_sentiment(sentimento_txt)
+
+        atividades = atividades_txt if atividades_txt else "Sem atividades registradas"
+        anotacao = anotacao if anotacao else "Sem anotações"
+        return {
+            "sentimento": sentimento_txt,
+            "data_formatada": data_formatada,
+            "atividades": atividades,
+            "anotacao": anotacao,
+            "icone": icon_name,
+            "cor_icone": get_color_from_hex(icon_color),
+            "height": self.estimar_altura(atividades, anotacao),
+        }
+
+    def estimar_altura(self, atividades, anotacao):
+        """
+        Altura aproximada do card, só para a RecycleView reservar espaço sem criar o widget.
+        O card corrige o valor com a medida real quando aparece na tela.
+        """
+        largura = (self.ids.lista_diario.width or Window.width) - dp(72)
+        por_linha = max(10, int(largura / dp(7.5)))
+        linhas = 0
+        for texto in (atividades, anotacao):
+            for parte in texto.split("\n"):
+                linhas += max(1, math.ceil(len(parte) / por_linha))
+        return dp(140) + linhas * dp(20)
+
+    # --- ROLAGEM INFINITA ---
+    def on_scroll_diario(self, scroll):
+        if scroll.scroll_y > self.LIMIAR_ROLAGEM or self._buscando:
+            return
+        if self._cursor is not None or self._mais_na_api:
+            self.escopo.start(self._proxima_pagina)
+
+    async def _proxima_pagina(self, db):
+        user_id = self.get_user_id()
+        if not user_id:
+            return
+        self._buscando = True
+        versao = self._versao
+        sync = self.get_sync()
+        try:
+            pagina = []
+            cursor = self._cursor
+            while True:
+                if cursor is None:
+                    # O aparelho acabou: traz a próxima página antiga da API (cursor "before")
+                    cursor_api = await db.run(sync.diario_anterior, user_id, self.PAGE_SIZE)
+                    if cursor_api is False:
+                        return
+                    self._mais_na_api = cursor_api is not None
+                pagina, cursor = await db.run(
+                    sync.pagina, "diario", user_id, limite=self.PAGE_SIZE, cursor=self._ultima
+                )
+                # Página da API já toda no aparelho: segue para a próxima
+                if pagina or not self._mais_na_api:
+                    break
+            # A lista foi repintada enquanto a página carregava: esta página não vale mais
+            if versao != self._versao:
+                return
+            self._cursor = cursor
+            if pagina:
+                self.adicionar_notas(pagina)
+        finally:
+            self._buscando = False
 
     def show_message(self, text):
-        container = self.ids.tabela_container
-        box = MDBoxLayout(orientation="vertical", size_hint_y=None, height="200dp", padding="20dp")
-        
-        label = MDLabel(
-            text=text, 
-            halign="center", 
-            theme_text_color="Hint",
-            font_style="Title",
-            role="medium"
-        )
-        
-        box.add_widget(label)
-        container.add_widget(box)
\ No newline at end of file
+        # Mensagem fica sobre a lista (vazia); texto "" esconde
+        self.ids.lbl_mensagem.text = text
\ No newline at end of file
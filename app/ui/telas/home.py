@@ -5,15 +5,13 @@ from kivymd.uix.dialog import (
     MDDialogSupportingText,  
     MDDialogButtonContainer
 )
-from kivymd.uix.list import MDListItem, MDListItemHeadlineText, MDListItemSupportingText, MDListItemLeadingIcon
-from kivymd.uix.button import MDButton,MDButtonText, MDIconButton
-from kivymd.uix.label import MDLabel,MDIcon
+from kivymd.uix.button import MDButton,MDButtonText
 from kivy.uix.widget import Widget
-from kivymd.uix.boxlayout import MDBoxLayout
-from kivymd.uix.card import MDCard
-from datetime import datetime
 from kivy.core.clipboard import Clipboard
+from app.ui.lista import linha_item, linha_card
+from app.core import datas
 from kivymd.app import MDApp
+import asynckivy as ak
 import re
 
 class HomeScreen(Screen):
@@ -23,6 +21,8 @@ class HomeScreen(Screen):
     def on_enter(self, *args):
         """Chamado sempre que a tela é exibida."""
         self.load_user_data()
+        # Vínculo revalidado por trás (ex: feito em outro aparelho): mostra/esconde o card
+        self.escopo.ao_atualizar(r"^/paciente/\d+/psicologo$", lambda *args: self.load_user_data())
 
 
     def load_user_data(self):
@@ -30,6 +30,9 @@ class HomeScreen(Screen):
         Carrega o NOME do paciente e verifica se ele JÁ TEM VÍNCULO
         para esconder o card de vincular.
         """
+        self.escopo.start(self._load_user_data)
+
+    async def _load_user_data(self, db):
         try:
             # --- 1. Carregar nome de usuário ---
             if hasattr(self.manager.app, 'logged_user_name'):
@@ -40,7 +43,6 @@ class HomeScreen(Screen):
                 self.ids.id_label.text = "Bem-vindo(a), Paciente"
 
             # --- 2. Verificar Vínculo Existente ---
-            db = self.manager.app.db
             paciente_id = self.manager.app.logged_user_id
             card = self.ids.vincula_card
 
@@ -52,8 +54,14 @@ class HomeScreen(Screen):
                 card.disabled = False
                 return
 
-            # Busca o ID do psicólogo vinculado
-            psicologo_id = db.get_psicologo_id_by_paciente(paciente_id)
+            # Vínculo e notificações (o sino) numa ida e volta só
+            app = self.manager.app
+            psicologo_id, notificacoes_mudaram = await db.em_lote(
+                ("get_psicologo_id_by_paciente", paciente_id),
+                (app.sync_engine.sync, "notificacoes", paciente_id),
+            )
+            if notificacoes_mudaram:
+                app.notificacoes.recarregar()
 
             if psicologo_id:
                 # PACIENTE JÁ VINCULADO: Esconder o card
@@ -90,11 +98,13 @@ class HomeScreen(Screen):
             self.show_popup("Erro", "Por favor, digite o código de convite.")
             return
 
-        # Pega a instância do banco de dados
-        db = self.manager.app.db
+        ak.start(self._vincula(paciente_id, codigo))
+
+    async def _vincula(self, paciente_id, codigo):
+        db = self.manager.app.async_db
         
         # Chama a nova função da base de dados
-        success, msg = db.vincular_paciente_por_codigo(paciente_id, codigo)
+        success, msg = await db.vincular_paciente_por_codigo(paciente_id, codigo)
 
         if success:
             self.show_popup("Sucesso!", msg)
@@ -131,30 +141,6 @@ class HomeScreen(Screen):
         if self.dialog:
             self.dialog.dismiss()
 
-    def check_new_notifications(self):
-        """Verifica se há mensagens não lidas para mudar o ícone."""
-        try:
-            db = self.manager.app.db
-            user_id = self.manager.app.logged_user_id
-            
-            # Pega todas as notificações
-            notificacoes = db.get_minhas_notificacoes(user_id)
-            
-            # Verifica se existe alguma onde 'lida' é False
-            # A API retorna dict: {'lida': False, ...}
-            tem_novas = any(n['lida'] is False for n in notificacoes)
-            
-            botao = self.ids.btn_notificacao
-            if tem_novas:
-                botao.icon = "bell-badge" # Ícone com bolinha
-                botao.icon_color = [1, 0, 0, 1] # Vermelho (Destaque)
-            else:
-                botao.icon = "bell-outline" # Ícone normal
-                botao.icon_color = [1, 1, 1, 1] # Branco
-                
-        except Exception as e:
-            print(f"Erro ao checar notificações: {e}")
-
 class AgendamentoScreen(Screen):
     dialog = None # Importante: Inicialize a variável
 
@@ -163,33 +149,56 @@ class AgendamentoScreen(Screen):
 
     # ... (Mantenha sua função carregar_horarios igual ao que fizemos antes) ...
     def carregar_horarios(self):
-        container = self.ids.container_horarios
-        container.clear_widgets()
+        self.escopo.start(self._carregar_horarios)
+
+    @staticmethod
+    def _horarios_visiveis(agenda, paciente_id):
+        """Horários livres (x[2] is None) ou agendados por MIM (x[2] == paciente_id)."""
+        return [h for h in agenda if h[2] is None or h[2] == paciente_id]
+
+    async def _carregar_horarios(self, db):
+        app = self.manager.app
+        sync = app.sync_engine
+        paciente_id = app.logged_user_id
+
+        # 1. Pinta na hora com a agenda guardada no aparelho
+        psicologo_local = sync.psicologo_do_paciente(paciente_id)
+        pintou_local = False
+        if psicologo_local:
+            horarios_local = self._horarios_visiveis(sync.local("agenda", psicologo_local), paciente_id)
+            if horarios_local:
+                self.render_horarios(horarios_local, paciente_id)
+                pintou_local = True
         
-        db = self.manager.app.db
-        paciente_id = self.manager.app.logged_user_id
-        
-        psicologo_id = db.get_psicologo_id_by_paciente(paciente_id) 
+        psicologo_id = await db.get_psicologo_id_by_paciente(paciente_id) 
         
         if not psicologo_id:
-            container.add_widget(MDLabel(text="Você ainda não tem psicólogo vinculado.", halign="center"))
+            if pintou_local:
+                return # Sem rede: mantém o que já está na tela
+            self.ids.container_horarios.mostrar([], vazio="Você ainda não tem psicólogo vinculado.")
             return
 
-        # Chama a função correta passando o MEU ID
-        horarios = db.get_horarios_paciente(psicologo_id, paciente_id)
-        
-        if not horarios:
-            container.add_widget(MDLabel(text="Nenhum horário disponível.", halign="center"))
+        # 2. Atualiza a cópia local e repinta só se algo mudou
+        if psicologo_id != psicologo_local:
+            await db.run(sync.lembrar_psicologo, paciente_id, psicologo_id)
+        mudou = await db.run(sync.sync, "agenda", psicologo_id)
+
+        if pintou_local and psicologo_id == psicologo_local and not mudou:
             return
 
-        for ag_id, data_texto, id_quem_agendou in horarios:
-            try:
-                dt_obj = datetime.fromisoformat(data_texto)
-            except ValueError:
-                dt_obj = datetime.strptime(data_texto, "%Y-%m-%d %H:%M:%S")
-            
-            data_fmt = dt_obj.strftime("%d/%m - %H:%M") 
+        self.render_horarios(self._horarios_visiveis(sync.local("agenda", psicologo_id), paciente_id), paciente_id)
 
+    def mostrar_agenda_local(self, psicologo_id):
+        """Repinta com a agenda guardada no aparelho (ex: depois de um evento do canal de push)."""
+        app = self.manager.app
+        paciente_id = app.logged_user_id
+        self.render_horarios(self._horarios_visiveis(app.sync_engine.local("agenda", psicologo_id), paciente_id), paciente_id)
+
+    def render_horarios(self, horarios, paciente_id):
+        linhas = []
+        # Horários da agenda já são hora local: formata como vieram
+        datas_fmt = datas.formatar_lote([h[1] for h in horarios], "%d/%m - %H:%M", local=False)
+        for (ag_id, data_texto, id_quem_agendou), data_fmt in zip(horarios, datas_fmt):
             e_meu_agendamento = (id_quem_agendou == paciente_id)
 
             if e_meu_agendamento:
@@ -197,42 +206,22 @@ class AgendamentoScreen(Screen):
                 texto_status = f"{data_fmt} (Confirmado)"
                 icone = "calendar-check"
                 # AGORA VAI FUNCIONAR PORQUE ADICIONAMOS A FUNÇÃO ABAIXO
-                acao = lambda x: self.show_popup("Agendado", "Você já garantiu este horário.")
+                acao = lambda: self.show_popup("Agendado", "Você já garantiu este horário.")
             else:
                 cor_fundo = [1, 1, 1, 1] # Branco
                 texto_status = data_fmt
                 icone = "calendar-plus"
-                acao = lambda x, i=ag_id, d=data_fmt: self.confirmar_agendamento(i, d)
-
-            card = MDCard(
-                style="elevated",
-                size_hint_y=None,
-                height="80dp",
-                padding="15dp",
-                radius=[15],
-                ripple_behavior=True,
-                theme_bg_color="Custom",
-                md_bg_color=cor_fundo,
-                on_release=acao
-            )
-            
-            layout = MDBoxLayout(orientation="horizontal", spacing="15dp")
-            layout.add_widget(MDIcon(
-                icon=icone, 
-                pos_hint={"center_y": .5},
-                theme_text_color="Custom",
-                text_color=[0,0,0,1] if not e_meu_agendamento else [1,1,1,1]
-            ))
-            layout.add_widget(MDLabel(
-                text=texto_status,
-                font_style="Title", 
-                role="medium", 
-                pos_hint={"center_y": .5},
-                theme_text_color="Custom",
-                text_color=[0,0,0,0.8] if not e_meu_agendamento else [1,1,1,1]
+                acao = lambda i=ag_id, d=data_fmt: self.confirmar_agendamento(i, d)
+
+            linhas.append(linha_card(
+                texto_status,
+                icone=icone,
+                cor_fundo=cor_fundo,
+                cor_texto=[0,0,0,0.8] if not e_meu_agendamento else [1,1,1,1],
+                ao_tocar=acao
             ))
-            card.add_widget(layout)
-            container.add_widget(card)
+
+        self.ids.container_horarios.mostrar(linhas, vazio="Nenhum horário disponível.")
 
     def confirmar_agendamento(self, agenda_id, data_texto):
         self.dialog = MDDialog(
@@ -246,14 +235,16 @@ class AgendamentoScreen(Screen):
         self.dialog.open()
 
     def finalizar_agendamento(self, agenda_id):
-        db = self.manager.app.db
+        if self.dialog:
+            self.dialog.dismiss()
+        ak.start(self._finalizar_agendamento(agenda_id))
+
+    async def _finalizar_agendamento(self, agenda_id):
+        db = self.manager.app.async_db
         paciente_id = self.manager.app.logged_user_id
         
-        success, msg = db.agendar_consulta(agenda_id, paciente_id)
+        success, msg = await db.agendar_consulta(agenda_id, paciente_id)
         
-        if self.dialog:
-            self.dialog.dismiss()
-            
         if success:
             self.show_popup("Sucesso", msg)
             self.carregar_horarios() # Recarrega a lista para ficar verde
@@ -289,58 +280,40 @@ class NotificationScreen(Screen):
     dialog = None # Inicializa variável do dialog
 
     def on_enter(self):
+        # A lista vem do NotificacaoStore do app: repinta sozinha quando ele muda
+        store = MDApp.get_running_app().notificacoes
+        store.unbind(itens=self._on_itens)
+        store.bind(itens=self._on_itens)
+        self.render_notificacoes(store.itens)
         self.carregar_notificacoes()
 
-    def carregar_notificacoes(self):
-        container = self.ids.container_notificacoes
-        container.clear_widgets()
+    def on_leave(self):
+        # Saiu da lista: tudo o que estava nela foi visto
+        store = MDApp.get_running_app().notificacoes
+        store.unbind(itens=self._on_itens)
+        ak.start(store.marcar_lidas())
 
-        # ACESSO CORRETO AO BANCO DE DADOS
-        app = MDApp.get_running_app() # Forma segura de pegar o app
-        db = app.db
-        user_id = app.logged_user_id
-        
-        # 1. Busca e marca como lidas
-        notificacoes = db.get_minhas_notificacoes(user_id)
-        
-        # Marca como lida apenas se tiver alguma não lida
-        tem_nao_lida = any(not n['lida'] for n in notificacoes)
-        if tem_nao_lida:
-            db.marcar_notificacoes_lidas(user_id)
+    def _on_itens(self, store, itens):
+        self.render_notificacoes(itens)
 
-        if not notificacoes:
-            container.add_widget(MDLabel(text="Nenhuma notificação.", halign="center", pos_hint={"center_y": .5}))
-            return
+    def carregar_notificacoes(self):
+        ak.start(MDApp.get_running_app().notificacoes.atualizar())
 
+    def render_notificacoes(self, notificacoes):
+        linhas = []
         for n in notificacoes:
-            # ... (O resto do seu código de criar MDListItem está perfeito) ...
-            # Mantenha exatamente como você fez:
             n_id = n['id']
-            icon_name = "email-open" if n['lida'] else "email-alert"
-            icon_color = [0.5, 0.5, 0.5, 1] if n['lida'] else [0.29, 0.62, 0.22, 1]
-            
-            item = MDListItem(
-                MDListItemLeadingIcon(
-                    icon=icon_name, 
-                    theme_icon_color="Custom",
-                    icon_color=icon_color
-                ),
-                MDListItemHeadlineText(text=n['titulo']),
-                MDListItemSupportingText(text=n['mensagem']),
-                radius=[15],
-                theme_bg_color="Custom",
-                md_bg_color=[1, 1, 1, 1],
-                ripple_effect=True,
-                on_release=lambda x, t=n['titulo'], m=n['mensagem']: self.ver_detalhes(t, m)
-            )
-            
-            btn_del = MDIconButton(
-                icon="close",
-                pos_hint={"center_y": .5},
-                on_release=lambda x, i=n_id: self.deletar(i)
-            )
-            item.add_widget(btn_del)
-            container.add_widget(item)
+            linhas.append(linha_item(
+                n['titulo'],
+                n['mensagem'],
+                icone="email-open" if n['lida'] else "email-alert",
+                cor_icone=[0.5, 0.5, 0.5, 1] if n['lida'] else [0.29, 0.62, 0.22, 1],
+                ao_tocar=lambda t=n['titulo'], m=n['mensagem']: self.ver_detalhes(t, m),
+                icone_acao="close",
+                ao_acionar=lambda i=n_id: self.deletar(i)
+            ))
+
+        self.ids.container_notificacoes.mostrar(linhas, vazio="Nenhuma notificação.")
 
     def ver_detalhes(self, titulo, mensagem):
         """Abre um pop-up com a mensagem completa e opção de copiar."""
@@ -387,9 +360,7 @@ class NotificationScreen(Screen):
             self.show_aviso("Copiado", "Mensagem completa copiada.")
 
     def deletar(self, notif_id):
-        db = self.manager.app.db
-        if db.deletar_notificacao(notif_id):
-            self.carregar_notificacoes()
+        ak.start(MDApp.get_running_app().notificacoes.deletar(notif_id))
 
     def show_aviso(self, titulo, msg):
         # Pop-up simples de feedback
@@ -1,10 +1,9 @@
-import threading
 import webbrowser
-import base64
-from io import BytesIO
-from kivy.core.image import Image as CoreImage
+import asynckivy as ak
+from kivy.graphics.texture import Texture
+from kivy.metrics import dp
+from kivy.utils import get_color_from_hex
 from kivymd.uix.screen import MDScreen
-from kivy.clock import Clock
 from datetime import datetime
 
 from kivymd.uix.dialog import (
@@ -19,16 +18,11 @@ from kivymd.uix.textfield import (
     MDTextFieldLeadingIcon,
     MDTextFieldHintText,
 )
-from kivymd.uix.list import (
-    MDListItem, 
-    MDListItemLeadingIcon, 
-    MDListItemHeadlineText, 
-    MDListItemSupportingText
-)
-from kivymd.uix.button import MDButton, MDButtonText, MDIconButton
+from kivymd.uix.button import MDButton, MDButtonText
 from kivymd.uix.progressindicator import MDCircularProgressIndicator
-from kivymd.uix.label import MDLabel
-from kivy.properties import StringProperty
+from app.ui.lista import linha_item, linha_cabecalho, linha_mensagem
+from app.ui.graficos import GraficoEvolucao, GraficoBarras  # noqa: F401 - só para a Factory do Kivy (home_psicologo.kv)
+from app.core import datas
 
 class PsychoHomeScreen(MDScreen):
     dialog = None 
@@ -39,6 +33,8 @@ class PsychoHomeScreen(MDScreen):
         """Chamado sempre que a tela é exibida."""
         self.load_user_data()
         self.load_dashboard_data()
+        # Cache revalidado por trás trouxe números novos: repinta os cards
+        self.escopo.ao_atualizar(r"^/psicologo/\d+/stats$", lambda *args: self.load_dashboard_data())
 
     def load_user_data(self):
         """Carrega o NOME e ID do psicólogo logado."""
@@ -55,30 +51,20 @@ class PsychoHomeScreen(MDScreen):
             self.ids.id_label.text = "Bem-vindo"
 
     def load_dashboard_data(self):
-        """Inicia thread para atualizar cards."""
+        """Dispara a atualização dos cards sem travar a UI."""
         # Define textos de "carregando..." na propriedade 'subtitle' dos cards
         self.ids.patient_summary_card.subtitle = "Contando pacientes..."
         
-        try:
-            psicologo_id = self.manager.app.logged_user_id
-            threading.Thread(
-                target=self._thread_load_dashboard,
-                args=(psicologo_id,),
-                daemon=True
-            ).start()
-        except Exception as e:
-            print(f"Erro ao iniciar thread: {e}")
+        psicologo_id = self.manager.app.logged_user_id
+        self.escopo.start(self._load_dashboard, psicologo_id)
 
-    def _thread_load_dashboard(self, psicologo_id):
+    async def _load_dashboard(self, db, psicologo_id):
         try:
-            db = self.manager.app.db
-            
-            # 1. Busca contagem
-            success_count, count = db.get_patient_count(psicologo_id)
-            print(f"[DEBUG] Success: {success_count}, Count: {count}") # <--- DEBUG
-
-            # 2. Busca próxima consulta
-            success_appt, next_appt = db.get_next_appointment(psicologo_id)
+            # Contagem e próxima consulta numa ida e volta só
+            (success_count, count), (success_appt, next_appt) = await db.em_lote(
+                ("get_patient_count", psicologo_id),
+                ("get_next_appointment", psicologo_id),
+            )
 
             # Prepara os textos
             if success_count:
@@ -94,22 +80,14 @@ class PsychoHomeScreen(MDScreen):
             # Lógica da próxima consulta (Mantém igual)
             if success_appt and next_appt:
                 data_iso, paciente_nome = next_appt
-                try:
-                    data_limpa = str(data_iso).replace('Z', '')
-                    if 'T' in data_limpa:
-                        dt = datetime.fromisoformat(data_limpa)
-                    else:
-                        dt = datetime.strptime(data_limpa, "%Y-%m-%d %H:%M:%S")
-                    data_formatada = dt.strftime("%d/%m às %H:%M")
-                    data_ui['appt_text'] = f"{data_formatada} - {paciente_nome}"
-                except Exception as e:
-                    data_ui['appt_text'] = f"{data_iso} - {paciente_nome}"
+                data_formatada = datas.formatar(data_iso, "%d/%m às %H:%M", local=False)
+                data_ui['appt_text'] = f"{data_formatada} - {paciente_nome}"
             
-            # Atualiza a UI
-            Clock.schedule_once(lambda dt: self._update_dashboard_ui(data_ui))
+            # Atualiza a UI (já estamos de volta na thread principal)
+            self._update_dashboard_ui(data_ui)
             
         except Exception as e:
-            print(f"Erro na thread dashboard: {e}")
+            print(f"Erro ao carregar dashboard: {e}")
 
     def _update_dashboard_ui(self, data_ui):
         # Garante que os IDs existem antes de tentar atualizar
@@ -156,16 +134,16 @@ class PsychoHomeScreen(MDScreen):
         self.close_dialog()
         self.show_loading_dialog("Enviando...")
         
-        # Roda em thread para não travar a tela
-        threading.Thread(target=self._processar_envio, args=(psicologo_id, paciente_email)).start()
+        # Roda fora da thread da UI para não travar a tela
+        ak.start(self._processar_envio(psicologo_id, paciente_email))
 
-    def _processar_envio(self, uid, email):
-        db = self.manager.app.db
+    async def _processar_envio(self, uid, email):
+        db = self.manager.app.async_db
         # Chama a API
-        success, msg = db.enviar_convite(uid, email)
+        success, msg = await db.enviar_convite(uid, email)
         
         # Volta para a UI
-        Clock.schedule_once(lambda dt: self._pos_envio(msg))
+        self._pos_envio(msg)
 
     def _pos_envio(self, msg):
         self.dismiss_loading_dialog()
@@ -218,10 +196,13 @@ class PsychoHomeScreen(MDScreen):
             self.show_ok_dialog("Erro", "O nome da atividade não pode ser vazio.")
             return
 
+        ak.start(self._salvar_nova_atividade(texto_atividade))
+
+    async def _salvar_nova_atividade(self, texto_atividade):
         try:
-            db = self.manager.app.db
-            # Chama a função do banco (veja o passo 3 abaixo)
-            success, msg = db.adicionar_atividade_template(texto_atividade)
+            db = self.manager.app.async_db
+            psicologo_id = self.manager.app.logged_user_id
+            success, msg = await db.adicionar_atividade_template(texto_atividade, psicologo_id)
 
             self.close_add_dialog() # Fecha o diálogo de input
 
@@ -261,54 +242,34 @@ class PsychoHomeScreen(MDScreen):
 
 class PatientListScreen(MDScreen):
     def on_enter(self, *args):
-        Clock.schedule_once(self.load_patients)
+        self.load_patients()
+        self.escopo.ao_atualizar(r"^/psicologo/\d+/pacientes$", self.load_patients)
 
     def load_patients(self, *args):
-        list_widget = self.ids.patient_list_container
-        list_widget.clear_widgets()
+        self.escopo.start(self._load_patients)
+
+    async def _load_patients(self, db):
+        lista = self.ids.patient_list_container
         
         try:
-            db = self.manager.app.db
             psicologo_id = self.manager.app.logged_user_id
-            pacientes = db.get_pacientes_do_psicologo(psicologo_id)
-
-            if not pacientes:
-                # Cria um label simples se não tiver pacientes
-                lbl = MDLabel(
-                    text="Nenhum paciente vinculado.", 
-                    halign="center", 
-                    theme_text_color="Secondary"
-                )
-                list_widget.add_widget(lbl)
-                return
-
-            for paciente_id, nome_paciente in pacientes:
-                # --- AQUI ESTAVA O PROBLEMA ---
-                # Criamos o item da lista de forma limpa
-                item = MDListItem(
-                    MDListItemLeadingIcon(
-                        icon="account-circle",
-                        theme_icon_color="Custom",
-                        icon_color=[0.57, 0.78, 0.64, 1] # Verde do tema
-                    ),
-                    MDListItemHeadlineText(text=nome_paciente),
-                    MDListItemSupportingText(text=f"ID: {paciente_id}"),
-                    
-                    # Propriedades visuais seguras
-                    # radius=[15], # Comente se der erro de lista/float
-                    theme_bg_color="Custom",
-                    md_bg_color=[1, 1, 1, 1], # Branco
-                    ripple_effect=True, # Efeito de clique
-                    
-                    # Evento de clique (Lambda correto)
-                    on_release=lambda x, pid=paciente_id, pname=nome_paciente: self.view_patient_details(pid, pname)
+            pacientes = await db.get_pacientes_do_psicologo(psicologo_id)
+
+            # Só os dados das linhas; a lista cria widgets apenas para o que está visível
+            lista.mostrar([
+                linha_item(
+                    nome_paciente,
+                    f"ID: {paciente_id}",
+                    icone="account-circle",
+                    cor_icone=[0.57, 0.78, 0.64, 1], # Verde do tema
+                    ao_tocar=lambda pid=paciente_id, pname=nome_paciente: self.view_patient_details(pid, pname)
                 )
-                
-                list_widget.add_widget(item)
+                for paciente_id, nome_paciente in pacientes
+            ], vazio="Nenhum paciente vinculado.")
 
         except Exception as e:
             print(f"Erro lista pacientes: {e}")
-            list_widget.add_widget(MDLabel(text="Erro ao carregar lista.", halign="center"))
+            lista.mostrar([], vazio="Erro ao carregar lista.")
 
     def view_patient_details(self, paciente_id, nome_paciente):
         """
@@ -336,126 +297,129 @@ class RelatorioPacienteScreen(MDScreen):
             self.carregar_dados(paciente_id)
 
     def limpar_tela(self):
-        self.ids.img_evolucao.texture = None
-        self.ids.img_distribuicao.texture = None
-        self.ids.img_atividades.texture = None
+        for grafico in self.graficos().values():
+            grafico.limpar()
         self.ids.lbl_resumo.text = "Carregando análise..."
 
+    def graficos(self):
+        return {
+            'evolucao': self.ids.grafico_evolucao,
+            'distribuicao': self.ids.grafico_distribuicao,
+            'atividades': self.ids.grafico_atividades,
+        }
+
     def carregar_dados(self, paciente_id):
-        # Thread para não travar o app enquanto baixa as imagens
-        threading.Thread(target=self._fetch_data_thread, args=(paciente_id,), daemon=True).start()
+        # Busca fora da thread da UI
+        # Outro paciente no lugar (ou saiu da tela): o pedido anterior é abandonado
+        self.escopo.start(self._fetch_data, paciente_id)
 
-    def _fetch_data_thread(self, pid):
+    async def _fetch_data(self, db, pid):
         try:
-            import requests
-            
-            # --- CORREÇÃO FINAL DA CONEXÃO ---
-            # Aqui é o pulo do gato: Em vez de tentar adivinhar a URL, 
-            # pegamos EXATAMENTE a mesma URL que o arquivo 'neon.py' está usando.
-            # Se neon.py estiver localhost, usa localhost. Se estiver Render, usa Render.
-            
-            base_url = "https://api-tcc-cognitive.vercel.app/"  #"http://127.0.0.1:8000" # Fallback
-            
-            if hasattr(self.manager.app, 'db') and hasattr(self.manager.app.db, 'base_url'):
-                 base_url = self.manager.app.db.base_url
-            if not base_url.endswith('/'): base_url += '/'
-            
-            # 1. Busca Análise Principal (Texto + Gráficos Antigos)
-            url_analise = f"{base_url}relatorios/analise/{pid}"
-            resp_analise = requests.get(url_analise)
-            data_analise = resp_analise.json() if resp_analise.status_code == 200 else {}
-
-            # 2. Busca Gráfico de Atividades (NOVO)
-            url_atividades = f"{base_url}relatorios/grafico_atividades/{pid}"
-            resp_ativ = requests.get(url_atividades)
-            data_ativ = resp_ativ.json() if resp_ativ.status_code == 200 else {}
-
-            # Junta tudo num dicionário só para atualizar a tela
-            dados_finais = {
-                **data_analise, 
-                'grafico_atividades': data_ativ.get('base64')
-            }
-            
-            Clock.schedule_once(lambda dt: self._update_ui(dados_finais))
+            app = self.manager.app
+            relatorios = app.relatorios
+
+            # O usuário pode ter aberto outro paciente enquanto carregava
+            ainda_aberto = lambda: getattr(app, 'paciente_em_analise_id', None) == pid
+
+            # 1. Mostra na hora o relatório guardado no aparelho (se houver)
+            guardado = await db.run(relatorios.do_cache, pid)
+            versao_guardada, relatorio = guardado or (None, None)
+            if guardado and ainda_aberto():
+                self._update_ui(relatorio)
+
+            # 2. Só gera de novo se o paciente escreveu algo desde então
+            ok, versao = await db.run(relatorios.versao_atual, pid)
+            if guardado and (not ok or versao == versao_guardada):
+                return # Sem rede ou nada mudou: o guardado vale
+
+            # 3. Só os números; os gráficos são desenhados aqui no tamanho da tela
+            relatorio = await db.run(relatorios.dados, pid)
+
+            # API sem os agregados: as duas buscas de PNG (e a decodificação) correm ao mesmo tempo
+            if relatorio is None:
+                analise, atividades = await ak.wait_all(
+                    db.run(relatorios.analise, pid),
+                    db.run(relatorios.grafico_atividades, pid),
+                )
+                relatorio = {**analise.result, 'atividades': atividades.result}
+
+            # Falhou e já tem algo guardado na tela: mantém o guardado
+            resumo = relatorio.get('resumo_texto')
+            if ainda_aberto() and (resumo is not None or not guardado):
+                self._update_ui(relatorio)
+
+            if ok and resumo is not None:
+                await db.run(relatorios.guardar, pid, versao, relatorio)
                 
         except Exception as e:
-            err_msg = str(e)
-            Clock.schedule_once(lambda dt: self._show_error(err_msg))
+            self._show_error(str(e))
 
-    def _update_ui(self, data):
+    def _update_ui(self, relatorio):
         # 1. Atualiza Texto
-        self.ids.lbl_resumo.text = data.get('resumo_texto', 'Sem dados de resumo.')
-
-        # 2. Atualiza Gráficos Antigos
-        if data.get('grafico_evolucao_base64'):
-            self.aplicar_grafico(self.ids.img_evolucao, data['grafico_evolucao_base64'])
-            
-        if data.get('grafico_distribuicao_base64'):
-            self.aplicar_grafico(self.ids.img_distribuicao, data['grafico_distribuicao_base64'])
-
-        # 3. Atualiza NOVO Gráfico de Atividades
-        if data.get('grafico_atividades'):
-            self.aplicar_grafico(self.ids.img_atividades, data['grafico_atividades'])
-        else:
-            # Se não tiver dados, pode limpar ou por uma imagem padrão
-            self.ids.img_atividades.texture = None
+        self.ids.lbl_resumo.text = relatorio.get('resumo_texto') or 'Sem dados de resumo.'
+
+        # 2. Gráficos: dados agregados quando houver; senão, o PNG da API
+        dados = relatorio.get('dados') or {}
+        bitmaps = dict(relatorio.get('graficos') or {}, atividades=relatorio.get('atividades'))
+        for nome, grafico in self.graficos().items():
+            if nome in dados:
+                grafico.imagem = None
+                grafico.dados = dados[nome]
+            else:
+                grafico.dados = None
+                grafico.imagem = self.criar_textura(bitmaps.get(nome))
 
     def _show_error(self, msg):
         self.ids.lbl_resumo.text = f"Não foi possível gerar o relatório.\n{msg}"
 
-    def aplicar_grafico(self, image_widget, base64_string):
+    def criar_textura(self, bitmap):
+        """Único passo na thread da UI para os PNGs: copia os pixels já decodificados para uma textura."""
+        if bitmap is None:
+            return None
         try:
-            # Decodifica string Base64 para binário
-            data = base64.b64decode(base64_string)
-            data_io = BytesIO(data)
-            
-            # Cria textura Kivy
-            im = CoreImage(data_io, ext='png')
-            
-            # Aplica no widget
-            image_widget.texture = im.texture
+            textura = Texture.create(size=(bitmap.largura, bitmap.altura), colorfmt='rgba')
+            textura.blit_buffer(bitmap.pixels, colorfmt='rgba', bufferfmt='ubyte')
+            return textura
         except Exception as e:
             print(f"Erro ao renderizar imagem: {e}")
+            return None
             
     def view_patient_details_powerBI(self):
+        ak.start(self._abrir_powerbi())
+
+    async def _abrir_powerbi(self):
         # Busca o link na nuvem
-        db = self.manager.app.db
-        link = db.get_powerbi_url() 
+        db = self.manager.app.async_db
+        link = await db.get_powerbi_url()
         if link:
             webbrowser.open(link)
 
-# Classe customizada para o item da lista (suporta eventos de editar/excluir)
-class ActivityListItem(MDListItem):
-    text = StringProperty()
-    
-    def on_edit(self):
-        # Chama a função de editar na tela pai
-        self.parent_screen.show_edit_dialog(self.atividade_id, self.text)
-
-
-    def on_delete(self):
-        # Chama a função de excluir na tela pai
-        self.parent_screen.show_delete_confirmation(self.atividade_id, self.text)
-
-
 class ListAtividadeScreen(MDScreen):
     dialog = None
     def on_enter(self):
         self.carregar_atividades()
+        self.escopo.ao_atualizar(r"^/atividades$", lambda *args: self.carregar_atividades())
 
     def carregar_atividades(self):
-        list_widget = self.ids.lista_selecao_atividades
-        list_widget.clear_widgets()
-        db = self.manager.app.db
-        success, atividades = db.get_atividades_template()
-        
-        if success and atividades:
-            for ativ_id, nome in atividades:
-                item = ActivityListItem()
-                item.text = nome
-                item.atividade_id = ativ_id
-                item.parent_screen = self
-                list_widget.add_widget(item)
+        self.escopo.start(self._carregar_atividades)
+
+    async def _carregar_atividades(self, db):
+        success, atividades = await db.get_atividades_template()
+        if not success:
+            atividades = []
+
+        # Toque no item edita; lixeira exclui
+        self.ids.lista_selecao_atividades.mostrar([
+            linha_item(
+                nome,
+                icone="format-list-bulleted",
+                ao_tocar=lambda i=ativ_id, n=nome: self.show_edit_dialog(i, n),
+                icone_acao="trash-can-outline",
+                cor_acao=[1, 0, 0, 1], # Vermelho
+                ao_acionar=lambda i=ativ_id, n=nome: self.show_delete_confirmation(i, n)
+            )
+            for ativ_id, nome in atividades
+        ])
 
     def show_add_dialog(self):
         self.input_field = MDTextField(MDTextFieldHintText(text="Nome da atividade"), mode="outlined")
@@ -471,12 +435,15 @@ class ListAtividadeScreen(MDScreen):
 
     def salvar_nova(self, *args):
         texto = self.input_field.text.strip()
-        if texto:
-            db = self.manager.app.db
-            psicologo_id = self.manager.app.logged_user_id
-            db.adicionar_atividade_template(texto, psicologo_id)
-            self.carregar_atividades()
         self.dialog.dismiss()
+        if texto:
+            ak.start(self._salvar_nova(texto))
+
+    async def _salvar_nova(self, texto):
+        db = self.manager.app.async_db
+        psicologo_id = self.manager.app.logged_user_id
+        await db.adicionar_atividade_template(texto, psicologo_id)
+        self.carregar_atividades()
 
     # --- EDITAR ---
     def show_edit_dialog(self, ativ_id, texto_atual):
@@ -503,17 +470,18 @@ class ListAtividadeScreen(MDScreen):
     def salvar_edicao(self, ativ_id):
         novo_texto = self.edit_input.text.strip()
         if novo_texto:
-            # --- CÓDIGO REAL ---
-            db = self.manager.app.db
-            success, msg = db.update_atividade_template(ativ_id, novo_texto)
-            
-            if success:
-                self.carregar_atividades() # Atualiza a lista na tela
-            else:
-                print(msg) # (Opcional) Mostre um pop-up de erro aqui se quiser
-                
+            ak.start(self._salvar_edicao(ativ_id, novo_texto))
         self.close_dialog()
 
+    async def _salvar_edicao(self, ativ_id, novo_texto):
+        db = self.manager.app.async_db
+        success, msg = await db.update_atividade_template(ativ_id, novo_texto)
+        
+        if success:
+            self.carregar_atividades() # Atualiza a lista na tela
+        else:
+            print(msg) # (Opcional) Mostre um pop-up de erro aqui se quiser
+
     # --- EXCLUIR ---
     def show_delete_confirmation(self, ativ_id, nome_ativ):
         delete_callback = lambda x: self.confirmar_exclusao(ativ_id)
@@ -530,9 +498,12 @@ class ListAtividadeScreen(MDScreen):
         self.dialog.open()
 
     def confirmar_exclusao(self, ativ_id):
-        # --- CÓDIGO REAL ---
-        db = self.manager.app.db
-        success, msg = db.delete_atividade_template(ativ_id)
+        self.close_dialog()
+        ak.start(self._confirmar_exclusao(ativ_id))
+
+    async def _confirmar_exclusao(self, ativ_id):
+        db = self.manager.app.async_db
+        success, msg = await db.delete_atividade_template(ativ_id)
         
         if success:
             self.carregar_atividades() # Remove o item da tela
@@ -540,8 +511,6 @@ class ListAtividadeScreen(MDScreen):
             # Mostra erro se tentar apagar algo que já foi usado
             # Recomendo criar um dialog simples aqui, mas o print serve para teste
             print(f"Erro: {msg}") 
-            
-        self.close_dialog()
 
     def close_dialog(self, *args):
         if self.dialog:
@@ -552,21 +521,27 @@ class DisponibilidadeScreen(MDScreen):
         self.carregar_agenda()
 
     def carregar_agenda(self):
-        # Limpa as duas listas
-        container_agendados = self.ids.lista_agendados
-        container_livres = self.ids.lista_livres
-        
-        container_agendados.clear_widgets()
-        container_livres.clear_widgets()
-        
-        db = self.manager.app.db
+        self.escopo.start(self._carregar_agenda)
+
+    async def _carregar_agenda(self, db):
+        sync = self.manager.app.sync_engine
         psicologo_id = self.manager.app.logged_user_id
         
-        # Busca tudo do banco
-        todos_horarios = db.get_agenda_psicologo(psicologo_id)
+        # Pinta na hora com a agenda guardada no aparelho
+        todos_horarios = sync.local("agenda", psicologo_id)
+        if todos_horarios:
+            self.render_agenda(todos_horarios)
+
+        # Busca só o que mudou e repinta se precisar
+        mudou = await db.run(sync.sync, "agenda", psicologo_id)
+        if mudou or not todos_horarios:
+            self.render_agenda(sync.local("agenda", psicologo_id))
+
+    def render_agenda(self, todos_horarios):
+        lista = self.ids.lista_agenda
 
         if not todos_horarios:
-            container_livres.add_widget(MDLabel(text="Nenhum horário cadastrado.", halign="center"))
+            lista.mostrar([], vazio="Nenhum horário cadastrado.")
             return
 
         # Separa em duas listas python
@@ -574,68 +549,42 @@ class DisponibilidadeScreen(MDScreen):
         lista_agendados = [h for h in todos_horarios if h[2] is not None]
         lista_livres = [h for h in todos_horarios if h[2] is None]
 
-        # --- PREENCHE AGENDADOS ---
-        if not lista_agendados:
-            container_agendados.add_widget(MDLabel(text="Nenhuma consulta marcada.", theme_text_color="Secondary", font_style="Label", role="medium"))
-        
-        for ag_id, data_hora_texto, pac_id in lista_agendados:
-            data_fmt, hora_fmt = self._formatar_data(data_hora_texto)
-            
-            item = MDListItem(
-                MDListItemLeadingIcon(icon="calendar-check", theme_icon_color="Custom", icon_color=[0, 0.5, 0, 1]), # Ícone verde check
-                MDListItemHeadlineText(text=f"{data_fmt} às {hora_fmt}"),
-                MDListItemSupportingText(text=f"Paciente ID: {pac_id}", theme_text_color="Error"),
-                theme_bg_color="Custom",
-                md_bg_color=[1, 1, 1, 1],
-                radius=[10],
-            )
-            # Botão Cancelar (Lixeira)
-            btn_delete = MDIconButton(
-                icon="close-circle-outline",
-                style="standard",
-                theme_icon_color="Custom",
-                icon_color=[1, 0, 0, 1],
-                pos_hint={"center_y": .5},
-                on_release=lambda x, i=ag_id: self.excluir_horario(i)
-            )
-            item.add_widget(btn_delete)
-            container_agendados.add_widget(item)
+        # Uma lista só, com as duas seções: cabeçalhos também são linhas
+        linhas = [linha_cabecalho("Consultas Confirmadas")]
 
-        # --- PREENCHE LIVRES ---
-        for ag_id, data_hora_texto, pac_id in lista_livres:
-            data_fmt, hora_fmt = self._formatar_data(data_hora_texto)
-            
-            item = MDListItem(
-                MDListItemLeadingIcon(icon="clock-outline"),
-                MDListItemHeadlineText(text=f"{data_fmt} às {hora_fmt}"),
-                MDListItemSupportingText(text="Disponível"),
-                theme_bg_color="Custom",
-                md_bg_color=[1, 1, 1, 1],
-                radius=[10],
-            )
-            # Botão Excluir
-            btn_delete = MDIconButton(
-                icon="trash-can-outline",
-                style="standard",
-                theme_icon_color="Custom",
-                icon_color=[0.5, 0.5, 0.5, 1], # Cinza para horários livres
-                pos_hint={"center_y": .5},
-                on_release=lambda x, i=ag_id: self.excluir_horario(i)
-            )
-            item.add_widget(btn_delete)
-            container_livres.add_widget(item)
+        # Horários da agenda já são hora local: formata como vieram
+        formatar = lambda horarios: datas.formatar_lote([h[1] for h in horarios], "%d/%m/%Y às %H:%M", local=False)
 
-    def _formatar_data(self, data_texto):
-        """Helper para formatar a data sem repetir código"""
-        try:
-            dt_obj = datetime.fromisoformat(data_texto)
-        except ValueError:
-            try:
-                dt_obj = datetime.strptime(data_texto, "%Y-%m-%d %H:%M:%S")
-            except:
-                return data_texto, ""
+        # --- AGENDADOS ---
+        if not lista_agendados:
+            linhas.append(linha_mensagem("Nenhuma consulta marcada.", height=dp(48)))
         
-        return dt_obj.strftime("%d/%m/%Y"), dt_obj.strftime("%H:%M")
+        for (ag_id, data_hora_texto, pac_id), quando in zip(lista_agendados, formatar(lista_agendados)):
+            linhas.append(linha_item(
+                quando,
+                f"Paciente ID: {pac_id}",
+                subtitulo_destaque=True,
+                icone="calendar-check",
+                cor_icone=[0, 0.5, 0, 1], # Ícone verde check
+                cor_fundo=get_color_from_hex("#FFF3E0"), # Fundo levemente laranja para destacar
+                icone_acao="close-circle-outline", # Botão Cancelar
+                cor_acao=[1, 0, 0, 1],
+                ao_acionar=lambda i=ag_id: self.excluir_horario(i)
+            ))
+
+        # --- LIVRES ---
+        linhas.append(linha_cabecalho("Horários Disponíveis (Livres)", secundario=True))
+        for (ag_id, data_hora_texto, pac_id), quando in zip(lista_livres, formatar(lista_livres)):
+            linhas.append(linha_item(
+                quando,
+                "Disponível",
+                icone="clock-outline",
+                icone_acao="trash-can-outline", # Botão Excluir
+                cor_acao=[0.5, 0.5, 0.5, 1], # Cinza para horários livres
+                ao_acionar=lambda i=ag_id: self.excluir_horario(i)
+            ))
+
+        lista.mostrar(linhas)
 
     def adicionar_horario_dialog(self):
         self.data_input = MDTextField(MDTextFieldHintText(text="Data (DD/MM/AAAA)"), mode="outlined")
@@ -654,16 +603,23 @@ class DisponibilidadeScreen(MDScreen):
     def salvar_horario(self, *args):
         try:
             dt_obj = datetime.strptime(f"{self.data_input.text} {self.hora_input.text}", "%d/%m/%Y %H:%M")
-            db = self.manager.app.db
-            psicologo_id = self.manager.app.logged_user_id
-            
-            if db.adicionar_disponibilidade(psicologo_id, dt_obj):
-                self.carregar_agenda()
-                self.dialog.dismiss()
         except ValueError:
             print("Data inválida")
+            return
+        ak.start(self._salvar_horario(dt_obj))
+
+    async def _salvar_horario(self, dt_obj):
+        db = self.manager.app.async_db
+        psicologo_id = self.manager.app.logged_user_id
+        
+        if await db.adicionar_disponibilidade(psicologo_id, dt_obj):
+            self.carregar_agenda()
+            self.dialog.dismiss()
 
     def excluir_horario(self, agenda_id):
-        db = self.manager.app.db
-        if db.excluir_horario(agenda_id):
+        ak.start(self._excluir_horario(agenda_id))
+
+    async def _excluir_horario(self, agenda_id):
+        db = self.manager.app.async_db
+        if await db.excluir_horario(agenda_id):
             self.carregar_agenda()
\ No newline at end of file
@@ -1,6 +1,5 @@
 import re
-import requests
-from kivy.clock import Clock
+import asynckivy as ak
 from kivy.uix.screenmanager import Screen
 from kivy.uix.widget import Widget
 from kivymd.app import MDApp
@@ -49,15 +48,15 @@ class LoginScreen(Screen):
         
         self.show_loading("Autenticando...")
 
-        # Simula delay de rede
-        Clock.schedule_once(lambda dt: self._process_login(email, password), 1.5)
+        # A requisição roda fora da thread da UI; o spinner continua animando
+        ak.start(self._process_login(email, password))
 
-    def _process_login(self, email, password):
+    async def _process_login(self, email, password):
         app = MDApp.get_running_app()
         # Garanta que 'app.db' existe no seu main.py
         auth_system = Auth(app.db)
         
-        success, message, user_type, user_id, username = auth_system.login(email, password)
+        success, message, user_type, user_id, username = await app.async_db.run(auth_system.login, email, password)
 
         self.hide_loading()
 
@@ -65,6 +64,7 @@ class LoginScreen(Screen):
             app.logged_user_id = user_id
             app.logged_user_type = user_type
             app.logged_user_name = username
+            app.entrar(user_id)
             
             self._clear_fields()
 
@@ -1,5 +1,7 @@
 import re
 from app.core.auth import Auth
+from app.core.pool import ESCRITA
+import asynckivy as ak
 from kivy.clock import Clock
 from kivy.uix.screenmanager import Screen
 from kivy.uix.widget import Widget
@@ -151,17 +153,19 @@ class RegisterScreen(Screen):
         self.ids.email_input.error = False
         self.show_loading("Conectando ao servidor...")
 
-        # Chama a função real em uma thread (simulada pelo Clock por enquanto)
-        Clock.schedule_once(lambda dt: self._process_register_real(username, password, email, nascimento, codigo), 0.5)
+        # Chama a função real fora da thread da UI
+        ak.start(self._process_register_real(username, password, email, nascimento, codigo))
 
-    def _process_register_real(self, username, password, email, nascimento, codigo):
+    async def _process_register_real(self, username, password, email, nascimento, codigo):
         app = MDApp.get_running_app()
         
         # Instancia o sistema de Auth passando o banco real
         auth_system = Auth(app.db)
 
         # Tenta registrar
-        success, msg = auth_system.register(
+        success, msg = await app.async_db.run_prioridade(
+            ESCRITA,
+            auth_system.register,
             username=username,
             password=password,
             email=email,
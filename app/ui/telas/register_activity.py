@@ -1,10 +1,10 @@
-import pytz 
-from datetime import datetime
+from app.core import datas
+from app.core.pool import ESCRITA
 from kivy.uix.screenmanager import ScreenManager, Screen
 from kivymd.uix.dialog import MDDialog, MDDialogHeadlineText, MDDialogSupportingText, MDDialogButtonContainer
 from kivymd.uix.button import MDButton, MDButtonText
 from kivy.properties import NumericProperty, ListProperty
-from kivy.clock import Clock 
+import asynckivy as ak
 from kivymd.uix.list import MDListItem, MDListItemHeadlineText, MDListItemTrailingCheckbox
 from kivymd.uix.boxlayout import MDBoxLayout
 from kivy.properties import NumericProperty
@@ -71,16 +71,17 @@ class SentimentoScreen(Screen):
 # --- TELA 2: ATIVIDADES ---
 class RegisterActivityScreen(Screen):
     def on_enter(self, *args):
-        Clock.schedule_once(self.carregar_chips_disponiveis)
+        self.carregar_chips_disponiveis()
 
     def carregar_chips_disponiveis(self, *args):
-        db = self.get_db()
-        if not db: return
+        self.escopo.start(self._carregar_chips_disponiveis)
+
+    async def _carregar_chips_disponiveis(self, db):
 
         list_widget = self.ids.lista_selecao_atividades
-        list_widget.clear_widgets()
 
-        success, atividades = db.get_atividades_template()
+        success, atividades = await db.get_atividades_template()
+        list_widget.clear_widgets()
         
         if not success or not atividades:
             list_widget.add_widget(MDListItem(MDListItemHeadlineText(text="Nenhuma atividade encontrada.")))
@@ -93,6 +94,7 @@ class RegisterActivityScreen(Screen):
             # Checkbox sem grupo (múltipla escolha)
             checkbox = MDListItemTrailingCheckbox()
             checkbox.atividade_id = atv_id
+            checkbox.atividade_nome = texto
             
             item.add_widget(checkbox)
             item.my_checkbox = checkbox
@@ -101,18 +103,17 @@ class RegisterActivityScreen(Screen):
 
     def do_register_activities(self):
         ids_selecionados = []
+        nomes_selecionados = []
         for item in self.ids.lista_selecao_atividades.children:
             if hasattr(item, 'my_checkbox') and item.my_checkbox.active:
                 ids_selecionados.append(item.my_checkbox.atividade_id)
+                nomes_selecionados.append(item.my_checkbox.atividade_nome)
         
         self.manager.app.temp_entry_data['atividades_ids'] = ids_selecionados
+        # Só para mostrar no diário enquanto o registro não chega na API
+        self.manager.app.temp_entry_data['atividades_nomes'] = ", ".join(reversed(nomes_selecionados))
         self.manager.current = 'anotacao_dia'
 
-    def get_db(self):
-        if hasattr(self.manager, 'app') and hasattr(self.manager.app, 'db'):
-            return self.manager.app.db
-        return None
-
 # --- TELA 3: REFLEXÃO ---
 class AnotacaoDiaScreen(Screen):
     
@@ -162,31 +163,34 @@ class AnotacaoDiaScreen(Screen):
             f"7. Vitória: {p6}"
         )
 
-        # 6. Tenta Salvar
+        # 6. Tenta Salvar (fora da thread da UI)
+        ak.start(self._salvar(texto_final))
+
+    async def _salvar(self, texto_final):
         try:
             app = self.manager.app
             user_id = app.logged_user_id
-            db = app.db
             temp = app.temp_entry_data
             
             # Verifica se temos os dados anteriores (Sentimento e Atividades)
             sentimento_id = temp.get('sentimento_id', 1) # Default 1 (Feliz) se der erro
             atividades_ids = temp.get('atividades_ids', [])
 
-            success, msg = db.add_entrada_completa_diario(
+            # Grava no aparelho e deixa a outbox enviar (funciona sem internet)
+            await app.async_db.run_prioridade(
+                ESCRITA,
+                app.outbox.salvar_entrada_diario,
                 user_id, 
-                datetime.now(pytz.utc).isoformat(),
+                datas.agora_iso(),
                 sentimento_id,
                 texto_final,
-                atividades_ids
+                atividades_ids,
+                temp.get('atividades_nomes')
             )
             
-            if success:
-                print("Sucesso: Diário salvo.")
-                self.limpar_campos()
-                self.manager.current = 'home'
-            else:
-                self.show_alert_dialog("Erro ao Salvar", msg)
+            print("Sucesso: Diário salvo.")
+            self.limpar_campos()
+            self.manager.current = 'home'
 
         except Exception as e:
             print(f"Erro crítico ao salvar: {e}")
@@ -0,0 +1,111 @@
+"""
+Benchmark da redução de séries do gráfico de evolução (app/core/amostragem.py).
+
+Compara o que o gráfico faria sem redução (montar os vértices de todos os
+pontos) com amostragem.reduzir + vértices numa largura de 1080 px: primeiro
+nos tamanhos reais (um ponto por dia: 3 meses a 10 anos de diário), depois
+de 10 mil a um milhão de pontos. Mostra também o LTTB sozinho, para ver a
+partir de quantos pontos ele compensa (amostragem.REDUZIR_A_PARTIR). Confere
+o LTTB vetorizado contra uma versão em Python puro e se o maior e o menor
+valor continuam no desenho.
+
+Uso: python benchmarks/bench_amostragem.py [largura]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core import amostragem
+
+
+def gerar_serie(n, seed=42):
+    """Humor médio por dia (1 a 5) com tendência lenta, ruído e alguns picos isolados."""
+    rnd = np.random.default_rng(seed)
+    x = np.arange(n, dtype=float)
+    y = 3 + np.sin(x / 90) + rnd.normal(0, 0.4, n)
+    picos = rnd.choice(n, size=max(1, n // 5000), replace=False)
+    y[picos] += rnd.choice((-2.5, 2.5), size=len(picos))
+    return x, np.clip(y, 0, 6)
+
+
+def vertices(x, y, largura):
+    """O que GraficoEvolucao.desenhar faz com os pontos: escala e intercala x/y."""
+    sx = largura / (x[-1] - x[0])
+    sy = 200 / (y.max() - y.min())
+    return np.column_stack(((x - x[0]) * sx, (y - y.min()) * sy)).ravel().tolist()
+
+
+def lttb_python(x, y, n):
+    """Referência direta do algoritmo, ponto a ponto."""
+    total = len(x)
+    bordas = [int(v) for v in np.linspace(1, total - 1, n - 1)]
+    escolhidos = [0]
+    a = 0
+    for i in range(n - 2):
+        ini, fim = bordas[i], bordas[i + 1]
+        if i + 1 < n - 2:
+            prox = range(bordas[i + 1], bordas[i + 2])
+            cx = sum(x[j] for j in prox) / len(prox)
+            cy = sum(y[j] for j in prox) / len(prox)
+        else:
+            cx, cy = x[-1], y[-1]
+        melhor, area_max = ini, -1.0
+        for j in range(ini, fim):
+            area = abs((x[a] - cx) * (y[j] - y[a]) - (x[a] - x[j]) * (cy - y[a]))
+            if area > area_max:
+                melhor, area_max = j, area
+        a = melhor
+        escolhidos.append(a)
+    escolhidos.append(total - 1)
+    return escolhidos
+
+
+def medir(func, repeticoes=5):
+    melhor = None
+    resultado = None
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        resultado = func()
+        dt = time.perf_counter() - t0
+        melhor = dt if melhor is None else min(melhor, dt)
+    return resultado, melhor
+
+
+def main():
+    largura = int(sys.argv[1]) if len(sys.argv) > 1 else 1080
+    print(f"largura: {largura} px\n")
+    print(f"{'pontos':>10} {'sem redução':>13} {'reduzir+vért.':>14} {'só LTTB+vért.':>14} {'desenhados':>11} {'picos':>6}")
+
+    reais = (90, 365, 1_825, 3_650)   # 3 meses, 1, 5 e 10 anos de diário
+    for n in reais + (10_000, 50_000, 100_000, 1_000_000):
+        if n == 10_000:
+            print()
+        x, y = gerar_serie(n)
+        _, t_todos = medir(lambda: vertices(x, y, largura))
+
+        def reduzido():
+            idx = amostragem.reduzir(x, y, largura)
+            return idx, vertices(x[idx], y[idx], largura)
+
+        def so_lttb():
+            idx = amostragem.lttb(x, y, largura)
+            return vertices(x[idx], y[idx], largura)
+
+        (idx, _), t_reduzido = medir(reduzido)
+        _, t_lttb = medir(so_lttb)
+        picos = y[idx].max() == y.max() and y[idx].min() == y.min()
+        print(f"{n:>10} {t_todos * 1000:>10.2f} ms {t_reduzido * 1000:>11.2f} ms {t_lttb * 1000:>11.2f} ms "
+              f"{len(idx):>11} {'ok' if picos else 'NÃO':>6}")
+
+    # O laço vetorizado precisa escolher exatamente os mesmos pontos
+    x, y = gerar_serie(20_000, seed=7)
+    iguais = list(amostragem.lttb(x, y, largura)) == lttb_python(list(x), list(y), largura)
+    print(f"\nlttb vetorizado == referência em Python: {'sim' if iguais else 'NÃO'}")
+
+
+if __name__ == "__main__":
+    main()
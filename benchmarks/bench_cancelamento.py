@@ -0,0 +1,126 @@
+"""
+Cancelamento de pedidos pelo ciclo de vida da tela (app/core/cancelamento.py
+e EscopoTela em app/core/async_db.py), contra um servidor local que manda
+uma resposta grande devagar (como um relatório com gráficos numa rede ruim).
+
+1. Transport: cancela o token no meio do download e mede em quanto tempo a
+   thread é liberada e quantos bytes chegaram a ser baixados.
+2. EscopoTela: abre o "relatório" de um paciente, troca de paciente antes de
+   chegar (o pedido anterior é substituído) e depois sai da tela. Só o
+   último pedido pode chegar a mexer na "tela".
+
+Uso: python benchmarks/bench_cancelamento.py
+"""
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+os.environ.setdefault("KIVY_NO_CONSOLELOG", "1")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kivy.clock import Clock
+
+from app.core import cancelamento
+from app.core.async_db import AsyncDatabase, EscopoTela
+from app.core.pool import PoolPrioridades
+from app.core.transport import Transport
+
+TAMANHO = 2 * 1024 * 1024      # bytes da resposta
+PEDACO = 32 * 1024
+POR_SEGUNDO = 512 * 1024       # velocidade do "celular"
+
+enviados = []
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(TAMANHO))
+        self.end_headers()
+        total = 0
+        try:
+            while total < TAMANHO:
+                self.wfile.write(b" " * PEDACO)
+                total += PEDACO
+                time.sleep(PEDACO / POR_SEGUNDO)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            enviados.append(total)
+
+
+def esperar(condicao, timeout=10):
+    fim = time.monotonic() + timeout
+    while not condicao() and time.monotonic() < fim:
+        Clock.tick()
+        time.sleep(0.005)
+    return condicao()
+
+
+def main():
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    http = Transport(f"http://127.0.0.1:{servidor.server_address[1]}", retries=0)
+
+    # 1. Cancelar no meio do download
+    token = cancelamento.Token()
+    resultado = {}
+
+    def baixar():
+        inicio = time.perf_counter()
+        try:
+            cancelamento.rodar(token, http.get, "/relatorio")
+            resultado["fim"] = "completo"
+        except cancelamento.Cancelado:
+            resultado["fim"] = "cancelado"
+        resultado["ms"] = (time.perf_counter() - inicio) * 1000
+
+    thread = threading.Thread(target=baixar)
+    thread.start()
+    time.sleep(0.5)
+    cancelado_em = time.perf_counter()
+    token.cancelar()
+    thread.join()
+    liberou = (time.perf_counter() - cancelado_em) * 1000
+    esperar(lambda: enviados, timeout=5)
+    print(f"download completo levaria {TAMANHO / POR_SEGUNDO * 1000:.0f} ms")
+    print(f"cancelado depois de 500 ms: {resultado['fim']}, thread liberada {liberou:.1f} ms após cancelar, "
+          f"servidor parou em {enviados[-1] / 1024:.0f} de {TAMANHO // 1024} KB")
+
+    # 2. Tela: troca de paciente e sai antes de chegar
+    pool = PoolPrioridades(workers=2)
+    db = SimpleNamespace(baixar=lambda pid: (pid, len(http.get("/relatorio").content)))
+    escopo = EscopoTela(AsyncDatabase(db, pool))
+    tela = []
+
+    async def fetch(db, pid):
+        tela.append(await db.baixar(pid))
+
+    enviados.clear()
+    escopo.start(fetch, 1, chave="relatorio")
+    esperar(lambda: False, timeout=0.3)
+    escopo.start(fetch, 2, chave="relatorio")      # outro paciente
+    esperar(lambda: False, timeout=0.3)
+    escopo.cancelar()                               # on_leave
+    esperar(lambda: len(enviados) >= 2, timeout=5)
+    esperar(lambda: pool.metricas()["rodando"] == 0, timeout=5)
+    print(f"\ntela recebeu: {tela or 'nada'} | pedidos ativos: {escopo.ativos} | "
+          f"KB enviados por pedido: {[n // 1024 for n in enviados]}")
+
+    pool.shutdown()
+    servidor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Benchmark da formatação de datas (app/core/datas.py).
+
+Compara o código antigo das telas (fromisoformat/strptime + pytz por linha)
+com datas.formatar_lote sobre 100 mil timestamps.
+
+Uso: python benchmarks/bench_datas.py [quantidade]
+"""
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytz
+
+from app.core import datas
+
+
+def gerar_timestamps(n, seed=42):
+    """Mistura os formatos que aparecem na API: ISO sem fuso, ISO com fuso (UTC) e sem zero à esquerda."""
+    rnd = random.Random(seed)
+    inicio = datetime(2023, 1, 1)
+    saida = []
+    for _ in range(n):
+        dt = inicio + timedelta(seconds=rnd.randint(0, 3 * 365 * 86400))
+        tipo = rnd.random()
+        if tipo < 0.6:
+            saida.append(dt.isoformat())
+        elif tipo < 0.95:
+            saida.append(pytz.utc.localize(dt).isoformat())
+        else:
+            saida.append(f"{dt.year}-{dt.month}-{dt.day}T{dt.hour}:{dt.minute:02d}:{dt.second:02d}")
+    return saida
+
+
+def formatar_antigo(data_iso):
+    """Cópia do que o DiarioScreen fazia por linha."""
+    try:
+        try:
+            dt = datetime.fromisoformat(data_iso)
+        except ValueError:
+            dt = datetime.strptime(data_iso, "%Y-%m-%dT%H:%M:%S")
+        if dt.tzinfo is None:
+            dt = pytz.utc.localize(dt)
+        dt_local = dt.astimezone(pytz.timezone('America/Sao_Paulo'))
+        return dt_local.strftime("%d/%m • %H:%M")
+    except Exception:
+        return data_iso
+
+
+def para_utc(dt):
+    return dt if dt.tzinfo else pytz.utc.localize(dt)
+
+
+def medir(nome, func, repeticoes=3):
+    melhor = None
+    resultado = None
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        resultado = func()
+        dt = time.perf_counter() - t0
+        melhor = dt if melhor is None else min(melhor, dt)
+    print(f"{nome:<34} {melhor * 1000:9.1f} ms")
+    return resultado, melhor
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    valores = gerar_timestamps(n)
+    epochs = [int(para_utc(datas.parse(v)).timestamp()) for v in valores]
+    fmt = "%d/%m • %H:%M"
+    print(f"{n} timestamps\n")
+
+    antigo, t_antigo = medir("antigo (por linha, pytz)", lambda: [formatar_antigo(v) for v in valores])
+
+    # Único cache que passa de um lote para o outro: o offset do fuso por dia
+    datas._offset_exato.cache_clear()
+    datas._offset_por_dia.clear()
+    novo, t_frio = medir("formatar_lote (fuso frio)", lambda: datas.formatar_lote(valores, fmt), repeticoes=1)
+    _, t_quente = medir("formatar_lote (fuso em cache)", lambda: datas.formatar_lote(valores, fmt))
+    _, t_epoch = medir("formatar_lote (epoch int)", lambda: datas.formatar_lote(epochs, fmt))
+
+    # Os dois caminhos precisam mostrar exatamente o mesmo texto
+    divergentes = sum(1 for a, b in zip(antigo, novo) if a != b)
+    print(f"\nresultados diferentes do antigo: {divergentes}")
+    print(f"ganho (fuso em cache): {t_antigo / t_quente:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Vários endereços da API (app/core/endpoints.py e Transport), contra dois
+servidores locais: um "serverless" que dorme (a primeira requisição paga
+uma partida a frio) e um sempre ligado, mais rápido.
+
+1. Primeira interação sem e com aquecer(): a sondagem paga a partida a frio
+   e escolhe o endereço mais rápido antes de o usuário pedir algo.
+2. Disjuntor: o endereço escolhido cai; as leituras passam para o outro e,
+   depois de LIMITE_FALHAS falhas, o caído nem é mais tentado.
+3. Pedido de reserva: o endereço principal às vezes demora (cauda longa);
+   com COGNITIVE_RESERVA_MS o GET lento vai também ao outro endereço.
+
+Uso: python benchmarks/bench_endpoints.py
+"""
+import os
+import socket
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.transport import Transport
+
+PARTIDA_A_FRIO = 1.5   # s
+ACORDADO = 60.0        # s que o serverless fica quente depois de uma requisição
+
+
+class Servidor:
+    def __init__(self, latencia, partida_a_frio=0.0, cauda=None):
+        self.latencia = latencia
+        self.partida_a_frio = partida_a_frio
+        self.cauda = cauda          # (a cada n requisições, latência extra)
+        self.quente_ate = 0.0
+        self.requisicoes = 0
+        self._lock = threading.Lock()
+        servidor = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                time.sleep(servidor._espera())
+                corpo = b'{"ok": true}'
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(corpo)))
+                self.end_headers()
+                self.wfile.write(corpo)
+
+        self.http = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.http.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.http.server_address[1]}"
+        threading.Thread(target=self.http.serve_forever, daemon=True).start()
+
+    def _espera(self):
+        with self._lock:
+            self.requisicoes += 1
+            espera = self.latencia
+            agora = time.monotonic()
+            if agora > self.quente_ate:
+                espera += self.partida_a_frio
+            self.quente_ate = agora + ACORDADO
+            if self.cauda and self.requisicoes % self.cauda[0] == 0:
+                espera += self.cauda[1]
+            return espera
+
+    def derrubar(self):
+        self.http.shutdown()
+        self.http.server_close()
+
+
+def porta_fechada():
+    s = socket.socket()
+    s.bind(("127.0.0.1", 0))
+    porta = s.getsockname()[1]
+    s.close()
+    return f"http://127.0.0.1:{porta}"
+
+
+def ms(inicio):
+    return (time.perf_counter() - inicio) * 1000
+
+
+def primeira_interacao(aquecer):
+    frio = Servidor(0.05, PARTIDA_A_FRIO)       # o primeiro da lista (como a Vercel)
+    ligado = Servidor(0.03)
+    http = Transport([frio.url, ligado.url], retries=0)
+    if aquecer:
+        for futuro in http.aquecer():
+            futuro.result()
+    inicio = time.perf_counter()
+    http.get("/users/1")
+    tempo = ms(inicio)
+    escolhido = "ligado" if http.base_url == ligado.url else "frio"
+    http.close()
+    frio.derrubar()
+    ligado.derrubar()
+    return tempo, escolhido
+
+
+def disjuntor():
+    a, b = Servidor(0.02), Servidor(0.04)
+    http = Transport([a.url, b.url], retries=0, connect_timeout=1)
+    for futuro in http.aquecer():
+        futuro.result()
+    a.derrubar()
+    tempos = []
+    for _ in range(8):
+        inicio = time.perf_counter()
+        http.get("/users/1")
+        tempos.append(ms(inicio))
+    estado = http.endpoints.lista[0]
+    http.close()
+    b.derrubar()
+    return tempos, estado
+
+
+def reserva(atraso):
+    a = Servidor(0.03, cauda=(5, 1.0))          # 1 em cada 5 demora 1 s a mais
+    b = Servidor(0.06)
+    http = Transport([a.url, b.url], retries=0, atraso_reserva=atraso)
+    for futuro in http.aquecer():
+        futuro.result()
+    tempos = []
+    for _ in range(20):
+        inicio = time.perf_counter()
+        res = http.get("/users/1")
+        assert res.json() == {"ok": True}
+        tempos.append(ms(inicio))
+    http.close()
+    a.derrubar()
+    b.derrubar()
+    tempos.sort()
+    return tempos[len(tempos) // 2], tempos[int(len(tempos) * 0.95)], tempos[-1]
+
+
+def main():
+    print(f"1. Primeira interação (partida a frio de {PARTIDA_A_FRIO * 1000:.0f} ms no primeiro endereço)")
+    for aquecer in (False, True):
+        tempo, escolhido = primeira_interacao(aquecer)
+        print(f"   {'com' if aquecer else 'sem'} aquecer(): {tempo:7.1f} ms (endereço {escolhido})")
+
+    print("\n2. Endereço escolhido cai no meio da sessão")
+    tempos, estado = disjuntor()
+    print("   leituras: " + ", ".join(f"{t:.0f}" for t in tempos) + " ms")
+    print(f"   {estado}")
+
+    print("\n3. Cauda longa no endereço principal (1 em 5 com +1 s), 20 leituras")
+    for atraso in (0, 0.15):
+        p50, p95, pior = reserva(atraso)
+        rotulo = f"reserva após {atraso * 1000:.0f} ms" if atraso else "sem reserva"
+        print(f"   {rotulo:22} p50 {p50:6.1f} ms  p95 {p95:7.1f} ms  pior {pior:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Guarda contra regressão no tempo de abertura do app.
+
+1. Importa os módulos de app/core que o main.py importa antes do primeiro
+   quadro (num processo novo, com a linha do tempo ligada) e confere que os
+   módulos pesados carregados sob demanda (pytz, requests, urllib3, PIL, plyer,
+   numpy) continuam fora da abertura.
+2. Com --arquivo, lê a linha do tempo gravada por uma abertura de verdade
+   (COGNITIVE_PERFIL_INICIO=perfil_inicio.json python main.py) e falha se o
+   primeiro quadro passou do orçamento.
+
+Uso: python benchmarks/bench_inicio.py [--arquivo perfil_inicio.json] [--orcamento 1500]
+Sai com código 1 se alguma verificação falhar.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# O que o main.py importa de app/core (async_db e a UI dependem do Kivy, que fica de fora aqui)
+MODULOS_ABERTURA = [
+    "app.core.neon", "app.core.local_store", "app.core.sync", "app.core.outbox",
+    "app.core.notificacoes", "app.core.push", "app.core.relatorios", "app.core.relatorio_cache",
+]
+SOB_DEMANDA = ["pytz", "requests", "urllib3", "PIL", "plyer", "numpy"]
+
+SCRIPT = """
+import json, sys
+from app.core.inicio import perfil
+perfil.ativar()
+with perfil.trecho("imports"):
+    for nome in {modulos!r}:
+        __import__(nome)
+resumo = perfil.resumo()
+resumo["carregados"] = [m for m in {sob_demanda!r} if m in sys.modules]
+json.dump(resumo, open({saida!r}, "w"))
+"""
+
+
+def medir_imports():
+    with tempfile.TemporaryDirectory() as pasta:
+        saida = os.path.join(pasta, "resumo.json")
+        codigo = SCRIPT.format(modulos=MODULOS_ABERTURA, sob_demanda=SOB_DEMANDA, saida=saida)
+        env = dict(os.environ, COGNITIVE_PERFIL_INICIO="0")
+        subprocess.run([sys.executable, "-c", codigo], cwd=RAIZ, env=env, check=True)
+        with open(saida, encoding="utf-8") as f:
+            return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--arquivo", help="linha do tempo gravada pelo app (perfil_inicio.json)")
+    parser.add_argument("--orcamento", type=float, default=1500, help="ms até o primeiro quadro")
+    args = parser.parse_args()
+    ok = True
+
+    resumo = medir_imports()
+    print(f"imports de app/core na abertura: {resumo['imports_ms']:.1f} ms")
+    for e in resumo["imports_mais_lentos"][:5]:
+        print(f"  {e['duracao_ms']:8.2f} ms  {e['etapa']}")
+    if resumo["carregados"]:
+        print(f"REGRESSÃO: carregados na abertura: {', '.join(resumo['carregados'])}")
+        ok = False
+    else:
+        print(f"sob demanda, fora da abertura: {', '.join(SOB_DEMANDA)}")
+
+    if args.arquivo:
+        with open(args.arquivo, encoding="utf-8") as f:
+            linha = json.load(f)
+        primeiro = linha.get("primeiro_quadro_ms")
+        print(f"\n{args.arquivo}: primeiro quadro em {primeiro} ms (orçamento {args.orcamento:.0f} ms)")
+        for etapa, instante in linha.get("marcos", {}).items():
+            print(f"  {instante:9.1f} ms  {etapa}")
+        etapas = [e for e in linha.get("eventos", []) if e["tipo"] == "etapa" and e["nivel"] == 0]
+        for e in sorted(etapas, key=lambda e: -e["duracao_ms"])[:8]:
+            print(f"  {e['duracao_ms']:9.1f} ms  {e['etapa']}")
+        if primeiro is None or primeiro > args.orcamento:
+            print("REGRESSÃO: primeiro quadro acima do orçamento")
+            ok = False
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Cache de regras .kv (app/ui/kv_cache.py): tempo para interpretar todos os .kv
+do app sem cache, na primeira abertura (interpreta e grava) e nas seguintes
+(lê do disco). Confere que as regras lidas do cache são iguais às interpretadas.
+
+Uso: python benchmarks/bench_kv_cache.py [repeticoes]
+"""
+import glob
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+os.environ.setdefault("KIVY_NO_CONSOLELOG", "1")
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from kivy.lang.parser import Parser
+
+from app.ui.kv_cache import CacheKV
+
+
+def resumo_regra(regra):
+    if regra is None:
+        return None
+    return (regra.name, regra.id,
+            [(nome, p.value, p.co_value, p.watched_keys) for nome, p in regra.properties.items()],
+            [(h.name, h.value, h.co_value) for h in regra.handlers],
+            [resumo_regra(filha) for filha in regra.children],
+            resumo_regra(regra.canvas_before), resumo_regra(regra.canvas_root), resumo_regra(regra.canvas_after))
+
+
+def resumo(parser):
+    return [(seletor.key, resumo_regra(regra)) for seletor, regra in parser.rules], parser.dynamic_classes
+
+
+def cronometrar(funcao, arquivos, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        for nome, texto in arquivos:
+            funcao(texto, nome)
+    return (time.perf_counter() - inicio) * 1000 / repeticoes
+
+
+def main():
+    repeticoes = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    arquivos = []
+    for nome in sorted(glob.glob(os.path.join(RAIZ, "app", "ui", "**", "*.kv"), recursive=True)):
+        with open(nome, encoding="utf-8") as f:
+            arquivos.append((nome, f.read()))
+
+    with tempfile.TemporaryDirectory() as pasta:
+        cache = CacheKV(pasta)
+        sem_cache = cronometrar(lambda texto, nome: Parser(content=texto, filename=nome), arquivos, repeticoes)
+        primeira = cronometrar(cache.parser, arquivos, 1)
+        seguintes = cronometrar(cache.parser, arquivos, repeticoes)
+
+        iguais = all(resumo(cache.parser(texto, nome)) == resumo(Parser(content=texto, filename=nome))
+                     for nome, texto in arquivos)
+
+    print(f"{len(arquivos)} arquivos .kv")
+    print(f"sem cache                     {sem_cache:7.1f} ms")
+    print(f"primeira abertura (grava)     {primeira:7.1f} ms")
+    print(f"aberturas seguintes (lê)      {seguintes:7.1f} ms  ({sem_cache / seguintes:.1f}x)")
+    print(f"regras iguais às interpretadas: {'sim' if iguais else 'NÃO'}")
+
+
+if __name__ == "__main__":
+    main()
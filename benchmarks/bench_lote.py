@@ -0,0 +1,148 @@
+"""
+Leituras em lote (app/core/lote.py e Database._enviar_lote) contra uma API
+local que atende uma requisição por vez, como uma instância serverless
+recém-acordada, com latência de celular.
+
+Abre a tela inicial do paciente (vínculo, notificações e dados do usuário)
+duas vezes, de três jeitos, e mede o tempo até ter tudo e quantas
+requisições saíram:
+1. uma chamada depois da outra;
+2. em lote, com a rota /batch na API (uma requisição só);
+3. em lote, numa API sem /batch (a primeira tentativa descobre isso; dali
+   em diante cada leitura vai sozinha, em paralelo).
+Os resultados precisam ser iguais nos três.
+
+Uso: python benchmarks/bench_lote.py [latencia_ms]
+"""
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import wait
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core import lote
+from app.core.neon import Database
+from app.core.pool import PoolPrioridades, VISIVEL
+
+LATENCIA = 0.15
+PACIENTE_ID = 7
+
+ROTAS = {
+    f"/paciente/{PACIENTE_ID}/psicologo": {"psicologo_id": 1},
+    f"/notificacoes/{PACIENTE_ID}": {"notificacoes": [{"id": 1, "titulo": "Oi", "lida": False}]},
+    f"/users/{PACIENTE_ID}": {"username": "Ana", "email": "ana@x", "data_nascimento": "2000-01-01"},
+}
+
+
+def servidor(com_lote):
+    requisicoes = []
+    uma_por_vez = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _responder(self, status, corpo):
+            dados = json.dumps(corpo).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(dados)))
+            self.end_headers()
+            self.wfile.write(dados)
+
+        def do_GET(self):
+            caminho = urlsplit(self.path).path
+            with uma_por_vez:
+                requisicoes.append(caminho)
+                time.sleep(LATENCIA)
+            self._responder(200 if caminho in ROTAS else 404, ROTAS.get(caminho, {}))
+
+        def do_POST(self):
+            corpo = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            with uma_por_vez:
+                requisicoes.append(self.path)
+                time.sleep(LATENCIA)
+            if not com_lote or self.path != lote.ROTA:
+                return self._responder(404, {"detail": "Not Found"})
+            respostas = [{"status": 200 if p["path"] in ROTAS else 404, "body": ROTAS.get(p["path"], {})}
+                         for p in corpo["requests"]]
+            self._responder(200, {"responses": respostas})
+
+    s = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    s.daemon_threads = True
+    threading.Thread(target=s.serve_forever, daemon=True).start()
+    return s, f"http://127.0.0.1:{s.server_address[1]}", requisicoes
+
+
+CHAMADAS = [
+    ("get_psicologo_id_by_paciente", PACIENTE_ID),
+    ("get_alteracoes", f"/notificacoes/{PACIENTE_ID}"),
+    ("get_user_details", PACIENTE_ID),
+]
+
+
+def abrir(db, pool, em_lote):
+    inicio = time.perf_counter()
+    if em_lote:
+        grupo = lote.Lote(len(CHAMADAS))
+        futures = [pool.enviar(VISIVEL, lote.rodar, grupo, getattr(db, nome), *args) for nome, *args in CHAMADAS]
+        wait(futures)
+        resultados = [f.result() for f in futures]
+    else:
+        resultados = [pool.enviar(VISIVEL, getattr(db, nome), *args).result() for nome, *args in CHAMADAS]
+    return (time.perf_counter() - inicio) * 1000, resultados
+
+
+def medir(com_lote_na_api, em_lote):
+    s, url, requisicoes = servidor(com_lote_na_api)
+    db = Database(url)
+    pool = PoolPrioridades()
+    db.pool = pool
+    # Conexões já abertas (como depois do login), para medir só as idas e voltas
+    wait([pool.enviar(VISIVEL, db.http.get, "/aquecer") for _ in range(pool.workers)])
+    requisicoes.clear()
+
+    ms, resultados = abrir(db, pool, em_lote)
+    n = len(requisicoes)
+    # Segunda abertura (sem cache: as rotas não têm política): sem /batch, a API já é conhecida
+    db.clear_cache()
+    requisicoes.clear()
+    ms2, resultados2 = abrir(db, pool, em_lote)
+    pool.shutdown()
+    db.http.close()
+    s.shutdown()
+    return (ms, n), (ms2, len(requisicoes)), resultados if resultados == resultados2 else None
+
+
+def main():
+    global LATENCIA
+    if len(sys.argv) > 1:
+        LATENCIA = float(sys.argv[1]) / 1000
+    print(f"API com {LATENCIA * 1000:.0f} ms por requisição, uma por vez; {len(CHAMADAS)} leituras\n")
+
+    cenarios = [
+        ("uma depois da outra", True, False),
+        ("em lote (API com /batch)", True, True),
+        ("em lote (API sem /batch)", False, True),
+    ]
+    base = None
+    ok = True
+    for nome, com_lote_na_api, em_lote in cenarios:
+        (ms, n), (ms2, n2), resultados = medir(com_lote_na_api, em_lote)
+        base = base if base is not None else resultados
+        igual = resultados is not None and resultados == base
+        ok = ok and igual
+        print(f"{nome:26} 1ª {ms:6.1f} ms ({n} req)  2ª {ms2:6.1f} ms ({n2} req)  "
+              f"{'resultados iguais' if igual else 'RESULTADOS DIFERENTES'}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
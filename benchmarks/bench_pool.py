@@ -0,0 +1,84 @@
+"""
+Pool de threads com prioridade (app/core/pool.py) sob uma rajada de tarefas.
+
+Enfileira tarefas de fundo e de prefetch e, logo depois, as leituras da tela
+aberta (cada tarefa "custa" uma requisição simulada). Compara quanto as
+leituras visíveis esperam na fila FIFO de um ThreadPoolExecutor comum e no
+PoolPrioridades, e confere que o número de threads não passa de WORKERS e
+que tarefas canceladas na fila não rodam.
+
+Uso: python benchmarks/bench_pool.py [tarefas_por_classe]
+"""
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.pool import PoolPrioridades, VISIVEL, PREFETCH, FUNDO
+
+WORKERS = 4
+REQUISICAO = 0.01  # s
+
+
+def requisicao(inicio, esperas):
+    esperas.append(time.perf_counter() - inicio)
+    time.sleep(REQUISICAO)
+
+
+def p95(valores):
+    valores = sorted(valores)
+    return valores[int(len(valores) * 0.95)] * 1000
+
+
+def rajada(enviar, n):
+    esperas = {VISIVEL: [], PREFETCH: [], FUNDO: []}
+    futures = []
+    for prioridade in (FUNDO, PREFETCH, VISIVEL):
+        for _ in range(n):
+            futures.append(enviar(prioridade, requisicao, time.perf_counter(), esperas[prioridade]))
+    wait(futures)
+    return esperas
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    threads_antes = threading.active_count()
+
+    fifo = ThreadPoolExecutor(max_workers=WORKERS)
+    esperas_fifo = rajada(lambda prioridade, fn, *args: fifo.submit(fn, *args), n)
+    fifo.shutdown()
+
+    pool = PoolPrioridades(workers=WORKERS)
+    esperas_pool = rajada(pool.enviar, n)
+    threads_pool = threading.active_count() - threads_antes
+
+    print(f"{3 * n} tarefas de {REQUISICAO * 1000:.0f} ms em {WORKERS} workers (fundo, prefetch e só então as visíveis)")
+    print(f"{'':10} {'FIFO p95':>10} {'prioridade p95':>15}")
+    for prioridade, nome in ((VISIVEL, "visível"), (PREFETCH, "prefetch"), (FUNDO, "fundo")):
+        print(f"{nome:10} {p95(esperas_fifo[prioridade]):8.0f} ms {p95(esperas_pool[prioridade]):13.0f} ms")
+    print(f"\nthreads do pool: {threads_pool} (limite {WORKERS})")
+
+    # Tarefas canceladas enquanto estão na fila (tela fechada) não rodam
+    rodou = []
+    bloqueio = threading.Event()
+    ocupadas = [pool.enviar(VISIVEL, bloqueio.wait) for _ in range(WORKERS)]
+    canceladas = [pool.enviar(PREFETCH, rodou.append, i) for i in range(20)]
+    for future in canceladas:
+        future.cancel()
+    bloqueio.set()
+    wait(ocupadas)
+    pool.enviar(FUNDO, lambda: None).result()
+    print(f"canceladas na fila que rodaram: {len(rodou)} de {len(canceladas)}")
+
+    metricas = pool.metricas()
+    print(f"maior fila: {metricas['maior_fila']} | canceladas: {metricas['canceladas']}")
+    for nome, espera in metricas["espera_ms"].items():
+        print(f"  espera {nome:9} média {espera['media']:7.1f} ms  p95 {espera['p95']:7.1f} ms  (n={espera['n']})")
+    pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Prefetch depois do login (app/core/prefetch.py), contra uma API local com
+latência de celular.
+
+Simula o caminho mais comum do psicólogo e do paciente: login, alguns
+instantes na tela inicial e então as telas seguintes. Mede quanto cada tela
+espera pelos mesmos dados que ela pede de verdade (cache de respostas e
+espelho local), sem e com o PlanoPrefetch, e quantas requisições saíram.
+
+Uso: python benchmarks/bench_prefetch.py [latencia_ms]
+"""
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.local_store import LocalStore
+from app.core.neon import Database
+from app.core.pool import PoolPrioridades
+from app.core.prefetch import PlanoPrefetch, PACIENTE, PSICOLOGO
+from app.core.sync import SyncEngine
+
+LATENCIA = 0.15        # s por requisição
+NA_TELA_INICIAL = 1.0  # s que o usuário fica na tela inicial antes de seguir
+
+PSICOLOGO_ID, PACIENTE_ID = 1, 7
+
+ROTAS = {
+    f"/psicologo/{PSICOLOGO_ID}/stats": {"pacientes_count": 3, "proxima_consulta": None},
+    f"/psicologo/{PSICOLOGO_ID}/pacientes": {"pacientes": [[7, "Ana"], [8, "Bruno"], [9, "Carla"]]},
+    f"/agenda/psicologo/{PSICOLOGO_ID}": {"agenda": [[i, f"2026-10-{20 + i} 10:00", None] for i in range(5)]},
+    f"/paciente/{PACIENTE_ID}/psicologo": {"psicologo_id": PSICOLOGO_ID},
+    f"/diario/historico/{PACIENTE_ID}": {"historico": [[i, "2026-10-01 08:00", "Bem", "...", None] for i in range(40)]},
+    f"/users/{PACIENTE_ID}": {"username": "Ana", "email": "ana@x", "data_nascimento": "2000-01-01"},
+}
+requisicoes = []
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        caminho = self.path.split("?")[0]
+        requisicoes.append(caminho)
+        time.sleep(LATENCIA)
+        corpo = json.dumps(ROTAS.get(caminho, {})).encode()
+        self.send_response(200 if caminho in ROTAS else 404)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+
+# O que cada tela espera ao abrir (mesmas chamadas das telas, na thread do "pool")
+def tela_pacientes(db, sync):
+    db.get_pacientes_do_psicologo(PSICOLOGO_ID)
+
+
+def tela_estatisticas(db, sync):
+    db.get_patient_count(PSICOLOGO_ID)
+    db.get_next_appointment(PSICOLOGO_ID)
+
+
+def tela_disponibilidade(db, sync):
+    # Pinta com o espelho local; sem nada guardado, só depois do sync
+    if not sync.local("agenda", PSICOLOGO_ID):
+        sync.sync("agenda", PSICOLOGO_ID)
+
+
+def tela_diario(db, sync):
+    if not sync.pagina("diario", PACIENTE_ID)[0]:
+        sync.sync("diario", PACIENTE_ID)
+
+
+def tela_agendamento(db, sync):
+    psicologo = sync.psicologo_do_paciente(PACIENTE_ID)
+    if not (psicologo and sync.local("agenda", psicologo)):
+        psicologo = db.get_psicologo_id_by_paciente(PACIENTE_ID)
+        sync.sync("agenda", psicologo)
+
+
+CAMINHOS = {
+    PSICOLOGO: (PSICOLOGO_ID, "home_psicologo", [("home_psicologo", tela_estatisticas),
+                                                 ("pacientes", tela_pacientes),
+                                                 ("disponibilidade", tela_disponibilidade)]),
+    PACIENTE: (PACIENTE_ID, "home", [("diario", tela_diario), ("agendamento", tela_agendamento)]),
+}
+
+
+def percorrer(url, papel, com_prefetch):
+    user_id, inicial, telas = CAMINHOS[papel]
+    with tempfile.TemporaryDirectory() as pasta:
+        db = Database(url)
+        store = LocalStore(os.path.join(pasta, "bench.db"))
+        sync = SyncEngine(db, store)
+        pool = PoolPrioridades()
+        db.pool = pool
+        plano = PlanoPrefetch(db, sync, pool)
+        requisicoes.clear()
+
+        if com_prefetch:
+            plano.entrar(user_id, papel)
+            plano.na_tela(inicial)
+        time.sleep(NA_TELA_INICIAL)
+
+        tempos = []
+        for nome, abrir in telas:
+            inicio = time.perf_counter()
+            abrir(db, sync)
+            tempos.append((nome, (time.perf_counter() - inicio) * 1000))
+            if com_prefetch:
+                plano.na_tela(nome)
+
+        metricas = plano.metricas()
+        plano.sair()
+        pool.shutdown()
+        db.http.close()
+        store.close()
+        return tempos, len(requisicoes), metricas
+
+
+def main():
+    global LATENCIA
+    if len(sys.argv) > 1:
+        LATENCIA = float(sys.argv[1]) / 1000
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{servidor.server_address[1]}"
+
+    print(f"API com {LATENCIA * 1000:.0f} ms por requisição; {NA_TELA_INICIAL:.1f} s na tela inicial\n")
+    for papel in (PSICOLOGO, PACIENTE):
+        sem, n_sem, _ = percorrer(url, papel, False)
+        com, n_com, metricas = percorrer(url, papel, True)
+        print(f"{papel}: {'':14} {'sem prefetch':>13} {'com prefetch':>13}")
+        for (nome, t_sem), (_, t_com) in zip(sem, com):
+            print(f"  {nome:26} {t_sem:10.1f} ms {t_com:10.1f} ms")
+        print(f"  {'total percebido':26} {sum(t for _, t in sem):10.1f} ms {sum(t for _, t in com):10.1f} ms")
+        print(f"  requisições: {n_sem} sem, {n_com} com | prefetch: {metricas}\n")
+    servidor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
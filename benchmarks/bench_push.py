@@ -0,0 +1,148 @@
+"""
+Canal de push (app/core/push.py) contra um servidor SSE local de mentira.
+
+1. Mede a latência entre publicar um evento no servidor e ele chegar ao listener.
+2. Derruba o servidor, publica eventos com ele fora do ar e sobe de novo:
+   o canal precisa reconectar sozinho e receber o que perdeu (Last-Event-ID).
+3. Servidor sem a rota /eventos: o canal desiste e fica só no polling.
+
+Uso: python benchmarks/bench_push.py [eventos]
+"""
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.push import CanalPush
+from app.core.transport import Transport
+
+
+class Eventos:
+    """Histórico de eventos publicados (o servidor repete tudo depois do Last-Event-ID)."""
+
+    def __init__(self):
+        self.lista = []
+        self.cond = threading.Condition()
+
+    def publicar(self, tipo, dados):
+        with self.cond:
+            self.lista.append((len(self.lista) + 1, tipo, dados))
+            self.cond.notify_all()
+
+    def depois_de(self, ultimo_id, timeout):
+        with self.cond:
+            if len(self.lista) <= ultimo_id:
+                self.cond.wait(timeout)
+            return self.lista[ultimo_id:]
+
+
+def criar_servidor(eventos, porta=0, com_rota=True):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            if not com_rota or not self.path.startswith("/eventos/"):
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            ultimo = int(self.headers.get("Last-Event-ID") or 0)
+            try:
+                self.wfile.write(b"retry: 200\n\n")
+                self.wfile.flush()
+                while not self.server.parando:
+                    novos = eventos.depois_de(ultimo, timeout=0.5)
+                    if not novos:
+                        self.wfile.write(b": ping\n\n")  # heartbeat
+                    for ev_id, tipo, dados in novos:
+                        self.wfile.write(f"id: {ev_id}\nevent: {tipo}\ndata: {json.dumps(dados)}\n\n".encode())
+                        ultimo = ev_id
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+    servidor = ThreadingHTTPServer(("127.0.0.1", porta), Handler)
+    servidor.daemon_threads = True
+    servidor.parando = False
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+
+def parar(servidor):
+    servidor.parando = True
+    servidor.shutdown()
+    servidor.server_close()
+
+
+def esperar(condicao, timeout=10):
+    fim = time.monotonic() + timeout
+    while not condicao() and time.monotonic() < fim:
+        time.sleep(0.005)
+    return condicao()
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    eventos = Eventos()
+    servidor = criar_servidor(eventos)
+    porta = servidor.server_address[1]
+
+    recebidos = []
+    estados = []
+    canal = CanalPush(SimpleNamespace(http=Transport(f"http://127.0.0.1:{porta}", retries=0)))
+    canal.BACKOFF_BASE = 0.2
+    canal.listeners.append(lambda tipo, dados: recebidos.append((time.perf_counter(), tipo, dados)))
+    canal.listeners_estado.append(estados.append)
+    canal.entrar(1)
+    assert esperar(lambda: canal.conectado), "não conectou"
+
+    # 1. Latência
+    enviados = []
+    for i in range(n):
+        enviados.append(time.perf_counter())
+        eventos.publicar("agenda", {"psicologo_id": 1, "seq": i})
+        esperar(lambda: len(recebidos) > i, timeout=5)
+    latencias = sorted((r[0] - t) * 1000 for r, t in zip(recebidos, enviados))
+    print(f"{len(latencias)}/{n} eventos entregues")
+    print(f"latência p50 {latencias[len(latencias) // 2]:.2f} ms | "
+          f"p95 {latencias[int(len(latencias) * 0.95)]:.2f} ms | máx {latencias[-1]:.2f} ms")
+
+    # 2. Servidor cai, eventos são publicados com ele fora, servidor volta
+    parar(servidor)
+    esperar(lambda: not canal.conectado)
+    for i in range(3):
+        eventos.publicar("notificacao", {"id": 1000 + i, "titulo": "t", "mensagem": "m", "lida": False})
+    t0 = time.perf_counter()
+    servidor = criar_servidor(eventos, porta)
+    ok = esperar(lambda: len(recebidos) >= n + 3)
+    print(f"\nreconectou e recebeu os perdidos: {'sim' if ok else 'NÃO'} "
+          f"({(time.perf_counter() - t0) * 1000:.0f} ms depois do servidor voltar)")
+    seqs = [r[2].get("seq", r[2].get("id")) for r in recebidos]
+    print(f"sem duplicados: {'sim' if len(seqs) == len(set(seqs)) else 'NÃO'}")
+    print(f"estados do canal: {estados}")
+    canal.stop()
+    parar(servidor)
+
+    # 3. API sem a rota: desiste e não fica martelando
+    servidor = criar_servidor(eventos, com_rota=False)
+    tentativas = []
+    canal = CanalPush(SimpleNamespace(http=Transport(f"http://127.0.0.1:{servidor.server_address[1]}", retries=0)))
+    original = canal._escutar
+    canal._escutar = lambda user_id: tentativas.append(1) or original(user_id)
+    canal.entrar(1)
+    time.sleep(1)
+    print(f"\nsem rota /eventos: {len(tentativas)} tentativa(s) em 1 s (próxima em {canal.SEM_ENDPOINT // 60} min)")
+    canal.stop()
+    parar(servidor)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,34 @@
-import os
-import sys
-from kivy.core.window import Window
-from kivy.lang import Builder
-from kivymd.app import MDApp
-from app.core.neon import Database
-from app.ui.manager import ScreenController
-from dotenv import load_dotenv
-from kivy.resources import resource_add_path 
-from plyer import notification
-from kivy.clock import Clock
+# Primeiro de tudo: com COGNITIVE_PERFIL_INICIO ligado, mede cada import daqui para baixo
+from app.core.inicio import perfil, sob_demanda
+
+with perfil.trecho("imports do main"):
+    import os
+    import sys
+    from kivy.core.window import Window
+    from kivy.lang import Builder
+    # Regras .kv já interpretadas ficam em disco (vale também para as do KivyMD, importado abaixo)
+    from app.ui import kv_cache
+    kv_cache.ativar()
+    from kivymd.app import MDApp
+    from app.core.neon import Database
+    from app.core.async_db import AsyncDatabase
+    from app.core.pool import PoolPrioridades, FUNDO
+    from app.core.local_store import LocalStore
+    from app.core.sync import SyncEngine
+    from app.core.prefetch import PlanoPrefetch
+    from app.core.outbox import Outbox
+    from app.core.notificacoes import NotificacaoPoller
+    from app.core.notificacao_store import NotificacaoStore
+    from app.core.push import CanalPush
+    from app.core.relatorios import Relatorios
+    from app.core.relatorio_cache import CacheRelatorios
+    from app.ui.manager import ScreenController
+    from dotenv import load_dotenv
+    from kivy.resources import resource_add_path 
+    from kivy.clock import Clock
+
+# Só é importado quando a primeira notificação nativa é enviada
+plyer = sob_demanda("plyer")
 
 
 load_dotenv()
@@ -31,19 +51,17 @@ if hasattr(sys, '_MEIPASS'):
     resource_add_path(os.path.join(sys._MEIPASS))
     
 # --- 3. USE A FUNÇÃO 'resource_path' em TODOS os 'Builder.load_file' ---
-Builder.load_file(resource_path("app/ui/telas/login.kv"))
-Builder.load_file(resource_path("app/ui/telas/register.kv"))
-Builder.load_file(resource_path("app/ui/telas/home.kv"))
-Builder.load_file(resource_path("app/ui/telas/conta.kv"))
-Builder.load_file(resource_path("app/ui/telas/diario.kv"))
-Builder.load_file(resource_path("app/ui/telas/main.kv"))
-Builder.load_file(resource_path("app/ui/telas/home_psicologo.kv"))
-Builder.load_file(resource_path("app/ui/telas/register_activity.kv"))
-Builder.load_file(resource_path("app/ui/telas/consulta_anotacao.kv"))
+# (os .kv de cada tela são carregados pelo ScreenController na primeira navegação)
+with perfil.trecho("kv lista.kv"):
+    Builder.load_file(resource_path("app/ui/lista.kv"))
 
 
 class CognitiveApp(MDApp):
     def build(self):
+        with perfil.trecho("build"):
+            return self._build()
+
+    def _build(self):
         self.icon = resource_path("app/assets/img.png") # Pode ser PNG aqui
         self.title = "Cognitive"
         self.theme_cls.theme_style = "Light"
@@ -58,39 +76,180 @@ class CognitiveApp(MDApp):
             print("----------------------")
             return None 
 
+        # Todas as chamadas bloqueantes das telas (e as revalidações do cache) passam
+        # por um pool só: número fixo de threads/conexões, o que a tela espera na frente
+        self.pool = PoolPrioridades()
+        self.db.pool = self.pool
+
+        # Mesma API, mas "awaitable": as telas usam isto para não travar a UI
+        self.async_db = AsyncDatabase(self.db, self.pool)
+
+        # Cópia local (SQLite) para pintar diário, agenda e notificações sem esperar a rede
+        self.store = LocalStore(os.path.join(self.user_data_dir, "cognitive.db"))
+        self.sync_engine = SyncEngine(self.db, self.store)
+
+        # Dados das telas que provavelmente vêm a seguir, adiantados com folga de rede
+        self.prefetch = PlanoPrefetch(self.db, self.sync_engine, self.pool)
+
+        # Escritas do diário/anotações: salvas localmente e enviadas em segundo plano
+        self.outbox = Outbox(self.db, self.store, self.sync_engine)
+        self.outbox.listeners.append(self._on_outbox_event)
+
+        # Notificações: um estado só para todas as telas (sino, lista, aviso),
+        # alimentado pelo poller em segundo plano (só as novas, com intervalo adaptativo)
+        poller = NotificacaoPoller(self.db, self.sync_engine)
+        poller.listeners.append(self._on_notificacoes_novas)
+        self.notificacoes = NotificacaoStore(self.async_db, self.sync_engine, poller)
+
+        # Eventos empurrados pela API (notificações e agenda); se cair, o polling acima assume
+        self.push = CanalPush(self.db)
+        self.push.listeners.append(self._on_push_evento)
+        self.push.listeners_estado.append(poller.usar_push)
+
+        # Relatórios de pacientes: gráficos decodificados guardados no aparelho
+        self.relatorios = Relatorios(self.db, CacheRelatorios(os.path.join(self.user_data_dir, "relatorios")))
+
         self.logged_user_id = None
         self.logged_user_type = None
 
-        sm = ScreenController(app=self)
+        sm = ScreenController(app=self, resource_path=resource_path)
         return sm
 
     def on_start(self):
-        # Inicia a checagem automática assim que o app abre
-        # Roda a cada 60 segundos
-        Clock.schedule_interval(self.checar_notificacoes_background, 60)
-
-    def checar_notificacoes_background(self, dt):
-        # Se não tiver usuário logado, não faz nada
-        if not self.logged_user_id: return
-        
-        try:
-            # Busca notificações silenciosamente
-            # Note que usamos self.db (porque estamos dentro do App)
-            notificacoes = self.db.get_minhas_notificacoes(self.logged_user_id)
-            
-            # Filtra não lidas
-            nao_lidas = [n for n in notificacoes if not n['lida']]
-            
-            if nao_lidas:
-                # Envia notificação nativa do Android/Windows
-                notification.notify(
+        perfil.marcar("on_start")
+        if perfil.ativo:
+            Window.bind(on_flip=self._primeiro_quadro)
+        # Acorda a API (partida a frio do serverless) enquanto o usuário ainda está no login,
+        # e mede qual endereço responde mais rápido
+        self.db.http.aquecer(self.pool.fila(FUNDO))
+        self.outbox.start()
+        self.notificacoes.poller.start()
+        self.push.start()
+
+    def _primeiro_quadro(self, *args):
+        Window.unbind(on_flip=self._primeiro_quadro)
+        perfil.marcar("primeiro quadro")
+        perfil.salvar()
+
+    def on_pause(self):
+        # Em segundo plano: sem conexão aberta e checagens bem mais espaçadas (bateria)
+        self.push.pausar()
+        self.notificacoes.poller.pausar()
+        # O sistema mata primeiro quem ocupa mais memória em segundo plano
+        if self.root:
+            self.root.liberar()
+        return True
+
+    def on_resume(self):
+        # Depois de um tempo em segundo plano a API pode ter esfriado (pausa curta: ainda está quente)
+        self.db.http.aquecer(self.pool.fila(FUNDO), recente=True)
+        self.push.retomar()
+        self.notificacoes.poller.retomar()
+        self.outbox.flush_now()
+
+    def _on_outbox_event(self, evento, tabela, escopo):
+        # Chamado na thread da outbox: volta para a thread da UI
+        Clock.schedule_once(lambda dt: self._refresh_after_outbox(evento, tabela))
+
+    def _refresh_after_outbox(self, evento, tabela):
+        telas = {"diario": "diario", "anotacoes": "consulta_anotacao"}
+        nome = telas.get(tabela)
+        if nome and self.root and self.root.current == nome:
+            tela = self.root.get_screen(nome)
+            if nome == "diario":
+                tela.load_notas()
+            elif tela.paciente_selecionado_id:
+                tela.load_historico(tela.paciente_selecionado_id)
+        if evento == "falhou":
+            try:
+                plyer.notification.notify(
                     title="Cognitive",
-                    message=f"Você tem {len(nao_lidas)} nova(s) mensagem(ns)!",
+                    message="Um registro não pôde ser enviado ao servidor.",
                     app_name="Cognitive",
                     timeout=10
                 )
+            except Exception as e:
+                print(f"Erro ao enviar notificação: {e}")
+
+    def on_stop(self):
+        if hasattr(self, 'outbox'):
+            self.outbox.stop()
+        if hasattr(self, 'notificacoes'):
+            self.notificacoes.poller.stop()
+        if hasattr(self, 'push'):
+            self.push.stop()
+        if hasattr(self, 'prefetch'):
+            self.prefetch.sair()
+        if hasattr(self, 'pool'):
+            self.pool.shutdown(wait=False, cancel_futures=True)
+        if hasattr(self, 'db'):
+            self.db.http.close()
+        if hasattr(self, 'store'):
+            self.store.close()
+
+    def entrar(self, user_id):
+        """Depois do login: notificações e eventos passam a ser do novo usuário."""
+        self.notificacoes.entrar(user_id)
+        self.push.entrar(user_id)
+        self.prefetch.entrar(user_id, self.logged_user_type)
+
+    def sair(self):
+        self.prefetch.sair()
+        self.push.sair()
+        self.notificacoes.sair()
+
+    def _on_push_evento(self, evento, dados):
+        # Chamado na thread do canal: nada de rede aqui, senão o stream fica parado
+        user_id = self.logged_user_id
+        if user_id is None:
+            return
+        if evento == "notificacao":
+            self.notificacoes.poller.receber(user_id, dados if isinstance(dados, list) else [dados])
+        elif evento == "agenda":
+            psicologo_id = dados.get("psicologo_id") if isinstance(dados, dict) else None
+            psicologo_id = psicologo_id or (user_id if self.logged_user_type == "Psicólogo" else None)
+            # Respostas guardadas da agenda (e do painel do psicólogo) ficaram velhas
+            self.db.cache.invalidate("/agenda/", "/psicologo/")
+            if not psicologo_id:
+                Clock.schedule_once(lambda dt: self._refresh_agenda(psicologo_id))
+                return
+            # O espelho local é atualizado no pool (a thread do canal só lê o stream);
+            # a tela redesenha quando o sync termina
+            future = self.pool.enviar(FUNDO, self.sync_engine.sync, "agenda", psicologo_id)
+            future.add_done_callback(lambda f: Clock.schedule_once(lambda dt: self._refresh_agenda(psicologo_id)))
+
+    def _refresh_agenda(self, psicologo_id):
+        if not self.root:
+            return
+        atual = self.root.current
+        tela = self.root.get_screen(atual)
+        if atual == "disponibilidade":
+            tela.render_agenda(self.sync_engine.local("agenda", self.logged_user_id))
+        elif atual == "agendamento" and psicologo_id:
+            tela.mostrar_agenda_local(psicologo_id)
+        elif atual == "home_psicologo":
+            tela.load_dashboard_data()
+
+    def _on_notificacoes_novas(self, user_id, novas):
+        # Chamado na thread do poller: volta para a thread da UI
+        Clock.schedule_once(lambda dt: self._anunciar_notificacoes(user_id, novas))
+
+    def _anunciar_notificacoes(self, user_id, novas):
+        if user_id != self.logged_user_id:
+            return
+        if self.root and self.root.current == "notifications":
+            return # Já está vendo a lista (que se atualiza sozinha pelo NotificacaoStore)
+
+        # Envia notificação nativa do Android/Windows (uma vez por notificação)
+        if len(novas) == 1:
+            titulo, mensagem = novas[0].get("titulo") or "Cognitive", novas[0].get("mensagem") or ""
+        else:
+            titulo, mensagem = "Cognitive", f"Você tem {len(novas)} nova(s) mensagem(ns)!"
+        try:
+            plyer.notification.notify(title=titulo, message=mensagem, app_name="Cognitive", timeout=10)
         except Exception as e:
-            print(f"Erro no background check: {e}")
+            print(f"Erro ao enviar notificação: {e}")
 
 if __name__ == "__main__":
+    perfil.marcar("run")
     CognitiveApp().run()
\ No newline at end of file